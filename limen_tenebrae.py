@@ -1,9 +1,28 @@
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
+import time
+STARTUP_CLOCK_ORIGIN = time.perf_counter()
+
+import argparse
+import atexit
+import collections
+import concurrent.futures
+import copy
+import csv
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
 import math
+import os
+import queue
 import random
-import time
+import socket
+import struct
+import threading
+import tracemalloc
+import types
+import zipfile
+from multiprocessing import shared_memory
 import numpy as np
 
 # ============================================================================
@@ -88,6 +107,290 @@ DEBRIS_EXPLOSION_SPEED = 50.0
 COLLISION_THRESHOLD_MULTIPLIER = 1.2
 RESTITUTION_COEFFICIENT = 0.8
 MIN_COLLISION_VELOCITY = 0.1
+CONTINUOUS_EVENT_DETECTION = True
+EVENT_CAPTURE = 0
+EVENT_COLLISION = 1
+BATCHED_CONTACT_SOLVER = True
+CONTACT_SOLVER_ITERATIONS = 4
+ORBITAL_TRAIL_LENGTH = 200
+BROADPHASE_HALF_NEIGHBOURS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                              if (dx, dy, dz) > (0, 0, 0)]
+BROADPHASE_MIN_BODIES = 32
+
+# SNAPSHOT & REWIND CONSTANTS
+SNAPSHOT_FORMAT_VERSION = 3
+SNAPSHOT_RING_SIZE = 64
+SNAPSHOT_RING_INTERVAL = 0.5
+SNAPSHOT_MMAP_MIN_BYTES = 64 * 1024
+QUICKSAVE_PATH = "limen_quicksave.npz"
+
+# TRAJECTORY RECORDER & REPLAY CONSTANTS
+RECORDER_FORMAT_VERSION = 3
+RECORDER_MAGIC = b"LTREC"
+RECORDER_HEADER_SIZE = 4096
+RECORDER_CHUNK_STEPS = 256
+RECORDER_DEBRIS_INTERVAL = 16
+RECORDER_DEBRIS_CAPACITY = 1024
+RECORDER_FLEET_CAPACITY = 512  # ships per fleet frame, recorded with the debris frames
+RECORDER_MINOR_BODY_CAPACITY = 4096  # minor bodies per frame; larger populations are thinned evenly
+RECORDER_PATH = "limen_recording.ltr"
+RECORDER_FLAG_PRESENT = 1
+RECORDER_FLAG_CAPTURED = 2
+RECORDER_FLAG_SPAGHETTIFIED = 4
+RECORDER_FLAG_ENGULFED = 8
+REPLAY_SCRUB_SECONDS = 1.0
+
+# PARAMETER SWEEP CONSTANTS
+SWEEP_DEFAULT_DURATION = 60.0
+SWEEP_RESULTS_PATH = "sweep_results.csv"
+SWEEP_SCENARIOS = ('solar_system', 'black_hole', 'red_giant', 'collision')
+ENSEMBLE_PARAMETERS = ('black_hole_mass', 'LOGICAL_CAPTURE_RADIUS_MULTIPLIER')
+
+# EVENT SCHEDULER CONSTANTS
+SCHEDULED_SUPERNOVA_START = 0
+SCHEDULED_SUPERNOVA_END = 1
+SCHEDULED_BLACK_HOLE_VISIBLE = 2
+SCHEDULED_RED_GIANT_COMPLETE = 3
+SCHEDULED_ENGULF_CHECK = 4
+ENGULF_PREDICTION_HORIZON = 0.5
+ENGULF_PREDICTION_RESOLUTION = 2 * DT
+ENGULF_RESCHEDULE_TOLERANCE = DT
+
+# ANALYTIC KEPLER PROPAGATION CONSTANTS
+KEPLER_PROPAGATION = True
+KEPLER_MAX_ECCENTRICITY = 0.99
+KEPLER_MAX_ITERATIONS = 16
+KEPLER_TOLERANCE = 1e-12
+
+# SUBSTEP SCHEDULER & TIME WARP CONSTANTS
+TIME_SCALE_STEPS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+FRAME_PHYSICS_BUDGET = 0.012
+MAX_FRAME_DELTA = 0.25
+MAX_TIME_BACKLOG = 0.5
+SUBSTEP_MAX_MULTIPLIER = 64
+SUBSTEP_INTEGRATED_MAX_MULTIPLIER = 4  # ceiling while planets are Verlet-integrated (events, no Kepler field)
+SUBSTEP_ORBIT_FRACTION = 1.0 / 32.0  # of the shortest free-fall time sqrt(r^3 / GM) of an integrated planet
+TIME_SCALE_SMOOTHING = 0.1
+
+# PARTICLE POOL & PARALLEL KERNEL CONSTANTS
+PARTICLE_POOL_INITIAL_CAPACITY = 1024
+PARTICLE_POOL_META = ('count', 'origin')
+DEBRIS_POOL_FIELDS = {
+    'position': ((3,), np.float64),
+    'velocity': ((3,), np.float64),
+    'color': ((3,), np.float64),
+    'age': ((), np.float64),
+    'lifetime': ((), np.float64),
+    'initial_distance': ((), np.float64),
+    'absorption_delay': ((), np.float64),
+    'mass_factor': ((), np.float64),
+    'planet_type': ((), 'U16'),
+    'weight': ((), np.float64)
+}
+EJECTA_POOL_FIELDS = {
+    'position': ((3,), np.float64),
+    'velocity': ((3,), np.float64),
+    'age': ((), np.float64),
+    'lifetime': ((), np.float64),
+    'weight': ((), np.float64)
+}
+PARTICLE_FIELD_DEFAULTS = {'weight': 1.0}  # fields that are not zero-filled when a batch omits them
+EJECTA_COLOR_KNOTS = np.array([0.0, 0.3, 0.7, 1.0])
+EJECTA_COLOR_RAMP = np.array([[1.0, 1.0, 1.0], [1.0, 1.0, 0.0], [1.0, 0.5, 0.0], [0.5, 0.0, 0.0]])
+DEBRIS_DRAW_NEAR = 0
+DEBRIS_DRAW_FAR = 1
+DEBRIS_DRAW_CULLED = 2
+PARALLEL_CHUNK_SIZE = 16384
+PARALLEL_KERNEL_THREADS = min(8, os.cpu_count() or 1)
+
+# PRECISION CONSTANTS
+PRECISION_MODES = {'float64': np.float64, 'mixed': np.float32}
+# Every per-particle float except 'age', which accumulates dt each step and stays float64
+PRECISION_FIELDS = ('position', 'velocity', 'color', 'lifetime', 'initial_distance', 'absorption_delay',
+                    'mass_factor', 'weight')
+FLOATING_ORIGIN_RECENTER_DISTANCE = 50.0
+PRECISION_REPORT_DURATION = 60.0
+PRECISION_REPORT_CHECKPOINTS = (1.0 / 60.0, 0.25, 0.5, 1.0)  # fractions of the report duration
+PRECISION_ERROR_WINDOW = 1.0  # seconds both precisions run from a shared state at each checkpoint
+PRECISION_POSITION_TOLERANCE = 0.01  # world units, p99 per-particle error over the window at every checkpoint
+PRECISION_RADIAL_TOLERANCE = 0.05  # radial quantile shift, in black hole visual radii
+PRECISION_SURVIVOR_TOLERANCE = 0.01  # fraction of particles alive in only one of the runs
+
+# DEBRIS SHARD CONSTANTS
+DEBRIS_SHARD_CAPACITY = 262144
+DEBRIS_SHARD_CONTROL_SIZE = 8  # command, dt, black hole on, black hole x/y/z, black hole mass, seed
+DEBRIS_SHARD_COMMAND_STEP = 0
+DEBRIS_SHARD_COMMAND_STOP = 1
+DEBRIS_SHARD_BARRIER_TIMEOUT = 10.0
+
+# TELEMETRY CONSTANTS
+TELEMETRY_HOST = '127.0.0.1'
+TELEMETRY_DEFAULT_PORT = 8765
+TELEMETRY_PUBLISH_INTERVAL = 1.0 / 30.0
+TELEMETRY_KEYFRAME_INTERVAL = 120
+TELEMETRY_SEND_BUFFER = 4096
+TELEMETRY_POSITION_QUANTUM = 0.01
+TELEMETRY_VELOCITY_QUANTUM = 0.01
+TELEMETRY_MASS_QUANTUM = 0.1
+TELEMETRY_FRAME_HEADER = struct.Struct('<IdBBH')  # frame number, simulation time, frame flags, field mask, bodies
+TELEMETRY_FLAG_KEYFRAME = 1
+TELEMETRY_FIELD_POSITION = 1
+TELEMETRY_FIELD_VELOCITY = 2
+TELEMETRY_FIELD_FLAGS = 4
+TELEMETRY_FIELD_STAGE = 8
+TELEMETRY_FIELD_BLACK_HOLE = 16
+TELEMETRY_FIELD_DEBRIS = 32
+TELEMETRY_FIELDS_ALL = 63
+
+# STARTUP CONSTANTS
+STARTUP_PHASES = ('import', 'gl_import', 'window', 'init', 'first_frame')
+
+# SCENARIO GENERATOR CONSTANTS
+MINOR_BODY_FIELDS = {
+    'position': ((3,), np.float64),
+    'velocity': ((3,), np.float64),
+    'acceleration': ((3,), np.float64),
+    'group': ((), np.uint8),
+    'parent': ((), np.int32)  # planet index for moons, -1 otherwise
+}
+MINOR_BODY_BELT = 0
+MINOR_BODY_KUIPER = 1
+MINOR_BODY_MOON = 2
+MINOR_BODY_COLORS = np.array([[0.6, 0.5, 0.4], [0.6, 0.8, 1.0], [0.85, 0.85, 0.8]], dtype=np.float32)
+MINOR_BODY_POINT_SIZE = 1.0
+RADIAL_PROFILES = ('uniform', 'area', 'gaussian')
+ASTEROID_BELT_COUNT = 100_000
+ASTEROID_BELT_RANGE = (220.0, 280.0)
+ASTEROID_BELT_ECCENTRICITY = 0.05  # Rayleigh scale
+ASTEROID_BELT_INCLINATION = 3.0  # Rayleigh scale, degrees
+KUIPER_CLOUD_COUNT = 100_000
+KUIPER_CLOUD_RANGE = (650.0, 900.0)
+KUIPER_CLOUD_ECCENTRICITY = 0.1
+KUIPER_CLOUD_INCLINATION = 12.0
+MOON_SYSTEM_COUNT = 200
+MOON_ORBIT_RANGE = (1.5, 4.0)  # parent radii
+MOON_ORBIT_INCLINATION = 5.0
+MOON_HILL_FRACTION = 0.3
+GENERATOR_BENCHMARK_BODIES = 1_000_000
+
+# SIMULATION ENGINE CONSTANTS
+SIMULATION_STATE = (
+    'G', 'current_time', 'simulation_time', 'camera_state', 'camera_mode', 'camera_transition_active',
+    'camera_transition_start', 'camera_transition_duration', 'camera_start_pos', 'camera_start_target',
+    'is_solar_system_active', 'sun_exists', 'sun_position', 'planets', 'selected_planet_index',
+    'spaceship_exists', 'spaceship_position', 'spaceship_velocity', 'spaceship_rotation', 'spaceship_physics_mode',
+    'is_black_hole_active', 'black_hole_position', 'black_hole_mass', 'black_hole_alpha', 'accretion_disk_rotation',
+    'is_supernova_active', 'keys_locked', 'is_red_giant_active', 'red_giant_start_time', 'current_sun_radius',
+    'engulfed_planets', 'supernova_pool', 'supernova_start_time', 'debris_pool', 'debris_generation_cooldown',
+    'sequence_start_time', 'sequence_stage', 'snapshot_ring', 'last_ring_snapshot_time',
+    'recorder_active', 'recorder_state', 'replay_active', 'replay_state',
+    'event_queue', 'event_sequence', 'engulf_predictions', 'time_scale_index', 'substep_state',
+    'particle_precision', 'debris_shards', 'particle_budget', 'physics_scratch',
+    'fleet', 'fleet_behaviour', 'minor_bodies', 'ephemeris', 'trajectory_prediction'
+)
+# Module globals every world shares on purpose: menu and window, GL and render buffers, kernels, telemetry, logging, probes
+SIMULATION_SHARED_STATE = (
+    'game_state', 'mouse_x', 'mouse_y', 'start_button_hover', 'current_menu_section', 'about_button_hover',
+    'back_button_hover', 'last_time', 'starfield', 'starfield_colors', 'spaceship_scale', 'spaceship_thrust',
+    'spaceship_max_speed', 'spaceship_collision_radius', 'star_destroyer_display_list', 'gl_quadric',
+    'kernel_threads', 'kernel_executor', 'kernel_scratch', 'render_buffers', 'particle_emitters', 'camera_matrices',
+    'trajectory_overlay', 'telemetry_state', 'telemetry_stats', 'startup_profile', 'startup_profile_report',
+    'active_simulation', 'simulation', 'allocation_probe', 'log_queue', 'log_sinks', 'log_state', 'log_start_lock',
+    'log_stats'
+)
+SIMULATION_ISOLATION_FRAMES = 120
+
+# BLACK HOLE ZONE CONSTANTS
+BLACK_HOLE_ZONE_HORIZON = 0
+BLACK_HOLE_ZONE_INNER_DISK = 1
+BLACK_HOLE_ZONE_ACCRETION_DISK = 2
+BLACK_HOLE_ZONE_LOGICAL_CAPTURE = 3
+BLACK_HOLE_ZONE_FREE = 4
+INNER_DISK_RADIUS_MULTIPLIER = 3.0  # visual radii
+ACCRETION_DISK_RADIUS_MULTIPLIER = 6.0
+BLACK_HOLE_ZONE_EDGES = np.array([1.0, INNER_DISK_RADIUS_MULTIPLIER, ACCRETION_DISK_RADIUS_MULTIPLIER]) * BLACK_HOLE_VISUAL_RADIUS
+
+# PARTICLE BUDGET CONSTANTS
+PARTICLE_BUDGET_CAP = 2000  # live particles across every emitter pool
+PARTICLE_BUDGET_RANGE = (200, 2_000_000)  # bounds of the cap adapted to a frame-time target
+PARTICLE_BUDGET_SMOOTHING = 0.1
+PARTICLE_PRIORITY_WEIGHTS = {'size': 1.0, 'age': 1.0, 'camera': 0.5, 'horizon': 1.5}
+PARTICLE_PRIORITY_FLOOR = 0.05
+EJECTA_POINT_SIZES = ((math.inf, 5.0),)  # (camera distance up to, point size in pixels)
+DEBRIS_POINT_SIZES = ((BLACK_HOLE_VISUAL_RADIUS * 5.0, 3.0), (BLACK_HOLE_VISUAL_RADIUS * 15.0, 1.5))
+
+# RAY PICKING CONSTANTS
+CAMERA_FOV = 60.0
+CAMERA_ASPECT = 1.25
+CAMERA_NEAR = 0.1
+CAMERA_FAR = 5000.0
+CAMERA_UP = np.array([0.0, 0.0, 1.0])
+VIEWPORT_SIZE = (1000, 800)
+PICK_LEAF_SIZE = 8
+PICK_PIXEL_TOLERANCE = 6.0  # pixels around the cursor that still count as a hit
+PICK_REBUILD_GROWTH = 2.0  # rebuild once refitted leaves grow this much past their size at build time
+PICK_BENCHMARK_BODIES = 100_000
+PICK_BENCHMARK_CLICKS = 1000
+
+# EPHEMERIS CONSTANTS
+EPHEMERIS_FORMAT_VERSION = 1
+EPHEMERIS_MAGIC = b"LTEPH"
+EPHEMERIS_HEADER_SIZE = 4096
+EPHEMERIS_PATH = "limen_ephemeris.lte"
+EPHEMERIS_SPAN = 300.0
+EPHEMERIS_SEGMENT_STEPS = 16  # physics steps per Chebyshev segment (about a fifth of Mercury's orbit)
+EPHEMERIS_DEGREE = 10
+EPHEMERIS_MATCH_TOLERANCE = 1e-3  # world units between the table and the live planets when attaching
+EPHEMERIS_BENCHMARK_CALLS = 2000
+
+# TRAJECTORY PREDICTION CONSTANTS
+SPACESHIP_DAMPING = 0.98  # velocity kept per physics step
+SPACESHIP_GRAVITY_SCALE = 0.0  # fraction of the gravity field the ship feels (0: it ignores gravity)
+TRAJECTORY_STEP_BANDS = ((1.0, 1), (3.0, 2), (6.0, 4))  # (seconds ahead, prediction step in DTs)
+TRAJECTORY_HORIZON = TRAJECTORY_STEP_BANDS[-1][0]
+# Damping and distance covered by a coarse step, equal to that many DT steps of free flight
+TRAJECTORY_STEP_DRIFT = {multiple: (SPACESHIP_DAMPING ** multiple,
+                                    DT * sum(SPACESHIP_DAMPING ** -k for k in range(multiple)))
+                         for _, multiple in TRAJECTORY_STEP_BANDS}
+TRAJECTORY_REUSE_TOLERANCE = 0.5  # position/velocity mismatch at which the ship is taken to have thrust
+TRAJECTORY_COST_SMOOTHING = 0.1
+TRAJECTORY_POINT_SIZE = 2.0
+TRAJECTORY_COLOR = (0.3, 0.9, 1.0)
+TRAJECTORY_CONTACT_COLOR = (1.0, 0.3, 0.2)
+TRAJECTORY_BENCHMARK_FRAMES = 600
+TRAJECTORY_BENCHMARK_THRUST_FRAMES = 120  # frames between random thrusts
+
+# ALLOCATION PROBE CONSTANTS
+ALLOCATION_SNAPSHOT_FRAMES = 120  # frames between tracemalloc snapshots
+ALLOCATION_TRACE_DEPTH = 1
+ALLOCATION_REPORT_LINES = 5  # source lines listed per snapshot comparison
+ALLOCATION_WARMUP_STEPS = 200
+ALLOCATION_REPORT_STEPS = 1200
+# A stage passes only when it allocates (close to) nothing per frame: the slack covers one-off warm-up
+# allocations amortised over a report, not any per-step work
+ALLOCATION_TRANSIENT_LIMIT = 64.0  # bytes per frame
+ALLOCATION_RETAINED_LIMIT = 4.0  # bytes per frame
+
+# LOGGING CONSTANTS
+LOG_QUEUE_CAPACITY = 10000
+LOG_DRAIN_INTERVAL = 0.05
+LOG_DEFAULT_KEY_INTERVAL = 0.25
+LOG_RATE_LIMITS = {
+    'red_giant_progress': 1.0,
+    'camera_zoom': 0.25,
+    'time_scale': 0.25,
+    'sweep_progress': 1.0
+}
+
+# FLEET CONSTANTS
+FLEET_SQUADRON_SIZE = 100
+FLEET_BEHAVIOUR_DRIFT = 0
+FLEET_BEHAVIOUR_ORBIT = 1
+FLEET_BEHAVIOUR_FLEE = 2
+FLEET_BEHAVIOUR_NAMES = ('Drift', 'Orbit', 'Flee')
+FLEET_AUTOPILOT_ACCELERATION = 60.0
+FLEET_ORBIT_SPEED_FRACTION = 0.8
+FLEET_FLEE_RADIUS_MULTIPLIER = 15.0
 
 # Planet configuration data: [name, mass, radius, orbit_distance, color, initial_angle]
 PLANET_DATA = [
@@ -113,7 +416,8 @@ sun_exists = True
 sun_position = np.array([0.0, 0.0, 0.0])
 planets = []
 selected_planet_index = 0
-starfield = []
+starfield = np.zeros((0, 3), dtype=np.float32)
+starfield_colors = np.zeros((0, 3), dtype=np.float32)
 camera_state = {
     'target': np.array([0.0, 0.0, 0.0]),
     'distance': 200.0,
@@ -131,6 +435,7 @@ camera_mode = 0
 spaceship_thrust = 200.0
 spaceship_max_speed = 100.0
 spaceship_collision_radius = 8.0
+star_destroyer_display_list = None
 camera_transition_active = False
 camera_transition_start = 0.0
 camera_transition_duration = 0.6
@@ -151,24 +456,138 @@ is_red_giant_active = False
 red_giant_start_time = 0.0
 current_sun_radius = SUN_INITIAL_RADIUS
 engulfed_planets = []
-supernova_particles = []
+supernova_pool = {'count': 0, 'origin': np.zeros(3), **{name: np.zeros((PARTICLE_POOL_INITIAL_CAPACITY,) + shape, dtype=dtype)
+                                   for name, (shape, dtype) in EJECTA_POOL_FIELDS.items()}}
 supernova_start_time = 0.0
-debris_particles = []
+debris_pool = {'count': 0, 'origin': np.zeros(3), **{name: np.zeros((PARTICLE_POOL_INITIAL_CAPACITY,) + shape, dtype=dtype)
+                              for name, (shape, dtype) in DEBRIS_POOL_FIELDS.items()}}
 debris_generation_cooldown = 0.0
 sequence_start_time = 0.0
 sequence_stage = 0
 
+# SNAPSHOT & REWIND VARIABLES
+snapshot_ring = collections.deque(maxlen=SNAPSHOT_RING_SIZE)
+last_ring_snapshot_time = 0.0
+
+# TRAJECTORY RECORDER & REPLAY VARIABLES
+recorder_active = False
+recorder_state = {}
+replay_active = False
+replay_state = {}
+
+# EVENT SCHEDULER VARIABLES
+simulation_time = 0.0
+event_queue = []
+event_sequence = itertools.count()
+engulf_predictions = {}
+
+# SUBSTEP SCHEDULER & TIME WARP VARIABLES
+time_scale_index = TIME_SCALE_STEPS.index(1.0)
+substep_state = {'backlog': 0.0, 'step_size': DT, 'achieved_scale': 1.0}
+
+# PARTICLE POOL & PARALLEL KERNEL VARIABLES
+kernel_threads = PARALLEL_KERNEL_THREADS
+kernel_executor = None
+kernel_scratch = threading.local()
+render_buffers = {}
+
+# PRECISION VARIABLES
+particle_precision = 'float64'
+
+# DEBRIS SHARD VARIABLES
+debris_shards = None
+
+# TELEMETRY VARIABLES
+telemetry_state = {
+    'loop': None,
+    'thread': None,
+    'server': None,
+    'clients': [],
+    'frame': 0,
+    'last_publish': 0.0
+}
+telemetry_stats = {'frames_published': 0, 'frames_sent': 0, 'frames_dropped': 0, 'bytes_sent': 0}
+
+# STARTUP VARIABLES
+gl_quadric = None
+startup_profile = {phase: None for phase in STARTUP_PHASES}
+startup_profile_report = False
+
+# SCENARIO GENERATOR VARIABLES
+minor_bodies = {'count': 0, 'origin': np.zeros(3), **{name: np.zeros((PARTICLE_POOL_INITIAL_CAPACITY,) + shape, dtype=dtype)
+                               for name, (shape, dtype) in MINOR_BODY_FIELDS.items()}}
+
+# SIMULATION ENGINE VARIABLES
+active_simulation = None
+simulation = None  # the world the GLUT client drives
+
+# PARTICLE BUDGET VARIABLES
+particle_emitters = {'supernova_pool': EJECTA_POINT_SIZES, 'debris_pool': DEBRIS_POINT_SIZES}
+particle_budget = {'cap': PARTICLE_BUDGET_CAP, 'frame_target': None, 'cost_per_particle': 0.0, 'shed': 0}
+
+# RAY PICKING VARIABLES
+camera_matrices = {'projection': np.eye(4), 'view': np.eye(4), 'eye': np.zeros(3)}
+
+# EPHEMERIS VARIABLES
+ephemeris = None  # attached table and the planets it drives
+
+# TRAJECTORY PREDICTION VARIABLES
+trajectory_overlay = False
+trajectory_prediction = None  # samples of the ship's predicted path, see create_trajectory_prediction()
+
+# ALLOCATION PROBE VARIABLES
+physics_scratch = {name: np.zeros(3) for name in ('r_vec', 'acceleration', 'step', 'drift')}
+physics_scratch['pairs'] = {}  # body count -> cached all-pairs index arrays, see find_candidate_pairs()
+physics_scratch['pair_matrices'] = {}  # body count -> all-pairs difference/sum matrices, see pair_difference_matrices()
+physics_scratch['buffers'] = {}  # per-step temporaries, see physics_buffer()
+physics_scratch['columns'] = {}  # column views of (N, 3) buffers, see physics_columns()
+physics_scratch['live_planets'] = []  # uncaptured planets, see live_planets()
+physics_scratch['kepler_table'] = None  # packed elements of the analytic orbits, see kepler_orbit_table()
+physics_scratch['no_contacts'] = tuple(np.zeros(shape, dtype=dtype) for shape, dtype in
+                                       (((0,), np.int64), ((0,), np.int64), ((0, 3), np.float64), ((0,), np.float64)))
+allocation_probe = {
+    'active': False,
+    'every': ALLOCATION_SNAPSHOT_FRAMES,
+    'frames': 0,
+    'mark': 0,
+    'bias': (0, 0),  # what one probe_mark() call measures of itself
+    'stages': {},  # stage -> [transient peak bytes, retained bytes] summed over frames
+    'snapshot': None,
+    'growth': [],
+    'rss': []  # (frame, bytes)
+}
+
+# LOGGING VARIABLES
+log_queue = collections.deque()
+log_sinks = [print]
+log_state = {'pid': None, 'thread': None, 'lock': None, 'last_emit': {}, 'pending': {}}
+log_start_lock = threading.Lock()  # serialises the lazy start of the drain thread
+log_stats = {'emitted': 0, 'dropped': 0, 'coalesced': 0, 'sink_errors': 0}
+
+# FLEET VARIABLES
+fleet = {
+    'position': np.zeros((0, 3)),
+    'velocity': np.zeros((0, 3)),
+    'rotation': np.zeros((0, 3)),
+    'behaviour': np.zeros(0, dtype=np.int8)
+}
+fleet_behaviour = FLEET_BEHAVIOUR_DRIFT
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
 # SHAHID GALIB - VISUAL FOUNDATION & SOLAR SYSTEM UTILITIES
-def normalize_vector(v):
-    """Normalize a numpy vector"""
+def normalize_vector(v, out=None):
+    """Normalize a numpy vector, into `out` if given (which may be `v` itself)"""
     norm = np.linalg.norm(v)
+    if out is None:
+        return v if norm == 0 else v / norm
     if norm == 0:
-        return v
-    return v / norm
+        out[:] = v
+    else:
+        np.divide(v, norm, out=out)
+    return out
 
 def lerp(a, b, t):
     """Linear interpolation between a and b by factor t"""
@@ -186,8 +605,10 @@ def calculate_tidal_radius(mass):
     """Calculate tidal radius for spaghettification"""
     return calculate_schwarzschild_radius(mass) * TIDAL_RADIUS_MULTIPLIER
 
-def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
-    """Draw text at screen coordinates"""
+def draw_text(x, y, text, font=None):
+    """Draw text at screen coordinates (default font: Helvetica 18)"""
+    if font is None:
+        font = GLUT_BITMAP_HELVETICA_18
     glColor3f(1.0, 1.0, 1.0)
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
@@ -208,13 +629,121 @@ def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
 
+# ============================================================================
+# LOGGING
+# (Lock-Free Message Queue, Background Drain Thread, Per-Key Rate Limiting)
+# ============================================================================
+
+def log_message(message, *args, key=None):
+    """Queue a console message without blocking the caller.
+
+    `message` is formatted with `args` (str.format) on the drain thread, so
+    hot paths only pay for a deque append. Messages sharing a `key` are rate
+    limited: within the key's interval only the latest one survives.
+    """
+    if not log_sinks:
+        return
+    if log_state['pid'] != os.getpid():
+        start_log_drain()
+    if len(log_queue) >= LOG_QUEUE_CAPACITY:
+        log_stats['dropped'] += 1
+        return
+    log_queue.append((time.monotonic(), key, message, args))
+
+def make_file_log_sink(path):
+    """Sink that appends timestamped lines to a text file"""
+    handle = open(path, 'a', buffering=1)
+
+    def file_sink(text):
+        handle.write(f"{time.strftime('%H:%M:%S')} {text}\n")
+    return file_sink
+
+def set_log_sinks(sinks):
+    """Replace the active sinks (callables taking one line of text) and return the previous list"""
+    global log_sinks
+    previous = log_sinks
+    log_sinks = list(sinks)
+    return previous
+
+def start_log_drain():
+    """Start the background thread that formats and emits queued messages, once per process.
+
+    Threads that log at the same time on a fresh pid race to get here; the
+    start lock lets only the first of them start a thread.
+    """
+    with log_start_lock:
+        if log_state['pid'] == os.getpid():
+            return
+        log_state['lock'] = threading.Lock()
+        thread = threading.Thread(target=_log_drain_loop, name="log-drain", daemon=True)
+        log_state['thread'] = thread
+        thread.start()
+        log_state['pid'] = os.getpid()
+
+def _reset_log_start_lock():
+    """Give a forked child a fresh start lock in case another thread held it at the fork"""
+    global log_start_lock
+    log_start_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_log_start_lock)
+
+def _log_drain_loop():
+    """Drain the queue every LOG_DRAIN_INTERVAL seconds for the lifetime of the process"""
+    while True:
+        time.sleep(LOG_DRAIN_INTERVAL)
+        _drain_log_queue()
+
+def _emit_log_line(text):
+    """Hand one formatted line to every sink"""
+    for sink in log_sinks:
+        try:
+            sink(text)
+        except Exception:
+            log_stats['sink_errors'] += 1
+    log_stats['emitted'] += 1
+
+def _drain_log_queue(final=False):
+    """Format queued messages, apply per-key rate limits and emit coalesced messages that are due"""
+    if log_state['lock'] is None:
+        return
+    with log_state['lock']:
+        last_emit = log_state['last_emit']
+        pending = log_state['pending']
+        while log_queue:
+            stamp, key, message, args = log_queue.popleft()
+            text = message.format(*args) if args else message
+            if key is not None:
+                last = last_emit.get(key)
+                if last is not None and stamp - last < LOG_RATE_LIMITS.get(key, LOG_DEFAULT_KEY_INTERVAL):
+                    if key in pending:
+                        log_stats['coalesced'] += 1
+                    pending[key] = text
+                    continue
+                if pending.pop(key, None) is not None:
+                    log_stats['coalesced'] += 1
+                last_emit[key] = stamp
+            _emit_log_line(text)
+
+        now = time.monotonic()
+        for key in list(pending):
+            if final or now - last_emit[key] >= LOG_RATE_LIMITS.get(key, LOG_DEFAULT_KEY_INTERVAL):
+                last_emit[key] = now
+                _emit_log_line(pending.pop(key))
+
+def flush_log():
+    """Synchronously emit everything still queued, including pending coalesced messages"""
+    _drain_log_queue(final=True)
+
 #Munshi
 def reset_simulation():
     """Reset the simulation to initial state"""
     global is_solar_system_active, is_black_hole_active, is_supernova_active
     global sun_exists, black_hole_mass, black_hole_alpha, selected_planet_index
-    global supernova_particles, debris_particles, sequence_start_time, sequence_stage
+    global sequence_start_time, sequence_stage
     global accretion_disk_rotation, camera_state
+    global is_red_giant_active, current_sun_radius, engulfed_planets, debris_generation_cooldown
+    global simulation_time
     
     is_solar_system_active = True
     is_black_hole_active = False
@@ -228,20 +757,33 @@ def reset_simulation():
     
     sequence_start_time = 0.0
     sequence_stage = 0
+    simulation_time = 0.0
+    clear_scheduled_events()
+    
+    is_red_giant_active = False
+    current_sun_radius = SUN_INITIAL_RADIUS
+    engulfed_planets = []
+    debris_generation_cooldown = 0.0
     
     selected_planet_index = 0
     
-    supernova_particles.clear()
-    debris_particles.clear()
+    clear_particle_pool(supernova_pool)
+    clear_particle_pool(debris_pool)
+    if debris_shards is not None:
+        clear_sharded_debris()
     
     init_planets()
+    clear_fleet()
+    clear_minor_bodies()
     
     camera_state['target'] = np.array([0.0, 0.0, 0.0])
     camera_state['distance'] = 200.0
     camera_state['azimuth'] = 0.0
     camera_state['elevation'] = 30.0
     
-    print("Simulation reset to initial state")
+    if ephemeris is not None:
+        reattach_ephemeris()
+    log_message("Simulation reset to initial state")
 
 # ============================================================================
 # START MENU FUNCTIONS
@@ -399,17 +941,17 @@ def check_menu_button_click(x, y):
         
         if (center_x <= x <= center_x + button_width and 400 <= y <= 450):
             game_state = GAME_STATE_SIMULATION
-            print("Starting simulation...")
+            log_message("Starting simulation...")
             return True
         elif (center_x <= x <= center_x + button_width and 330 <= y <= 380):
             current_menu_section = MENU_ABOUT
-            print("Opening about section...")
+            log_message("Opening about section...")
             return True
     
     elif current_menu_section == MENU_ABOUT:
         if (50 <= x <= 150 and 100 <= y <= 140):
             current_menu_section = MENU_MAIN
-            print("Returning to main menu...")
+            log_message("Returning to main menu...")
             return True
     
     return False
@@ -522,19 +1064,19 @@ def draw_about_menu():
 
 def init_starfield():
     """Initialize background starfield with 2000 random stars"""
-    global starfield
-    starfield = []
-    for _ in range(STARFIELD_COUNT):
-        theta = random.uniform(0, 2 * math.pi)
-        phi = random.uniform(0, math.pi)
-        r = random.uniform(1000, 2000)
-        
-        x = r * math.sin(phi) * math.cos(theta)
-        y = r * math.sin(phi) * math.sin(theta)
-        z = r * math.cos(phi)
-        
-        brightness = random.uniform(0.3, 1.0)
-        starfield.append([x, y, z, brightness])
+    global starfield, starfield_colors
+    theta = np.random.uniform(0, 2 * math.pi, STARFIELD_COUNT)
+    phi = np.random.uniform(0, math.pi, STARFIELD_COUNT)
+    r = np.random.uniform(1000, 2000, STARFIELD_COUNT)
+    
+    starfield = np.column_stack([
+        r * np.sin(phi) * np.cos(theta),
+        r * np.sin(phi) * np.sin(theta),
+        r * np.cos(phi)
+    ]).astype(np.float32)
+    
+    brightness = np.random.uniform(0.3, 1.0, STARFIELD_COUNT)
+    starfield_colors = np.repeat(brightness[:, None], 3, axis=1).astype(np.float32)
 
 # ============================================================================
 # SHAHID GALIB - FEATURE 2: COMPLETE SOLAR SYSTEM (SUN + 8 PLANETS)
@@ -580,9 +1122,11 @@ def init_planets():
 
 def init_simulation():
     """Initialize the entire simulation"""
-    global last_time
+    global last_time, simulation
     init_starfield()
     init_planets()
+    simulation = Simulation.from_module()
+    simulation.activate()
     last_time = time.time()
 
 
@@ -593,15 +1137,7 @@ def init_simulation():
 # SHAHID GALIB - FEATURE 1: STARFIELD BACKGROUND
 def draw_starfield():
     """Draw background starfield (2000 stars)"""
-    glPointSize(1.0)
-    glBegin(GL_POINTS)
-    
-    for star in starfield:
-        x, y, z, brightness = star
-        glColor3f(brightness, brightness, brightness)
-        glVertex3f(x, y, z)
-    
-    glEnd()
+    draw_point_arrays(starfield, starfield_colors, 1.0)
 
 # ============================================================================
 # SHAHID GALIB - FEATURE 3: ORBITAL CAMERA SYSTEM & SPACESHIP MECHANICS
@@ -610,13 +1146,6 @@ def draw_starfield():
 
 def setup_camera():
     """Setup camera using spherical coordinates or spaceship perspectives with smooth transitions"""
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(60.0, 1.25, 0.1, 5000.0)
-    
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-
     def spherical_to_cartesian(state):
         azimuth_rad = math.radians(state['azimuth'])
         elevation_rad = math.radians(state['elevation'])
@@ -655,9 +1184,34 @@ def setup_camera():
         curr_pos = desired_pos
         curr_target = desired_target
 
-    gluLookAt(curr_pos[0], curr_pos[1], curr_pos[2],
-              curr_target[0], curr_target[1], curr_target[2],
-              0.0, 0.0, 1.0)
+    # Built here rather than by gluPerspective/gluLookAt so picking unprojects through the very same matrices
+    camera_matrices['projection'] = perspective_matrix(CAMERA_FOV, CAMERA_ASPECT, CAMERA_NEAR, CAMERA_FAR)
+    camera_matrices['view'] = look_at_matrix(curr_pos, curr_target, CAMERA_UP)
+    camera_matrices['eye'] = np.array(curr_pos, dtype=np.float64)
+    glMatrixMode(GL_PROJECTION)
+    glLoadMatrixd(camera_matrices['projection'].T)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadMatrixd(camera_matrices['view'].T)
+
+def perspective_matrix(fovy, aspect, near, far):
+    """The gluPerspective() projection matrix (row-major)"""
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    return np.array([[f / aspect, 0.0, 0.0, 0.0],
+                     [0.0, f, 0.0, 0.0],
+                     [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+                     [0.0, 0.0, -1.0, 0.0]])
+
+def look_at_matrix(eye, target, up):
+    """The gluLookAt() view matrix (row-major)"""
+    forward = normalize_vector(np.asarray(target, dtype=np.float64) - eye)
+    side = normalize_vector(np.cross(forward, up))
+    true_up = np.cross(side, forward)
+    view = np.eye(4)
+    view[0, :3] = side
+    view[1, :3] = true_up
+    view[2, :3] = -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
 
 # SHAHID GALIB - FEATURE 2: SOLAR SYSTEM (SUN + 8 PLANETS)
 def draw_sun():
@@ -673,8 +1227,7 @@ def draw_sun():
         glColor3f(1.0, 1.0, 0.0)
         radius = 30.0
     
-    quadric = gluNewQuadric()
-    gluSphere(quadric, radius, 20, 20)
+    gluSphere(shared_quadric(), radius, 20, 20)
     
     glPopMatrix()
 
@@ -707,8 +1260,7 @@ def draw_planets():
         color = planet['color']
         glColor3f(color[0], color[1], color[2])
         
-        quadric = gluNewQuadric()
-        gluSphere(quadric, planet['radius'], 10, 10)
+        gluSphere(shared_quadric(), planet['radius'], 10, 10)
         
         if i == 5 and not planet['spaghettified']:  
             draw_saturn_rings(planet['radius'])
@@ -770,7 +1322,7 @@ def spawn_spaceship_near_selected_planet():
     spaceship_velocity = np.array([0.0, 0.0, 0.0])
     spaceship_exists = True
     request_camera_transition(1)
-    print(f"Star Destroyer spawned near {planet['name']}")
+    log_message(f"Star Destroyer spawned near {planet['name']}")
 
 
 def update_spaceship(dt):
@@ -778,48 +1330,85 @@ def update_spaceship(dt):
     if not spaceship_exists:
         return
 
-    damping = 0.98
-    spaceship_velocity *= damping
-    
-    speed = np.linalg.norm(spaceship_velocity)
-    if speed > spaceship_max_speed:
-        spaceship_velocity = (spaceship_velocity / speed) * spaceship_max_speed
+    position = spaceship_position[None, :].astype(np.float64)
+    velocity = spaceship_velocity[None, :].astype(np.float64)
+    if SPACESHIP_GRAVITY_SCALE:
+        velocity[0] += calculate_gravitational_acceleration(position[0]) * (SPACESHIP_GRAVITY_SCALE * dt)
+    spaceship_position = apply_ship_dynamics(position, velocity, dt)[0]
+    spaceship_velocity = velocity[0]
 
-    proposed = spaceship_position + spaceship_velocity * dt
 
-    for p in planets:
-        if p.get('captured', False) or is_planet_engulfed(p):
-            continue
-        to_ship = proposed - p['position']
-        dist = np.linalg.norm(to_ship)
-        min_dist = p['radius'] + spaceship_collision_radius
-        if dist < max(0.1, min_dist):
-            n = normalize_vector(to_ship if dist > 0 else np.array([1.0, 0.0, 0.0]))
-            proposed = p['position'] + n * min_dist
-            radial_v = np.dot(spaceship_velocity, n)
-            spaceship_velocity -= radial_v * n
+def apply_ship_dynamics(position, velocity, dt):
+    """Damping, speed cap and body pushout for an (N, 3) batch of ships.
 
-    if sun_exists:
-        to_ship = proposed - sun_position
-        dist = np.linalg.norm(to_ship)
-        min_dist = current_sun_radius + spaceship_collision_radius
-        if dist < max(0.1, min_dist):
-            n = normalize_vector(to_ship if dist > 0 else np.array([1.0, 0.0, 0.0]))
-            proposed = sun_position + n * min_dist
-            radial_v = np.dot(spaceship_velocity, n)
-            spaceship_velocity -= radial_v * n
+    velocity is updated in place; the new positions are returned. Bodies are
+    processed in the same order as before (planets, Sun, black hole) so a
+    single ship behaves exactly like the original per-ship loop.
+    """
+    proposed = drift_ships(position, velocity, dt)
+    push_ships_out(proposed, velocity, ship_obstacles())
+    return proposed
+
+
+def drift_ships(position, velocity, dt, damping=SPACESHIP_DAMPING):
+    """Damp and speed-cap ship velocities in place and return the positions they drift to over `dt`"""
+    velocity *= damping
+
+    speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity))
+    too_fast = speed > spaceship_max_speed
+    velocity[too_fast] *= (spaceship_max_speed / speed[too_fast])[:, None]
+
+    return position + velocity * dt
+
+
+def _ship_obstacle_bodies():
+    """Planets ships collide with: every one not captured or engulfed"""
+    return [p for p in planets if not (p.get('captured', False) or is_planet_engulfed(p))]
 
+
+def ship_obstacles():
+    """Centres (K, 3) and exclusion radii (K,) of the bodies ships are pushed out of: planets, Sun, black hole"""
+    centres = [p['position'] for p in _ship_obstacle_bodies()]
+    min_dist = [p['radius'] + spaceship_collision_radius for p in _ship_obstacle_bodies()]
+    if sun_exists:
+        centres.append(sun_position)
+        min_dist.append(current_sun_radius + spaceship_collision_radius)
     if is_black_hole_active:
-        to_ship = proposed - black_hole_position
-        dist = np.linalg.norm(to_ship)
-        min_dist = BLACK_HOLE_VISUAL_RADIUS + spaceship_collision_radius
-        if dist < max(0.1, min_dist):
-            n = normalize_vector(to_ship if dist > 0 else np.array([1.0, 0.0, 0.0]))
-            proposed = black_hole_position + n * min_dist
-            radial_v = np.dot(spaceship_velocity, n)
-            spaceship_velocity -= radial_v * n
+        centres.append(black_hole_position)
+        min_dist.append(BLACK_HOLE_VISUAL_RADIUS + spaceship_collision_radius)
+    return np.array(centres, dtype=np.float64).reshape(-1, 3), np.array(min_dist, dtype=np.float64)
+
+
+def push_ships_out(proposed, velocity, obstacles):
+    """Push ships out of each obstacle in turn; returns True if any ship touched one.
 
-    spaceship_position = proposed
+    One distance test against every obstacle comes first: when no ship is
+    inside any of them nothing can move, so the per-body passes are skipped.
+    """
+    centres, min_dist = obstacles
+    if not len(centres):
+        return False
+    offset = proposed[:, None, :] - centres[None, :, :]
+    reach = np.maximum(0.1, min_dist)
+    if not (np.einsum('ijk,ijk->ij', offset, offset) < reach * reach).any():
+        return False
+    for centre, distance in zip(centres, min_dist):
+        _push_ships_out_of_body(proposed, velocity, centre, distance)
+    return True
+
+
+def _push_ships_out_of_body(proposed, velocity, centre, min_dist):
+    """Move ships inside a body's exclusion sphere to its surface and cancel their radial velocity"""
+    to_ship = proposed - centre
+    dist = np.sqrt(np.einsum('ij,ij->i', to_ship, to_ship))
+    inside = dist < max(0.1, min_dist)
+    if not inside.any():
+        return
+    n = np.where((dist[inside] > 0)[:, None], to_ship[inside], np.array([1.0, 0.0, 0.0]))
+    n /= np.sqrt(np.einsum('ij,ij->i', n, n))[:, None]
+    proposed[inside] = centre + n * min_dist
+    radial_v = np.einsum('ij,ij->i', velocity[inside], n)
+    velocity[inside] -= radial_v[:, None] * n
 
 
 def draw_star_destroyer():
@@ -832,7 +1421,23 @@ def draw_star_destroyer():
     glRotatef(spaceship_rotation[0], 0, 1, 0)
     glRotatef(spaceship_rotation[2], 1, 0, 0)
     glScalef(spaceship_scale, spaceship_scale, spaceship_scale)
+    glCallList(get_star_destroyer_display_list())
+    glPopMatrix()
 
+
+def get_star_destroyer_display_list():
+    """Compile the Star Destroyer hull into a display list once and return its id"""
+    global star_destroyer_display_list
+    if star_destroyer_display_list is None:
+        star_destroyer_display_list = glGenLists(1)
+        glNewList(star_destroyer_display_list, GL_COMPILE)
+        emit_star_destroyer_hull()
+        glEndList()
+    return star_destroyer_display_list
+
+
+def emit_star_destroyer_hull():
+    """Emit the hull geometry in model units (scaled by spaceship_scale when drawn)"""
     glColor3f(0.85, 0.85, 0.9)
 
     hull_len = 1.2
@@ -914,8 +1519,6 @@ def draw_star_destroyer():
         gluCylinder(gluNewQuadric(), 0.06, 0.06, 0.15, 10, 10)
         glPopMatrix()
 
-    glPopMatrix()
-
 # ============================================================================
 # FARHAN ZARIF - FEATURE 4: BLACK HOLE VISUAL EFFECTS
 # (Photon Ring, Accretion Disk, Gravitational Lensing)
@@ -933,8 +1536,7 @@ def draw_simulation_black_hole():
     draw_photon_ring()
     
     glColor3f(0.0, 0.0, 0.0)
-    quadric = gluNewQuadric()
-    gluSphere(quadric, BLACK_HOLE_VISUAL_RADIUS, 32, 32)
+    gluSphere(shared_quadric(), BLACK_HOLE_VISUAL_RADIUS, 32, 32)
     draw_black_hole_glow()
     
     glPopMatrix()
@@ -1068,88 +1670,39 @@ def draw_black_hole_glow():
 
 def draw_supernova_explosion():
     """Draw supernova explosion effect"""
-    if not supernova_particles:
+    count = supernova_pool['count']
+    if not count:
         return
-        
-    glPointSize(5.0)
-    glBegin(GL_POINTS)
-    
-    for particle in supernova_particles:
-        pos = particle['position']
-        age = particle['age']
-        lifetime = particle['lifetime']
-        
-        t = age / lifetime
-        if t < 0.3:
-            color = lerp_color((1.0, 1.0, 1.0), (1.0, 1.0, 0.0), t / 0.3)
-        elif t < 0.7:
-            color = lerp_color((1.0, 1.0, 0.0), (1.0, 0.5, 0.0), (t - 0.3) / 0.4)
-        else:
-            color = lerp_color((1.0, 0.5, 0.0), (0.5, 0.0, 0.0), (t - 0.7) / 0.3)
-        glColor3f(color[0], color[1], color[2])
-        glVertex3f(pos[0], pos[1], pos[2])
     
-    glEnd()
+    vertices, colors, _ = _render_buffers('ejecta', count)
+    run_chunked(_ejecta_color_chunk_kernel, count, supernova_pool, vertices, colors)
+    glPushMatrix()
+    glTranslated(*supernova_pool['origin'])
+    draw_point_arrays(vertices[:count], colors[:count], 5.0)
+    glPopMatrix()
 
 def draw_debris():
     """Draw debris particles with optimized performance"""
-    if not debris_particles:
-        return
-    
     camera_pos = np.array([0.0, 0.0, camera_state['distance']])
+    if debris_shards is not None:
+        draw_sharded_debris(camera_pos)
     
-    near_particles = []
-    far_particles = []
-    
-    for particle in debris_particles:
-        distance_to_camera = np.linalg.norm(particle['position'] - camera_pos)
-        
-        if distance_to_camera > BLACK_HOLE_VISUAL_RADIUS * 15.0:
-            continue
-            
-        if distance_to_camera < BLACK_HOLE_VISUAL_RADIUS * 5.0:
-            near_particles.append(particle)
-        else:
-            far_particles.append(particle)
+    count = debris_pool['count']
+    if not count:
+        return
     
-    if near_particles:
-        glPointSize(3.0)
-        glBegin(GL_POINTS)
-        for particle in near_particles:
-            pos = particle['position']
-            age = particle['age']
-            lifetime = particle['lifetime']
-            
-            t = age / lifetime
-            if 'color' in particle:
-                planet_color = particle['color']
-                dark_color = (planet_color[0] * 0.3, planet_color[1] * 0.3, planet_color[2] * 0.3)
-                color = lerp_color(planet_color, dark_color, t * 0.7)
-            else:
-                color = lerp_color((1.0, 1.0, 0.0), (0.3, 0.0, 0.0), t)
-            
-
-            glColor3f(color[0], color[1], color[2])
-            glVertex3f(pos[0], pos[1], pos[2])
-        glEnd()
+    vertices, colors, classes = _render_buffers('debris', count)
+    run_chunked(_debris_color_chunk_kernel, count, debris_pool, camera_pos - debris_pool['origin'],
+                vertices, colors, classes)
     
-    if far_particles:
-        glPointSize(1.5)
-        glBegin(GL_POINTS)
-        for particle in far_particles:
-            pos = particle['position']
-            age = particle['age']
-            lifetime = particle['lifetime']
-            
-            t = age / lifetime
-            if 'color' in particle:
-                color = particle['color']
-            else:
-                color = (1.0, 0.8, 0.0)
-            
-            glColor3f(color[0], color[1], color[2])
-            glVertex3f(pos[0], pos[1], pos[2])
-        glEnd()
+    near = classes[:count] == DEBRIS_DRAW_NEAR
+    far = classes[:count] == DEBRIS_DRAW_FAR
+    # Vertices are relative to the floating origin; the translation is applied in the GL matrix
+    glPushMatrix()
+    glTranslated(*debris_pool['origin'])
+    draw_point_arrays(vertices[:count][near], colors[:count][near], 3.0)
+    draw_point_arrays(vertices[:count][far], colors[:count][far], 1.5)
+    glPopMatrix()
 
 # ============================================================================
 # UTLITY FUNCTIONS (HUD)
@@ -1199,7 +1752,7 @@ def draw_hud():
     
     draw_text(700, 700, f"Active Planets: {active_planets}", GLUT_BITMAP_HELVETICA_18)
     draw_text(700, 680, f"Planets Captured: {captured_count}", GLUT_BITMAP_HELVETICA_18)
-    draw_text(700, 660, f"Debris Particles: {len(debris_particles)}", GLUT_BITMAP_HELVETICA_18)
+    draw_text(700, 660, f"Debris Particles: {debris_particle_count()}", GLUT_BITMAP_HELVETICA_18)
     
     state_text = "Solar System"
     if is_black_hole_active:
@@ -1209,6 +1762,36 @@ def draw_hud():
     
     draw_text(700, 640, f"State: {state_text}", GLUT_BITMAP_HELVETICA_18)
 
+    if replay_active:
+        draw_text(700, 620, f"Replay: {replay_state['time']:.1f} / {replay_state['times'][-1]:.1f} s", GLUT_BITMAP_HELVETICA_18)
+    elif recorder_active:
+        draw_text(700, 620, f"Recording: {recorder_state['steps']} steps", GLUT_BITMAP_HELVETICA_18)
+
+    if len(fleet['position']):
+        draw_text(700, 600, f"Fleet: {len(fleet['position'])} ships ({FLEET_BEHAVIOUR_NAMES[fleet_behaviour]})", GLUT_BITMAP_HELVETICA_18)
+
+    requested_scale = TIME_SCALE_STEPS[time_scale_index]
+    if requested_scale != 1.0 or substep_state['step_size'] > DT:
+        draw_text(700, 580, f"Time: {substep_state['achieved_scale']:.3g}x of {requested_scale:g}x (step {substep_state['step_size'] / DT:g} DT)", GLUT_BITMAP_HELVETICA_18)
+
+    if telemetry_state['loop'] is not None:
+        sent = telemetry_stats['frames_sent']
+        bytes_per_frame = telemetry_stats['bytes_sent'] / sent if sent else 0.0
+        draw_text(700, 560, f"Telemetry: {len(telemetry_state['clients'])} clients, {bytes_per_frame:.0f} B/frame", GLUT_BITMAP_HELVETICA_18)
+
+    if minor_bodies['count']:
+        draw_text(700, 540, f"Minor Bodies: {minor_bodies['count']}", GLUT_BITMAP_HELVETICA_18)
+
+    if ephemeris is not None:
+        draw_text(700, 500, f"Ephemeris: {simulation_time:.0f} / {ephemeris_end(ephemeris['table']):.0f} s", GLUT_BITMAP_HELVETICA_18)
+
+    if trajectory_overlay and trajectory_prediction is not None and trajectory_prediction['count']:
+        draw_text(700, 480, f"Trajectory: {trajectory_prediction['steps']} steps, "
+                  f"{trajectory_prediction['cost'] * 1000.0:.2f} ms/frame", GLUT_BITMAP_HELVETICA_18)
+
+    if particle_budget['shed']:
+        draw_text(700, 520, f"Particles: {budgeted_particle_count()} / {particle_budget['cap']} ({particle_budget['shed']} shed)", GLUT_BITMAP_HELVETICA_18)
+
 def draw_instructions():
     """Draw on-screen instructions"""
     instructions = [
@@ -1223,8 +1806,12 @@ def draw_instructions():
         "H - Reset camera to center",
         "G - Spawn Star Destroyer near selected planet",
         "L - Despawn Star Destroyer",
+        "N/M/J - Spawn fleet squadron / Cycle fleet autopilot / Disband fleet",
+        "T/I/7 - Add asteroid belt / Kuiper cloud / moons of selected planet",
+        "=/- - Speed up / slow down time",
         "V - Toggle camera mode (Normal/Third/First)",
         "W/S - Thrust Forward/Backward (2x power)",
+        "U - Toggle predicted ship trajectory",
         "A/D - Yaw Left/Right (enhanced)",
         "E/Q - Pitch Up/Down",
         "Z/C - Roll Left/Right",
@@ -1243,210 +1830,245 @@ def draw_instructions():
 
 def update_physics(dt):
     """Update physics simulation"""
-    global accretion_disk_rotation, camera_state
+    global accretion_disk_rotation, camera_state, simulation_time
     
     if camera_state['is_following_planet'] and planets and selected_planet_index < len(planets):
         camera_state['target'] = planets[selected_planet_index]['position'].copy()
     
+    simulation_time += dt
     update_red_giant_expansion(dt)
+    process_due_events()
+    if particle_precision != 'float64':
+        update_floating_origin()
+    probe_mark('events')
+    particle_start = time.perf_counter()
     update_supernova_particles(dt)
     update_debris_particles(dt)
-    
-    for planet in planets[:]:
-        if planet['captured']:
-            continue
+    adapt_particle_budget(time.perf_counter() - particle_start)
+    enforce_particle_budget()
+    probe_mark('particles')
+    
+    if ephemeris is not None and not (kepler_field_active() and ephemeris_covers(ephemeris['table'], simulation_time)):
+        release_ephemeris()
+    if ephemeris is not None:
+        advance_ephemeris_planets()
+    else:
+        if KEPLER_PROPAGATION:
+            sync_kepler_orbits(dt)
+        if CONTINUOUS_EVENT_DETECTION:
+            update_planets_continuous(dt)
+        else:
+            advance_kepler_planets()
+            for planet in planets:
+                if not planet['captured'] and 'kepler' not in planet:
+                    integrate_planet(planet, dt)
             
-        acceleration = calculate_gravitational_acceleration(planet['position'])
-        
-        dt2 = dt * dt
-        planet['position'] += planet['velocity'] * dt + 0.5 * planet['acceleration'] * dt2
-        
-        new_acceleration = calculate_gravitational_acceleration(planet['position'])
-        planet['velocity'] += 0.5 * (planet['acceleration'] + new_acceleration) * dt
-        planet['acceleration'] = new_acceleration
-        
-        planet['orbital_trail'].append(planet['position'].copy())
-        if len(planet['orbital_trail']) > 200:
-            planet['orbital_trail'].pop(0)
-        
-        if is_black_hole_active:
-            check_black_hole_interactions(planet)
-    
-    update_collision_physics()
+            if is_black_hole_active:
+                resolve_black_hole_interactions([planet for planet in planets if not planet['captured']])
+            
+            update_collision_physics()
+    probe_mark('planets')
     update_spaceship(dt)
+    probe_mark('spaceship')
+    update_fleet(dt)
+    probe_mark('fleet')
+    update_minor_bodies(dt)
+    probe_mark('minor bodies')
 
-def calculate_gravitational_acceleration(position):
-    """Calculate gravitational acceleration at given position"""
-    acceleration = np.array([0.0, 0.0, 0.0])
+def physics_buffer(name, shape, dtype=np.float64):
+    """Reusable per-step buffer of at least `shape` in physics_scratch, returned as a view of exactly that shape.
+
+    The view is kept too, so asking again for the same shape allocates nothing.
+    """
+    key = (name, np.dtype(dtype))
+    entry = physics_scratch['buffers'].get(key)
+    if entry is not None and entry[1].shape == shape:
+        return entry[1]
+    size = math.prod(shape)
+    buffer = entry[0] if entry is not None and entry[0].size >= size else np.zeros(max(size, 64), dtype=dtype)
+    view = buffer[:size].reshape(shape)
+    physics_scratch['buffers'][key] = (buffer, view)
+    return view
+
+def physics_columns(name, count):
+    """A (count, 3) physics_buffer and the 1-D views of its three columns.
+
+    Ufuncs on the column views run as plain strided loops, where an (N, 1)
+    against (N, 3) broadcast would set up an iterator on every call.
+    """
+    view = physics_buffer(name, (count, 3))
+    entry = physics_scratch['columns'].get(name)
+    if entry is None or entry[0] is not view:
+        entry = physics_scratch['columns'][name] = (view, (view[:, 0], view[:, 1], view[:, 2]))
+    return entry
+
+def _rowwise_dot(a, b, out, term):
+    """out[k] = a[k] . b[k] for vectors given as three 1-D columns each; `term` is scratch of the same length"""
+    np.multiply(a[0], b[0], out=out)
+    np.multiply(a[1], b[1], out=term)
+    out += term
+    np.multiply(a[2], b[2], out=term)
+    out += term
+    return out
+
+def physics_scalar(name, value):
+    """0-d physics_buffer holding `value`; ufuncs take it without boxing a Python float on every call"""
+    scalar = physics_buffer(name, ())
+    scalar.fill(value)
+    return scalar
+
+def live_planets():
+    """The uncaptured planets, as a list kept in physics_scratch until that set changes (do not modify it)"""
+    cached = physics_scratch['live_planets']
+    k = 0
+    for planet in planets:
+        if planet['captured']:
+            continue
+        if k == len(cached) or cached[k] is not planet:
+            break
+        k += 1
+    else:
+        if k == len(cached):
+            return cached
+    cached = physics_scratch['live_planets'] = [planet for planet in planets if not planet['captured']]
+    return cached
+
+def integrate_planet(planet, dt):
+    """Advance one planet by a Velocity Verlet step and extend its orbital trail.
+
+    Works in place through physics_scratch; the arithmetic is ordered as in
+    the plain expressions so results are bit-identical.
+    """
+    scratch = physics_scratch
+    step = np.multiply(planet['velocity'], dt, out=scratch['step'])
+    drift = np.multiply(planet['acceleration'], 0.5, out=scratch['drift'])
+    drift *= dt * dt
+    step += drift
+    planet['position'] += step
+    
+    new_acceleration = calculate_gravitational_acceleration(planet['position'], out=scratch['acceleration'])
+    kick = np.add(planet['acceleration'], new_acceleration, out=scratch['drift'])
+    kick *= 0.5
+    kick *= dt
+    planet['velocity'] += kick
+    planet['acceleration'][:] = new_acceleration
+    
+    extend_orbital_trail(planet)
+
+def extend_orbital_trail(planet):
+    """Append the planet's position to its trail, reusing the dropped oldest point once the trail is full"""
+    trail = planet['orbital_trail']
+    if len(trail) >= ORBITAL_TRAIL_LENGTH:
+        point = trail.pop(0)
+        np.copyto(point, planet['position'])
+        trail.append(point)
+    else:
+        trail.append(planet['position'].copy())
+
+def _add_point_gravity(acceleration, centre, mass, position):
+    """Add the pull of a point mass at `centre` to `acceleration` in place"""
+    r_vec = np.subtract(centre, position, out=physics_scratch['r_vec'])
+    r_mag = math.sqrt(r_vec.dot(r_vec))
+    if r_mag > 0:
+        acc_magnitude = G * mass / (r_mag * r_mag)
+        r_vec /= r_mag
+        r_vec *= acc_magnitude
+        acceleration += r_vec
+
+def calculate_gravitational_acceleration(position, out=None):
+    """Calculate gravitational acceleration at given position, into `out` if given"""
+    if out is None:
+        acceleration = np.zeros(3)
+    else:
+        acceleration = out
+        acceleration.fill(0.0)
     
     if sequence_stage >= 1:
-        r_vec = sun_position - position 
-        r_mag = np.linalg.norm(r_vec)
-        if r_mag > 0:
-            acc_magnitude = G * black_hole_mass / (r_mag * r_mag)
-            acceleration += acc_magnitude * normalize_vector(r_vec)
+        _add_point_gravity(acceleration, sun_position, black_hole_mass, position)
     else:
         if is_solar_system_active and sun_exists:
-            r_vec = sun_position - position
-            r_mag = np.linalg.norm(r_vec)
-            if r_mag > 0:
-                acc_magnitude = G * SUN_MASS / (r_mag * r_mag)
-                acceleration += acc_magnitude * normalize_vector(r_vec)
+            _add_point_gravity(acceleration, sun_position, SUN_MASS, position)
         
         if is_black_hole_active:
-            r_vec = black_hole_position - position
-            r_mag = np.linalg.norm(r_vec)
-            if r_mag > 0:
-                acc_magnitude = G * black_hole_mass / (r_mag * r_mag)
-                acceleration += acc_magnitude * normalize_vector(r_vec)
+            _add_point_gravity(acceleration, black_hole_position, black_hole_mass, position)
     
     return acceleration
 #Evan
 def update_supernova_particles(dt):
     """Update supernova particle positions and ages"""
-    global supernova_particles
-    
-    for i in range(len(supernova_particles) - 1, -1, -1):
-        particle = supernova_particles[i]
-        particle['position'] += particle['velocity'] * dt
-        particle['age'] += dt
-        
-        if particle['age'] >= particle['lifetime']:
-            supernova_particles.pop(i)
+    count = supernova_pool['count']
+    if not count:
+        return
+    keep = np.ones(count, dtype=bool)
+    run_chunked(_ejecta_chunk_kernel, count, supernova_pool, keep, dt)
+    compact_particle_pool(supernova_pool, keep)
             
 def update_debris_particles(dt):
     """Update debris particle positions and ages with optimized performance"""
-    global debris_particles, debris_generation_cooldown
+    global debris_generation_cooldown
     
     if debris_generation_cooldown > 0:
         debris_generation_cooldown -= dt
     
-    if len(debris_particles) == 0:
+    if debris_particle_count() == 0:
         return
 
-    for i in range(len(debris_particles) - 1, -1, -1):
-        particle = debris_particles[i]
-        
-        current_distance = np.linalg.norm(particle['position'] - black_hole_position)
-        
-        if current_distance > BLACK_HOLE_VISUAL_RADIUS * 8.0:
-            particle['position'] += particle['velocity'] * dt * 0.5  
-            particle['age'] += dt
-            
-            if particle['age'] >= particle['lifetime'] or current_distance > BLACK_HOLE_VISUAL_RADIUS * 12.0:
-                debris_particles.pop(i)
-            continue
-        
-        if is_black_hole_active and particle['age'] > particle.get('absorption_delay', 0.0):
-            if current_distance > BLACK_HOLE_VISUAL_RADIUS:
-                distance_factor = max(0.5, BLACK_HOLE_VISUAL_RADIUS * 5.0 / current_distance)  
-                gravity_strength = (G * black_hole_mass * 2.0) / (current_distance * current_distance + 10.0)
-                to_black_hole = (black_hole_position - particle['position']) / current_distance
-                acceleration = to_black_hole * gravity_strength * 0.2 * distance_factor  
-                particle['velocity'] += acceleration * dt
-                
-                effective_age = particle['age'] - particle.get('absorption_delay', 0.0)
-                age_factor = min(1.0, effective_age / (particle['lifetime'] * 0.3))  
-                
-                if age_factor > 0.05:  
-                    proximity_factor = max(2.0, (BLACK_HOLE_VISUAL_RADIUS * 6.0) / current_distance)
-                    spiral_strength = SPIRAL_DECAY_RATE * 2.0 * age_factor * proximity_factor 
-                    spiral_velocity = to_black_hole * spiral_strength * current_distance * 0.3  
-                    particle['velocity'] += spiral_velocity * dt
-                    decay_rate = 0.02 * proximity_factor * age_factor  
-                    particle['velocity'] *= (1.0 - decay_rate)  
-        
-        particle['position'] += particle['velocity'] * dt
-        particle['age'] += dt
-        
-        if is_black_hole_active:
-            distance_to_bh = np.linalg.norm(particle['position'] - black_hole_position)
-            
-            absorption_radius = BLACK_HOLE_VISUAL_RADIUS * 1.2  
-            inner_radius = BLACK_HOLE_VISUAL_RADIUS * 2.5
-            outer_radius = BLACK_HOLE_VISUAL_RADIUS * 6.0
-            
-            if distance_to_bh < absorption_radius:
-                if 'absorption_effect' not in particle:
-                    particle['absorption_effect'] = True
-                    particle['color'] = (min(1.0, particle['color'][0] * 2.0), 
-                                       particle['color'][1] * 0.3, 
-                                       particle['color'][2] * 0.3)
-
-                debris_particles.pop(i)
-                continue
-            
-            if distance_to_bh > outer_radius:
-                direction_to_bh = (black_hole_position - particle['position']) / distance_to_bh
-                particle['position'] = black_hole_position + direction_to_bh * (outer_radius - 5.0)
-                orbital_speed = math.sqrt(G * black_hole_mass / outer_radius) * 0.6
-                tangent = np.array([-direction_to_bh[1], direction_to_bh[0], 0])
-                if np.linalg.norm(tangent) > 0:
-                    tangent = tangent / np.linalg.norm(tangent)
-                    particle['velocity'] = tangent * orbital_speed + direction_to_bh * random.uniform(-2.0, 0.5)
-                else:
-                    particle['velocity'] = np.array([orbital_speed, 0, 0])
-            
-            if distance_to_bh <= BLACK_HOLE_VISUAL_RADIUS * 1.2: 
-                debris_particles.pop(i)
-                continue
-        
-        if particle['age'] >= particle['lifetime']:
-            debris_particles.pop(i)
+    seed = random.getrandbits(32) if is_black_hole_active else 0
+    if debris_shards is not None:
+        step_debris_shards(dt, is_black_hole_active, black_hole_position, black_hole_mass, seed)
+    if debris_pool['count']:
+        advance_debris_pool(debris_pool, dt, is_black_hole_active, black_hole_position - debris_pool['origin'],
+                            black_hole_mass, seed)
 
 def handle_sequences(dt):
-    """Handle timed sequences (supernova to black hole)"""
-    global sequence_stage, is_supernova_active, is_black_hole_active, black_hole_alpha
-    global sun_exists, supernova_particles, sequence_start_time, is_solar_system_active
-    
-    if sequence_stage == 0:
-        return  
-    
-    elapsed_time = current_time - sequence_start_time
-    
-    if sequence_stage == 1:  
-        if not supernova_particles:  
-            create_supernova_explosion()
-            sun_exists = False
-        
-        if elapsed_time >= SUPERNOVA_DURATION:
-            sequence_stage = 2
-            is_supernova_active = False
+    """Animate the black hole fade-in; stage transitions themselves are scheduled events"""
+    global black_hole_alpha
     
-    elif sequence_stage == 2:  
-        fade_progress = (elapsed_time - SUPERNOVA_DURATION) / BLACK_HOLE_FADE_IN_DURATION
+    if sequence_stage == 2:
+        fade_progress = (simulation_time - sequence_start_time - SUPERNOVA_DURATION) / BLACK_HOLE_FADE_IN_DURATION
         black_hole_alpha = min(1.0, fade_progress)
-        
-        if fade_progress >= 1.0:
-            sequence_stage = 3
-            black_hole_alpha = 1.0
-    
-    elif sequence_stage == 3:  
-        pass
 #Evan
+def trigger_black_hole_sequence():
+    """Start the Sun -> Supernova -> Black Hole sequence"""
+    global sequence_start_time, sequence_stage, is_supernova_active, is_black_hole_active, keys_locked
+    
+    sequence_start_time = simulation_time
+    sequence_stage = 1
+    is_supernova_active = True
+    is_black_hole_active = True
+    keys_locked = True
+    schedule_event(simulation_time, SCHEDULED_SUPERNOVA_START)
+    schedule_event(sequence_start_time + SUPERNOVA_DURATION, SCHEDULED_SUPERNOVA_END)
+    schedule_event(sequence_start_time + SUPERNOVA_DURATION + BLACK_HOLE_FADE_IN_DURATION, SCHEDULED_BLACK_HOLE_VISIBLE)
+    log_message("Black hole sequence started! Keys locked until reset (R).")
+
+def trigger_red_giant_sequence():
+    """Start the red giant expansion sequence"""
+    global is_red_giant_active, red_giant_start_time, current_sun_radius, engulfed_planets, keys_locked
+    
+    log_message("Starting red giant expansion phase...")
+    is_red_giant_active = True
+    red_giant_start_time = simulation_time
+    current_sun_radius = SUN_INITIAL_RADIUS
+    engulfed_planets = []
+    keys_locked = True
+    schedule_event(red_giant_start_time + RED_GIANT_DURATION, SCHEDULED_RED_GIANT_COMPLETE)
+    for planet in planets:
+        if not planet['captured']:
+            schedule_engulf_check(planet)
+    log_message("Red giant sequence started! Keys locked until reset (R).")
+
 def update_red_giant_expansion(dt):
-    """Update red giant expansion phase"""
-    global current_sun_radius, is_red_giant_active, is_supernova_active, sun_exists
-    global is_solar_system_active
+    """Grow the red giant along its linear radius trajectory (completion and engulfing are scheduled events)"""
+    global current_sun_radius
     
     if not is_red_giant_active:
         return
     
-    elapsed_time = current_time - red_giant_start_time
-    
-    if elapsed_time < RED_GIANT_DURATION:
-        progress = elapsed_time / RED_GIANT_DURATION
-        current_sun_radius = SUN_INITIAL_RADIUS + (RED_GIANT_MAX_RADIUS - SUN_INITIAL_RADIUS) * progress
-        check_planet_engulfing()
-        
-        print(f"Red giant expansion: {progress*100:.1f}% complete, radius: {current_sun_radius:.1f}")
-    else:
-        print("Red giant phase complete - transitioning to supernova!")
-        is_red_giant_active = False
-        is_solar_system_active = False
-        sun_exists = False
-        is_supernova_active = True
-        create_supernova_explosion()
+    current_sun_radius = red_giant_radius_at(simulation_time)
+    progress = (current_sun_radius - SUN_INITIAL_RADIUS) / (RED_GIANT_MAX_RADIUS - SUN_INITIAL_RADIUS)
+    log_message("Red giant expansion: {:.1f}% complete, radius: {:.1f}", progress * 100, current_sun_radius,
+                key='red_giant_progress')
 
 def check_planet_engulfing():
     """Check if any planets should be engulfed by the red giant"""
@@ -1457,7 +2079,7 @@ def check_planet_engulfing():
             distance = np.linalg.norm(planet['position'] - sun_position)
             if distance <= current_sun_radius:
                 engulfed_planets.append(planet['name'])
-                print(f"{planet['name']} has been engulfed by the red giant!")
+                log_message(f"{planet['name']} has been engulfed by the red giant!")
 
 def is_planet_engulfed(planet):
     """Check if a planet has been engulfed"""
@@ -1465,28 +2087,23 @@ def is_planet_engulfed(planet):
 
 def create_supernova_explosion():
     """Create supernova explosion particles"""
-    global supernova_particles
-    
-    supernova_particles = []
     num_particles = 500
     
-    for _ in range(num_particles):
-        theta = random.uniform(0, 2 * math.pi)
-        phi = random.uniform(0, math.pi)
-        speed = random.uniform(50.0, 200.0)
-        velocity = np.array([
-            speed * math.sin(phi) * math.cos(theta),
-            speed * math.sin(phi) * math.sin(theta),
-            speed * math.cos(phi)
-        ])
-        
-        particle = {
-            'position': sun_position.copy(),
-            'velocity': velocity,
-            'age': 0.0,
-            'lifetime': random.uniform(2.0, 4.0)
-        }
-        supernova_particles.append(particle)
+    theta = np.random.uniform(0, 2 * math.pi, num_particles)
+    phi = np.random.uniform(0, math.pi, num_particles)
+    speed = np.random.uniform(50.0, 200.0, num_particles)
+    velocity = speed[:, None] * np.column_stack([
+        np.sin(phi) * np.cos(theta),
+        np.sin(phi) * np.sin(theta),
+        np.cos(phi)
+    ])
+    
+    clear_particle_pool(supernova_pool)
+    append_particles(supernova_pool,
+                     position=np.repeat(sun_position[None, :], num_particles, axis=0),
+                     velocity=velocity,
+                     lifetime=np.random.uniform(2.0, 4.0, num_particles))
+    enforce_particle_budget()
 # ============================================================================
 # FARHAN ZARIF - FEATURE 6: BLACK HOLE CAPTURE MECHANICS
 # (Tidal Forces, Event Horizon, Schwarzschild Radius Physics)
@@ -1494,111 +2111,84 @@ def create_supernova_explosion():
 
 def check_black_hole_interactions(planet):
     """Check planet interactions with black hole"""
-    distance_to_bh = np.linalg.norm(planet['position'] - black_hole_position)
-    rs = calculate_schwarzschild_radius(black_hole_mass)
-    tidal_radius = calculate_tidal_radius(black_hole_mass)
-    logical_capture_radius = rs * LOGICAL_CAPTURE_RADIUS_MULTIPLIER
-    
-    if distance_to_bh <= BLACK_HOLE_VISUAL_RADIUS:
-        capture_planet(planet)
-        return
-    
-    if 'logically_captured' not in planet:
-        planet['logically_captured'] = False
-    
-    if not planet['logically_captured'] and distance_to_bh <= logical_capture_radius:
-        planet['logically_captured'] = True
-    
-    accretion_disk_outer_radius = BLACK_HOLE_VISUAL_RADIUS * 6.0
-    if distance_to_bh <= accretion_disk_outer_radius or planet['logically_captured']:
-        to_bh = black_hole_position - planet['position']
-        distance = np.linalg.norm(to_bh)
-        
-        if distance > 0:
-            orbital_speed = np.sqrt(G * black_hole_mass / distance) * 0.8  
-            to_bh_normalized = to_bh / distance
-            current_vel = planet['velocity']
-            current_speed = np.linalg.norm(current_vel)
-            if current_speed > 0.1:
-                current_vel_normalized = current_vel / current_speed
-                radial_component = np.dot(current_vel_normalized, to_bh_normalized)
-                tangential_component = current_vel_normalized - radial_component * to_bh_normalized
-                tangential_mag = np.linalg.norm(tangential_component)
-                
-                if tangential_mag > 0.01:
-                    tangential_dir = tangential_component / tangential_mag
-                else:
-                    if abs(to_bh_normalized[2]) < 0.9:
-                        tangential_dir = np.cross(to_bh_normalized, np.array([0.0, 0.0, 1.0]))
-                    else:
-                        tangential_dir = np.cross(to_bh_normalized, np.array([1.0, 0.0, 0.0]))
-                    tangential_dir = tangential_dir / np.linalg.norm(tangential_dir)
-            else:
-                if abs(to_bh_normalized[2]) < 0.9:
-                    tangential_dir = np.cross(to_bh_normalized, np.array([0.0, 0.0, 1.0]))
-                else:
-                    tangential_dir = np.cross(to_bh_normalized, np.array([1.0, 0.0, 0.0]))
-                tangential_dir = tangential_dir / np.linalg.norm(tangential_dir)
-            
-            if distance <= accretion_disk_outer_radius:
-                orbital_speed *= 0.6  
-                orbital_decay = 0.95   
-                inward_factor = 0.25   
-                
-                spiral_tightness = (accretion_disk_outer_radius - distance) / accretion_disk_outer_radius
-                inward_factor += spiral_tightness * 0.15  
-                
-                if distance <= BLACK_HOLE_VISUAL_RADIUS * 3.0:
-                    proximity_factor = (BLACK_HOLE_VISUAL_RADIUS * 3.0 - distance) / (BLACK_HOLE_VISUAL_RADIUS * 3.0)
-                    inward_factor += proximity_factor * 0.5  
-            else:
-                orbital_decay = 0.99  
-                inward_factor = 0.05   
-            
-            orbital_velocity = tangential_dir * orbital_speed * orbital_decay
-            inward_velocity = to_bh_normalized * (orbital_speed * inward_factor)
-            planet['velocity'] = orbital_velocity + inward_velocity
-    
-    if distance_to_bh <= accretion_disk_outer_radius and not planet['spaghettified']:
-        planet['spaghettified'] = True
-        planet['spaghetti_factor'] = 1.0
-    
-    if planet['spaghettified']:
-        stretch_factor = max(1.0, accretion_disk_outer_radius / distance_to_bh)
-        planet['spaghetti_factor'] = min(5.0, stretch_factor)
+    resolve_black_hole_interactions([planet])
 
-def capture_planet(planet):
-    """Capture a planet by the black hole - creates supernova-like explosion"""
-    global debris_particles, debris_generation_cooldown, current_time
-    
-    if current_time < debris_generation_cooldown:
-        planet['captured'] = True
-        return
-    
-    if len(debris_particles) > 800: 
-        debris_particles = debris_particles[-600:] 
-    
-    debris_generation_cooldown = current_time + 0.5
-    planet['captured'] = True
-    planet_to_bh = black_hole_position - planet['position']
-    distance_to_bh = np.linalg.norm(planet_to_bh)
+def classify_black_hole_zones(distance, logically_captured):
+    """Bin distances to the black hole into BLACK_HOLE_ZONE_* codes.
 
-    if distance_to_bh > 0:
-        direction_to_bh = planet_to_bh / distance_to_bh
-    else:
-        direction_to_bh = np.array([1.0, 0.0, 0.0])
-    
-    planet_velocity_normalized = np.array([0.0, 0.0, 0.0])
-    planet_speed = np.linalg.norm(planet['velocity'])
-    avoid_direction = planet_speed > 1.0 
-    if avoid_direction:
-        planet_velocity_normalized = planet['velocity'] / planet_speed
-    
-    planet_color = planet['color']
-    planet_mass = planet['mass']
-    planet_radius = planet['radius']
-    planet_name = planet.get('name', 'Unknown')
-    
+    Horizon, inner disk and accretion disk are nested shells of the visual
+    radius; beyond the disk a body is in the logical capture zone once it has
+    been logically captured, and free otherwise.
+    """
+    zone = np.searchsorted(BLACK_HOLE_ZONE_EDGES, distance).astype(np.uint8)
+    zone += (zone == BLACK_HOLE_ZONE_LOGICAL_CAPTURE) & ~logically_captured
+    return zone
+
+def _spiral_velocity(to_bh, distance, velocity, bh_mass, zone):
+    """Spiral-in velocity for bodies inside a disk or logical capture zone (one row per body)"""
+    to_bh_normalized = to_bh / distance[:, None]
+    orbital_speed = np.sqrt(G * bh_mass / distance) * 0.8
+
+    speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity))
+    moving = speed > 0.1
+    velocity_normalized = velocity / np.where(moving, speed, 1.0)[:, None]
+    radial_component = np.einsum('ij,ij->i', velocity_normalized, to_bh_normalized)
+    tangential = velocity_normalized - radial_component[:, None] * to_bh_normalized
+    tangential_mag = np.sqrt(np.einsum('ij,ij->i', tangential, tangential))
+    use_tangential = moving & (tangential_mag > 0.01)
+
+    # Perpendicular to the radial direction: its cross product with z, or with x near the poles
+    x, y, z = to_bh_normalized.T
+    fallback = np.where((np.abs(z) < 0.9)[:, None],
+                        np.column_stack([y, -x, np.zeros_like(z)]), np.column_stack([np.zeros_like(x), z, -y]))
+    fallback /= np.sqrt(np.einsum('ij,ij->i', fallback, fallback))[:, None]
+    tangential_dir = np.where(use_tangential[:, None],
+                              tangential / np.where(use_tangential, tangential_mag, 1.0)[:, None], fallback)
+
+    in_disk = zone <= BLACK_HOLE_ZONE_ACCRETION_DISK
+    accretion_disk_outer_radius = BLACK_HOLE_ZONE_EDGES[2]
+    inner_disk_radius = BLACK_HOLE_ZONE_EDGES[1]
+    orbital_speed = np.where(in_disk, orbital_speed * 0.6, orbital_speed)
+    orbital_decay = np.where(in_disk, 0.95, 0.99)
+    spiral_tightness = (accretion_disk_outer_radius - distance) / accretion_disk_outer_radius
+    proximity_factor = np.where(zone == BLACK_HOLE_ZONE_INNER_DISK,
+                                (inner_disk_radius - distance) / inner_disk_radius * 0.5, 0.0)
+    inward_factor = np.where(in_disk, 0.25 + spiral_tightness * 0.15 + proximity_factor, 0.05)
+    return (tangential_dir * (orbital_speed * orbital_decay)[:, None]
+            + to_bh_normalized * (orbital_speed * inward_factor)[:, None])
+
+def resolve_black_hole_interactions(bodies):
+    """One vectorized black hole pass over planet dicts.
+
+    Updates the spiral velocity, logical capture and spaghettification state
+    of every body, then captures the bodies in the horizon zone in list order.
+    Returns their indices.
+    """
+    if not bodies:
+        return []
+    position = np.array([planet['position'] for planet in bodies])
+    velocity = np.array([planet['velocity'] for planet in bodies])
+    logically_captured = np.array([planet.get('logically_captured', False) for planet in bodies])
+    spaghettified = np.array([planet['spaghettified'] for planet in bodies])
+    spaghetti_factor = np.array([planet['spaghetti_factor'] for planet in bodies], dtype=np.float64)
+    zone = black_hole_interaction_kernel(position, velocity, logically_captured, spaghettified, spaghetti_factor,
+                                         black_hole_position, black_hole_mass, LOGICAL_CAPTURE_RADIUS_MULTIPLIER)
+
+    changed = (zone != BLACK_HOLE_ZONE_HORIZON) & ((zone != BLACK_HOLE_ZONE_FREE) | spaghettified)
+    for k in np.nonzero(changed)[0]:
+        planet = bodies[k]
+        planet['velocity'][:] = velocity[k]
+        planet['logically_captured'] = bool(logically_captured[k])
+        planet['spaghettified'] = bool(spaghettified[k])
+        planet['spaghetti_factor'] = float(spaghetti_factor[k])
+
+    captures = np.nonzero(zone == BLACK_HOLE_ZONE_HORIZON)[0].tolist()
+    for k in captures:
+        capture_planet(bodies[k])
+    return captures
+
+def calculate_debris_layout(planet_name, planet_mass, planet_radius):
+    """Number of debris layers and particles per layer created when a planet is captured"""
     volume_factor = (planet_radius ** 3) / 125.0  
     mass_factor = planet_mass / 20.0  
     base_debris_count = int(50 + (mass_factor * 80) + (volume_factor * 60))
@@ -1633,7 +2223,72 @@ def capture_planet(planet):
     else:
         num_layers = 6
     
-    particles_per_layer = num_debris // num_layers
+    return num_layers, num_debris // num_layers
+
+def black_hole_interaction_kernel(position, velocity, logically_captured, spaghettified, spaghetti_factor,
+                                  bh_position, bh_mass, capture_multiplier=None):
+    """Zone-classify arrays of bodies against the black hole and apply each zone's effects.
+
+    position/velocity are (..., 3); the flag and factor arrays have the leading
+    shape and are updated in place, as is velocity. bh_mass and
+    capture_multiplier broadcast against the leading shape; capture_multiplier
+    defaults to the current LOGICAL_CAPTURE_RADIUS_MULTIPLIER. The spiral-in
+    blend is only evaluated for bodies inside a disk or logical capture zone.
+    Returns the BLACK_HOLE_ZONE_* code of every body; those in the horizon
+    zone must be captured and are otherwise left untouched.
+    """
+    to_bh = bh_position - position
+    distance = np.sqrt(np.einsum('...i,...i->...', to_bh, to_bh))
+    bh_mass = np.broadcast_to(np.asarray(bh_mass, dtype=np.float64), distance.shape)
+    if capture_multiplier is None:
+        capture_multiplier = LOGICAL_CAPTURE_RADIUS_MULTIPLIER
+    logical_capture_radius = calculate_schwarzschild_radius(bh_mass) * capture_multiplier
+
+    outside = distance > BLACK_HOLE_VISUAL_RADIUS
+    logically_captured |= outside & (distance <= logical_capture_radius)
+    zone = classify_black_hole_zones(distance, logically_captured)
+
+    spaghettified |= outside & (zone <= BLACK_HOLE_ZONE_ACCRETION_DISK)
+    stretched = outside & spaghettified
+    spaghetti_factor[stretched] = np.minimum(5.0, np.maximum(1.0, BLACK_HOLE_ZONE_EDGES[2] / distance[stretched]))
+
+    blend = outside & (zone != BLACK_HOLE_ZONE_FREE)
+    if blend.any():
+        velocity[blend] = _spiral_velocity(to_bh[blend], distance[blend], velocity[blend], bh_mass[blend], zone[blend])
+    return zone
+
+def capture_planet(planet):
+    """Capture a planet by the black hole - creates supernova-like explosion"""
+    global debris_generation_cooldown, current_time
+    
+    if current_time < debris_generation_cooldown:
+        planet['captured'] = True
+        return
+    
+    debris_generation_cooldown = current_time + 0.5
+    planet['captured'] = True
+    planet_to_bh = black_hole_position - planet['position']
+    distance_to_bh = np.linalg.norm(planet_to_bh)
+
+    if distance_to_bh > 0:
+        direction_to_bh = planet_to_bh / distance_to_bh
+    else:
+        direction_to_bh = np.array([1.0, 0.0, 0.0])
+    
+    planet_velocity_normalized = np.array([0.0, 0.0, 0.0])
+    planet_speed = np.linalg.norm(planet['velocity'])
+    avoid_direction = planet_speed > 1.0 
+    if avoid_direction:
+        planet_velocity_normalized = planet['velocity'] / planet_speed
+    
+    planet_color = planet['color']
+    planet_mass = planet['mass']
+    planet_radius = planet['radius']
+    planet_name = planet.get('name', 'Unknown')
+    
+    mass_factor = planet_mass / 20.0  
+    num_layers, particles_per_layer = calculate_debris_layout(planet_name, planet_mass, planet_radius)
+    spawned = []
     
     for layer in range(num_layers):
         layer_speed_multiplier = 1.0 + (layer * 0.3)
@@ -1758,7 +2413,9 @@ def capture_planet(planet):
                 'planet_type': planet_name,
                 'mass_factor': mass_factor
             }
-            debris_particles.append(debris)
+            spawned.append(debris)
+    
+    spawn_debris_particles(spawned)
     
     for i in range(len(planets) - 1, -1, -1):
         if planets[i] is planet:
@@ -1769,36 +2426,146 @@ def capture_planet(planet):
 # EVAN YUVRAJ MUNSHI - FEATURE 8: Collision Detection and Rebound
 # ============================================================================
 
+def _expand_ranges(owners, starts, counts):
+    """Expand (owner, [start, start + count)) ranges into flat (owner, partner) index arrays"""
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    first = np.cumsum(counts) - counts
+    partners = np.repeat(starts - first, counts) + np.arange(total)
+    return np.repeat(owners, counts), partners
+
+def find_candidate_pairs(positions, reach):
+    """Uniform spatial-hash broadphase over spheres.
+
+    Returns index arrays (a, b) of every pair whose spheres of radius `reach`
+    could overlap, each unordered pair exactly once. Cells are sized so that
+    any overlapping pair lies in the same or an adjacent cell. Below
+    BROADPHASE_MIN_BODIES every pair is a candidate, which is cheaper than
+    building the grid.
+    """
+    count = len(positions)
+    if count < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    if count < BROADPHASE_MIN_BODIES:
+        pairs = physics_scratch['pairs'].get(count)
+        if pairs is None:
+            pairs = physics_scratch['pairs'][count] = np.triu_indices(count, 1)
+            for index in pairs:
+                index.flags.writeable = False
+        return pairs
+    cell_size = max(2.0 * float(np.max(reach)), 1e-9)
+    lower = positions.min(axis=0)
+    while True:
+        coords = np.floor((positions - lower) / cell_size).astype(np.int64) + 1
+        dims = coords.max(axis=0) + 2
+        if float(dims[0]) * float(dims[1]) * float(dims[2]) < 2.0 ** 62:
+            break
+        cell_size *= 2.0
+    keys = (coords[:, 0] * dims[1] + coords[:, 1]) * dims[2] + coords[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    ranks = np.arange(count)
+
+    # Same-cell pairs: each body pairs with the bodies after it in its cell
+    cell_end = np.searchsorted(sorted_keys, sorted_keys, side='right')
+    owner_parts, partner_parts = [], []
+    owners, partners = _expand_ranges(ranks, ranks + 1, cell_end - ranks - 1)
+    owner_parts.append(owners)
+    partner_parts.append(partners)
+
+    # Neighbour cells: the 13 offsets of one half-space so every pair is seen once
+    for offset in BROADPHASE_HALF_NEIGHBOURS:
+        delta = (offset[0] * dims[1] + offset[1]) * dims[2] + offset[2]
+        neighbour_keys = sorted_keys + delta
+        start = np.searchsorted(sorted_keys, neighbour_keys, side='left')
+        stop = np.searchsorted(sorted_keys, neighbour_keys, side='right')
+        owners, partners = _expand_ranges(ranks, start, stop - start)
+        owner_parts.append(owners)
+        partner_parts.append(partners)
+
+    return order[np.concatenate(owner_parts)], order[np.concatenate(partner_parts)]
+
+def pair_difference_matrices(count):
+    """Cached (pairs, count) matrices over all pairs i < j in np.triu_indices order.
+
+    `difference` has -1 in column i and +1 in column j, `total` has +1 in
+    both, so difference @ x is x[j] - x[i] and total @ x is x[i] + x[j]. All
+    other terms of those products are exact zeros, so they match the
+    gathered differences and sums bit for bit while np.dot fills an `out`
+    buffer without the temporaries of fancy indexing.
+    """
+    matrices = physics_scratch['pair_matrices'].get(count)
+    if matrices is None:
+        i, j = np.triu_indices(count, 1)
+        rows = np.arange(len(i))
+        difference = np.zeros((len(i), count))
+        difference[rows, i] = -1.0
+        difference[rows, j] = 1.0
+        matrices = physics_scratch['pair_matrices'][count] = (difference, np.abs(difference))
+    return matrices
+
+def detect_collisions_arrays(position, velocity, radius):
+    """Broadphase + vectorized narrowphase over body arrays.
+
+    Applies the same tests as the original pairwise loop: overlap within the
+    COLLISION_THRESHOLD_MULTIPLIER threshold, relative speed of at least
+    MIN_COLLISION_VELOCITY and approaching bodies. Returns (i, j,
+    distance_vector, distance) arrays with i < j, sorted by (i, j).
+    """
+    count = len(position)
+    reach = np.multiply(radius, physics_scalar('collision_threshold', COLLISION_THRESHOLD_MULTIPLIER),
+                        out=physics_buffer('narrow_reach', radius.shape))
+    a, b = find_candidate_pairs(position, reach)
+    pairs = len(a)
+    i = np.minimum(a, b, out=physics_buffer('narrow_i', (pairs,), a.dtype))
+    j = np.maximum(a, b, out=physics_buffer('narrow_j', (pairs,), a.dtype))
+    # Gathered rows and tests live in physics_buffer; only the hits are copied out
+    distance_vector, vector_columns = physics_columns('narrow_vector', pairs)
+    relative_velocity, velocity_columns = physics_columns('narrow_velocity', pairs)
+    limit = physics_buffer('narrow_limit', (pairs,))
+    if count < BROADPHASE_MIN_BODIES:
+        # Every pair is a candidate, in the order of the cached pair matrices
+        difference, total = pair_difference_matrices(count)
+        np.dot(difference, position, out=distance_vector)
+        np.dot(difference, velocity, out=relative_velocity)
+        np.dot(total, reach, out=limit)
+    else:
+        gathered = physics_buffer('narrow_gathered', (pairs, 3))
+        np.take(position, j, axis=0, out=distance_vector)
+        distance_vector -= np.take(position, i, axis=0, out=gathered)
+        np.take(velocity, j, axis=0, out=relative_velocity)
+        relative_velocity -= np.take(velocity, i, axis=0, out=gathered)
+        np.take(reach, i, out=limit)
+        limit += np.take(reach, j, out=physics_buffer('narrow_limit_j', (pairs,)))
+    term = physics_buffer('narrow_term', (pairs,))
+    distance = _rowwise_dot(vector_columns, vector_columns, physics_buffer('narrow_distance', (pairs,)), term)
+    np.sqrt(distance, out=distance)
+    relative_speed = _rowwise_dot(velocity_columns, velocity_columns, physics_buffer('narrow_speed', (pairs,)), term)
+    np.sqrt(relative_speed, out=relative_speed)
+    hit = np.less_equal(distance, limit, out=physics_buffer('narrow_hit', (pairs,), bool))
+    test = physics_buffer('narrow_test', (pairs,), bool)
+    hit &= np.greater_equal(relative_speed, physics_scalar('collision_min_speed', MIN_COLLISION_VELOCITY), out=test)
+    hit &= np.greater(distance, physics_scalar('zero', 0.0), out=test)
+    if not np.count_nonzero(hit):
+        return physics_scratch['no_contacts']
+    hit[hit] = np.einsum('ij,ij->i', relative_velocity[hit], distance_vector[hit]) < 0
+    i, j, distance_vector, distance = i[hit], j[hit], distance_vector[hit], distance[hit]
+    order = np.lexsort((j, i))
+    return i[order], j[order], distance_vector[order], distance[order]
+
 def detect_planet_collisions():
     """Detect collisions between all planet pairs"""
-    collisions = []
-    
-    for i in range(len(planets)):
-        for j in range(i + 1, len(planets)):
-            planet1 = planets[i]
-            planet2 = planets[j]
-            
-            if planet1['captured'] or planet2['captured']:
-                continue
-            
-            distance_vector = planet2['position'] - planet1['position']
-            distance = np.linalg.norm(distance_vector)
-            
-            collision_threshold = (planet1['radius'] + planet2['radius']) * COLLISION_THRESHOLD_MULTIPLIER
-            
-            if distance <= collision_threshold:
-                relative_velocity = planet2['velocity'] - planet1['velocity']
-                relative_speed = np.linalg.norm(relative_velocity)
-                
-                if relative_speed >= MIN_COLLISION_VELOCITY:
-                    if distance > 0:
-                        approach_direction = distance_vector / distance
-                        relative_velocity_component = np.dot(relative_velocity, approach_direction)
-                        
-                        if relative_velocity_component < 0: 
-                            collisions.append((i, j, distance_vector, distance))
-    
-    return collisions
+    indices = [index for index, planet in enumerate(planets) if not planet['captured']]
+    if len(indices) < 2:
+        return []
+    position = np.array([planets[index]['position'] for index in indices])
+    velocity = np.array([planets[index]['velocity'] for index in indices])
+    radius = np.array([planets[index]['radius'] for index in indices], dtype=np.float64)
+    i, j, distance_vector, distance = detect_collisions_arrays(position, velocity, radius)
+    return [(indices[a], indices[b], distance_vector[k], distance[k]) for k, (a, b) in enumerate(zip(i, j))]
 
 def resolve_collision(planet1, planet2, collision_vector, distance):
     """Resolve collision between two planets using elastic collision physics"""
@@ -1832,9 +2599,104 @@ def resolve_collision(planet1, planet2, collision_vector, distance):
         
         planet1['position'] -= collision_normal * planet1_separation
         planet2['position'] += collision_normal * planet2_separation
+    
+    note_orbit_change(planet1)
+    note_orbit_change(planet2)
+
+def _scatter_add_vectors(indices, vectors, count):
+    """Sum (K, 3) vectors into a (count, 3) array by body index"""
+    return np.stack([np.bincount(indices, weights=vectors[:, axis], minlength=count) for axis in range(3)], axis=1)
+
+def solve_contacts_batched(position, velocity, mass, radius, i, j, iterations=CONTACT_SOLVER_ITERATIONS):
+    """Resolve every contact of a step at once with Jacobi-iterated restitution impulses.
+
+    position/velocity are (N, 3) arrays updated in place; (i, j) index the
+    contact pairs. Each iteration recomputes the normal velocity of every
+    contact and applies the clamped accumulated impulse that drives it to
+    -RESTITUTION_COEFFICIENT times its approach speed. Each update is
+    relaxed by the contact count of the busier of its two bodies. Impulses
+    stay equal and opposite, so momentum is conserved. A lone contact gets
+    exactly the resolve_collision() result in one iteration, and the
+    outcome no longer depends on pair order.
+    """
+    if len(i) == 0:
+        return
+    count = len(position)
+    normal = position[j] - position[i]
+    distance = np.sqrt(np.einsum('ij,ij->i', normal, normal))
+    normal = np.where(distance[:, None] > 0, normal / np.where(distance > 0, distance, 1.0)[:, None],
+                      np.array([1.0, 0.0, 0.0]))
+    inverse_mass = 1.0 / mass
+    effective_mass = inverse_mass[i] + inverse_mass[j]
+    contacts_per_body = np.bincount(i, minlength=count) + np.bincount(j, minlength=count)
+    relaxation = 1.0 / np.maximum(contacts_per_body[i], contacts_per_body[j])
+
+    approach_speed = np.einsum('ij,ij->i', velocity[j] - velocity[i], normal)
+    active = approach_speed <= 0
+    target_speed = -RESTITUTION_COEFFICIENT * approach_speed
+    accumulated = np.zeros(len(i))
+    for _ in range(iterations):
+        normal_speed = np.einsum('ij,ij->i', velocity[j] - velocity[i], normal)
+        step = relaxation * (target_speed - normal_speed) / effective_mass
+        updated = np.where(active, np.maximum(accumulated + step, 0.0), 0.0)
+        impulse = (updated - accumulated)[:, None] * normal
+        accumulated = updated
+        delta = _scatter_add_vectors(j, impulse, count) - _scatter_add_vectors(i, impulse, count)
+        velocity += delta * inverse_mass[:, None]
+
+    overlap = (radius[i] + radius[j]) * COLLISION_THRESHOLD_MULTIPLIER - distance
+    correct = active & (overlap > 0)
+    total_mass = mass[i] + mass[j]
+    separation = np.where(correct, overlap * 0.5 * relaxation, 0.0)
+    push_i = -normal * (separation * mass[j] / total_mass)[:, None]
+    push_j = normal * (separation * mass[i] / total_mass)[:, None]
+    position += _scatter_add_vectors(i, push_i, count) + _scatter_add_vectors(j, push_j, count)
+
+def _pack_body_state(bodies):
+    """Position, velocity and radius arrays of `bodies`, filled into physics_buffer"""
+    count = len(bodies)
+    position = physics_buffer('body_position', (count, 3))
+    velocity = physics_buffer('body_velocity', (count, 3))
+    radius = physics_buffer('body_radius', (count,))
+    for k in range(count):
+        planet = bodies[k]
+        position[k] = planet['position']
+        velocity[k] = planet['velocity']
+        radius[k] = planet['radius']
+    return position, velocity, radius
+
+def _resolve_endpoint_contacts(bodies, included=None):
+    """Detect and resolve contacts between `bodies` at their current positions.
+
+    With `included` (one bool per body) only pairs involving at least one
+    included body are resolved.
+    """
+    position, velocity, radius = _pack_body_state(bodies)
+    i, j, distance_vector, distance = detect_collisions_arrays(position, velocity, radius)
+    if len(i) and included is not None:
+        keep = included[i] | included[j]
+        i, j, distance_vector, distance = i[keep], j[keep], distance_vector[keep], distance[keep]
+    if len(i) == 0:
+        return
+    if not BATCHED_CONTACT_SOLVER:
+        for k in range(len(i)):
+            resolve_collision(bodies[i[k]], bodies[j[k]], distance_vector[k], distance[k])
+        return
+    mass = np.array([planet['mass'] for planet in bodies], dtype=np.float64)
+    solve_contacts_batched(position, velocity, mass, radius, i, j)
+    for k in np.unique(np.concatenate((i, j))):
+        bodies[k]['position'][:] = position[k]
+        bodies[k]['velocity'][:] = velocity[k]
+        note_orbit_change(bodies[k])
 
 def update_collision_physics():
     """Update collision physics for all planets"""
+    if BATCHED_CONTACT_SOLVER:
+        bodies = live_planets()
+        if len(bodies) >= 2:
+            _resolve_endpoint_contacts(bodies)
+        return
+
     collisions = detect_planet_collisions()
     
     for planet1_idx, planet2_idx, collision_vector, distance in collisions:
@@ -1885,222 +2747,4588 @@ def setup_collision_rebound_preset():
     camera_state['target'] = np.array([0.0, 0.0, 0.0])
     
     keys_locked = True
-    print("Collision rebound preset activated! Event keys locked until reset (R).")
+    log_message("Collision rebound preset activated! Event keys locked until reset (R).")
     camera_state['distance'] = 500.0
     
 # ============================================================================
-# KEYBOARD & MOUSE FUNCTIONS
+# CONTINUOUS (SWEPT) EVENT DETECTION
+# (Time of Impact for Body Pairs and Event Horizon Crossings)
 # ============================================================================
 
-# SHAHID GALIB - VISUAL FOUNDATION & SOLAR SYSTEM CONTROLS
-def keyboard_listener(key, x, y):
-    """Handle keyboard input for all simulation controls"""
-    global is_solar_system_active, is_black_hole_active, is_supernova_active
-    global sequence_start_time, sequence_stage, black_hole_mass, selected_planet_index, keys_locked
-    global spaceship_velocity, spaceship_rotation, spaceship_position, spaceship_scale, spaceship_exists
-    global camera_mode, camera_transition_active, camera_transition_start, camera_start_pos, camera_start_target
-    global G
-    global game_state
-    if key == b'\x1b':
-        game_state = GAME_STATE_MENU
-        print("Returning to main menu...")
-        return
-    if game_state != GAME_STATE_SIMULATION:
-        return
+def first_crossing_time(offset, motion, radius, growth=0.0):
+    """Earliest fraction t in [0, 1] of a step at which |offset + t * motion| <= radius + t * growth.
 
-    event_trigger_keys = [b'b', b'B', b'x', b'X', b'p', b'P']
-    if keys_locked and key in event_trigger_keys:
-        print("Event keys are locked! Press R to reset and unlock. Another event cannot be triggered.")
+    Bodies move linearly across the step; `growth` lets the target radius grow
+    linearly too (red giant). Works on arrays of offsets/motions and returns NaN
+    where no crossing happens within the step.
+    """
+    offset = np.atleast_2d(offset)
+    motion = np.atleast_2d(motion)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), offset.shape[:1])
+    growth = np.broadcast_to(np.asarray(growth, dtype=np.float64), offset.shape[:1])
+    a = np.einsum('ij,ij->i', motion, motion) - growth * growth
+    b = 2.0 * (np.einsum('ij,ij->i', offset, motion) - radius * growth)
+    c = np.einsum('ij,ij->i', offset, offset) - radius * radius
+
+    result = np.full(len(offset), np.nan)
+    result[c <= 0.0] = 0.0
+    pending = c > 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quadratic = pending & (np.abs(a) > 1e-12)
+        disc = b * b - 4.0 * a * c
+        root_sq = np.sqrt(np.where(quadratic & (disc >= 0.0), disc, np.nan))
+        root_low = (-b - root_sq) / (2.0 * a)
+        root_high = (-b + root_sq) / (2.0 * a)
+        low = np.minimum(root_low, root_high)
+        high = np.maximum(root_low, root_high)
+        # f(0) > 0, so the first root inside the step is the moment of entry
+        first = np.where((low >= 0.0) & (low <= 1.0), low, np.where((high >= 0.0) & (high <= 1.0), high, np.nan))
+        result = np.where(quadratic, first, result)
+        linear = pending & ~quadratic & (b < 0.0)
+        linear_root = -c / b
+        result = np.where(linear & (linear_root <= 1.0), linear_root, result)
+    return result
+
+def find_swept_collisions(start, end, velocity, radius):
+    """Time-of-impact pairs for bodies moving linearly from `start` to `end` over one step.
+
+    Returns (t, i, j) arrays for approaching pairs whose swept spheres touch
+    within the collision threshold during the step.
+    """
+    count = len(start)
+    reach = np.multiply(radius, COLLISION_THRESHOLD_MULTIPLIER, out=physics_buffer('swept_reach', (count,)))
+    displacement = np.subtract(end, start, out=physics_buffer('swept_displacement', (count, 3)))
+    half_path = np.einsum('ij,ij->i', displacement, displacement, out=physics_buffer('swept_half_path', (count,)))
+    np.sqrt(half_path, out=half_path)
+    np.multiply(0.5, half_path, out=half_path)
+    half_path += reach
+    midpoint = np.add(start, end, out=physics_buffer('swept_midpoint', (count, 3)))
+    np.multiply(0.5, midpoint, out=midpoint)
+    a, b = find_candidate_pairs(midpoint, half_path)
+    i = np.minimum(a, b)
+    j = np.maximum(a, b)
+    toi = first_crossing_time(start[j] - start[i], displacement[j] - displacement[i], reach[i] + reach[j])
+    hit = np.isfinite(toi)
+    i, j, toi = i[hit], j[hit], toi[hit]
+    contact = (start[j] - start[i]) + toi[:, None] * (displacement[j] - displacement[i])
+    relative_velocity = velocity[j] - velocity[i]
+    relative_speed = np.sqrt(np.einsum('ij,ij->i', relative_velocity, relative_velocity))
+    approaching = ((relative_speed >= MIN_COLLISION_VELOCITY)
+                   & (np.einsum('ij,ij->i', relative_velocity, contact) < 0.0)
+                   & (np.einsum('ij,ij->i', contact, contact) > 0.0))
+    return toi[approaching], i[approaching], j[approaching]
+
+def _resolve_swept_contacts_batched(bodies, start, motion, velocity, radius, toi, i, j, dt):
+    """Rewind colliding bodies to their first contact, solve all contacts together, then finish the step"""
+    count = len(bodies)
+    first_contact = np.ones(count)
+    np.minimum.at(first_contact, i, toi)
+    np.minimum.at(first_contact, j, toi)
+    involved = np.unique(np.concatenate((i, j)))
+    position = start + first_contact[:, None] * motion
+    mass = np.array([planet['mass'] for planet in bodies], dtype=np.float64)
+    solve_contacts_batched(position, velocity, mass, radius, i, j)
+    for k in involved:
+        planet = bodies[k]
+        planet['velocity'][:] = velocity[k]
+        planet['position'] = position[k] + velocity[k] * ((1.0 - first_contact[k]) * dt)
+        planet['orbital_trail'][-1] = planet['position'].copy()
+        note_orbit_change(planet)
+
+def update_planets_continuous(dt):
+    """Integrate planets, then fire capture and collision events at their sub-step times.
+
+    Events are gathered from each body's straight-line path across the step
+    and processed in time order. A body whose path was changed by an earlier
+    event in the same step keeps its remaining events for the next step.
+    """
+    bodies = live_planets()
+    if not bodies:
         return
+    count = len(bodies)
+    integrated = count - len(kepler_orbit_table()['bodies'])
+    # Straight-line paths are only needed for the horizon test and the swept test between
+    # integrated bodies; a system of analytic orbits alone skips them
+    swept = is_black_hole_active or integrated > 1
+    if swept:
+        start = physics_buffer('continuous_start', (count, 3))
+        for k in range(count):
+            start[k] = bodies[k]['position']
+    advance_kepler_planets()
+    for planet in bodies:
+        if 'kepler' not in planet:
+            integrate_planet(planet, dt)
+    crossing_horizon = physics_buffer('continuous_crossing', (count,), bool)
+    crossing_horizon.fill(False)
+    events = None
+    if swept:
+        end = physics_buffer('continuous_end', (count, 3))
+        for k in range(count):
+            end[k] = bodies[k]['position']
+        motion = np.subtract(end, start, out=physics_buffer('continuous_motion', (count, 3)))
+        events = []
 
-    #Feature 4 - Farhan Zarif
-    if key == b'b' or key == b'B':
-        sequence_start_time = current_time
-        sequence_stage = 1
-        is_supernova_active = True
-        is_black_hole_active = True
-        sun_exists = False
-        keys_locked = True
-        print("Black hole sequence started! Keys locked until reset (R).")
-        
-    #Munshi  
-    elif key == b'x' or key == b'X':
-        global is_red_giant_active, red_giant_start_time, current_sun_radius, engulfed_planets
-        
-        print("Starting red giant expansion phase...")
-        is_red_giant_active = True
-        red_giant_start_time = current_time
-        current_sun_radius = SUN_INITIAL_RADIUS
-        engulfed_planets = []
-        keys_locked = True
-        print("Red giant sequence started! Keys locked until reset (R).")
-        
-    #Galib
-    elif key == b'f' or key == b'F':
-        if planets and selected_planet_index < len(planets):
-            camera_state['target'] = planets[selected_planet_index]['position'].copy()
-            camera_state['is_following_planet'] = True
-            print(f"Camera now following {planets[selected_planet_index]['name']}")
-            
-    elif key == b'h' or key == b'H':
-        camera_state['target'] = np.array([0.0, 0.0, 0.0])
-        camera_state['is_following_planet'] = False
-        print("Camera centered on origin, following disabled")
-        
-    elif key == b'r' or key == b'R':
-        reset_simulation()
-        keys_locked = False
-        print("Simulation reset! Keys unlocked.")
-        
-    elif key == b'v' or key == b'V':
-        if spaceship_exists:
-            new_mode = 1 if camera_mode == 0 else (2 if camera_mode == 1 else 0)
-            if new_mode == 0:
-                yaw = math.radians(spaceship_rotation[1])
-                pitch = math.radians(spaceship_rotation[0])
-                forward = np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
-                start_pos = spaceship_position - forward * (spaceship_scale * 8.0) + np.array([0.0, 0.0, spaceship_scale * 3.0])
-                camera_start_pos = start_pos
-                camera_start_target = spaceship_position + forward * (spaceship_scale * 6.0)
-                camera_transition_active = True
-                camera_transition_start = time.time()
-                camera_mode = 0
-            else:
-                request_camera_transition(new_mode)
-    
-    elif key == b'w' or key == b'W':
-        if spaceship_exists:
-            yaw = math.radians(spaceship_rotation[1])
-            pitch = math.radians(spaceship_rotation[0])
-            forward = np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
-            spaceship_velocity += forward * (spaceship_thrust * 0.025)
-    elif key == b's' or key == b'S':
-        if spaceship_exists:
-            yaw = math.radians(spaceship_rotation[1])
-            pitch = math.radians(spaceship_rotation[0])
-            back = -np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
-            spaceship_velocity += back * (spaceship_thrust * 0.025)
-    elif key == b'a' or key == b'A':
-        if spaceship_exists:
-            spaceship_rotation[1] -= 8.0
-    elif key == b'd' or key == b'D':
-        if spaceship_exists:
-            spaceship_rotation[1] += 8.0
-    elif key == b'e' or key == b'E':
-        # Pitch up
-        if spaceship_exists:
-            spaceship_rotation[0] += 6.0
-            spaceship_rotation[0] = min(spaceship_rotation[0], 85.0)  
-    elif key == b'q' or key == b'Q':
-        if spaceship_exists:
-            spaceship_rotation[0] -= 6.0
-            spaceship_rotation[0] = max(spaceship_rotation[0], -85.0)  
-    elif key == b'z' or key == b'Z':
-        if spaceship_exists:
-            spaceship_rotation[2] -= 10.0
-    elif key == b'c' or key == b'C':
-   
-        if spaceship_exists:
-            spaceship_rotation[2] += 10.0
-    elif key == b'x' or key == b'X':
-        if spaceship_exists:
-            spaceship_velocity *= 0.3 
-    elif key == b'g' or key == b'G':
-        spawn_spaceship_near_selected_planet()
-    elif key == b'l' or key == b'L':
-        if spaceship_exists:
-            spaceship_exists = False
-            print("Star Destroyer despawned")
+    if is_black_hole_active:
+        horizon_time = first_crossing_time(start - black_hole_position, motion, BLACK_HOLE_VISUAL_RADIUS)
+        crossing_horizon = np.isfinite(horizon_time)
+        for k in np.nonzero(crossing_horizon)[0]:
+            events.append((horizon_time[k], EVENT_CAPTURE, k, -1))
+        resolve_black_hole_interactions([planet for k, planet in enumerate(bodies) if not crossing_horizon[k]])
+
+    analytic = physics_buffer('continuous_analytic', (count,), bool)
+    if integrated:
+        for k in range(count):
+            analytic[k] = 'kepler' in bodies[k]
+    else:
+        analytic.fill(True)
+    if integrated > 1:
+        indices = np.flatnonzero(~analytic)
+        _, velocity, radius = _pack_body_state(bodies)
+        toi, i, j = find_swept_collisions(start[indices], end[indices],
+                                          velocity[indices], radius[indices])
+        i, j = indices[i], indices[j]
+        keep = ~(crossing_horizon[i] | crossing_horizon[j])
+        toi, i, j = toi[keep], i[keep], j[keep]
+        if BATCHED_CONTACT_SOLVER:
+            if len(i):
+                _resolve_swept_contacts_batched(bodies, start, motion, velocity, radius, toi, i, j, dt)
         else:
-            print("No spaceship to despawn")
-    elif key == b'h' or key == b'H':
-        camera_state['target'] = np.array([0.0, 0.0, 0.0])
-        camera_state['is_following_planet'] = False
-        print("Camera centered on origin, following disabled")
-        
-    elif key == b'p' or key == b'P':
-        #Evan Yuvraj
-        setup_collision_rebound_preset()
-    
-    #Shahid Galib
-    elif key == b'5':
-        camera_state['distance'] = max(50.0, camera_state['distance'] - 50.0)
-        print(f"Camera zoom in - Distance: {camera_state['distance']:.1f}")
-    elif key == b'6':
-        camera_state['distance'] = min(2000.0, camera_state['distance'] + 50.0)
-        print(f"Camera zoom out - Distance: {camera_state['distance']:.1f}")
+            for contact in zip(toi, i, j):
+                events.append((contact[0], EVENT_COLLISION, contact[1], contact[2]))
+    if count > 1 and integrated < count:
+        # Analytic orbits are not straight lines across a step, so pairs with a Kepler body are
+        # tested at their exact end positions instead; bodies about to cross the horizon sit out
+        candidates = bodies
+        included = None if integrated == 0 else analytic
+        if np.count_nonzero(crossing_horizon):
+            candidates = [planet for k, planet in enumerate(bodies) if not crossing_horizon[k]]
+            included = analytic[~crossing_horizon]
+        if len(candidates) > 1:
+            _resolve_endpoint_contacts(candidates, included)
 
-def special_key_listener(key, x, y):
-    """Handle special key input (arrow keys)"""
-    global black_hole_mass, keys_locked
+    if not events:
+        return
+    events.sort()
+    disturbed = set()
+    for toi, kind, i, j in events:
+        if kind == EVENT_CAPTURE:
+            if i in disturbed:
+                continue
+            bodies[i]['position'] = start[i] + toi * motion[i]
+            capture_planet(bodies[i])
+            disturbed.add(i)
+        elif kind == EVENT_COLLISION:
+            if i in disturbed or j in disturbed:
+                continue
+            planet1 = bodies[i]
+            planet2 = bodies[j]
+            planet1['position'] = start[i] + toi * motion[i]
+            planet2['position'] = start[j] + toi * motion[j]
+            collision_vector = planet2['position'] - planet1['position']
+            resolve_collision(planet1, planet2, collision_vector, np.linalg.norm(collision_vector))
+            remaining = (1.0 - toi) * dt
+            planet1['position'] += planet1['velocity'] * remaining
+            planet2['position'] += planet2['velocity'] * remaining
+            planet1['orbital_trail'][-1] = planet1['position'].copy()
+            planet2['orbital_trail'][-1] = planet2['position'].copy()
+            disturbed.update((i, j))
 
-    #Zarif
-    if key == GLUT_KEY_UP:
-        black_hole_mass += 100.0
-        
-    elif key == GLUT_KEY_DOWN:
-        black_hole_mass = max(100.0, black_hole_mass - 100.0)
-    
-    #Galib
-    elif key == GLUT_KEY_LEFT:
-        global selected_planet_index, camera_state
-        if planets:
-            selected_planet_index = (selected_planet_index - 1) % len(planets)
-            if camera_state['is_following_planet']:
-                camera_state['target'] = planets[selected_planet_index]['position'].copy()
-                print(f"Camera now following {planets[selected_planet_index]['name']}")
-            
-    elif key == GLUT_KEY_RIGHT:
-        if planets:
-            selected_planet_index = (selected_planet_index + 1) % len(planets)
-            if camera_state['is_following_planet']:
-                camera_state['target'] = planets[selected_planet_index]['position'].copy()
-                print(f"Camera now following {planets[selected_planet_index]['name']}")
-#Evan                
-def mouse_listener(button, state, x, y):
-    """Handle mouse clicks for menu navigation"""
-    global selected_planet_index, mouse_x, mouse_y
-    
-    mouse_x = x
-    mouse_y = y
-    
-    if game_state == GAME_STATE_MENU:
-        check_menu_button_hover(x, y)
-        glutPostRedisplay()
-        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-            check_menu_button_click(x, y)
-    elif game_state == GAME_STATE_SIMULATION:
-        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
-            selected_planet_index = (selected_planet_index + 1) % len(planets)
-            print(f"Selected planet: {planets[selected_planet_index]['name']}")
-    glutPostRedisplay()
 # ============================================================================
-# MAIN DISPLAY AND LOOP FUNCTIONS
+# SNAPSHOT & REWIND SYSTEM
+# (Compact .npz State Capture, In-Memory Rewind Ring, Memory-Mapped Loading)
 # ============================================================================
 
-def idle():
-    """Idle function for continuous updates"""
-    global current_time, last_time
+def _pack_trails(bodies):
+    """Pack orbital trails into a padded (N, ORBITAL_TRAIL_LENGTH, 3) array plus lengths"""
+    trails = np.zeros((len(bodies), ORBITAL_TRAIL_LENGTH, 3))
+    lengths = np.zeros(len(bodies), dtype=np.int32)
+    for i, body in enumerate(bodies):
+        trail = body['orbital_trail'][-ORBITAL_TRAIL_LENGTH:]
+        if trail:
+            trails[i, :len(trail)] = trail
+        lengths[i] = len(trail)
+    return trails, lengths
 
-    if game_state == GAME_STATE_MENU:
-        draw_start_menu()
-    if game_state == GAME_STATE_SIMULATION:
-        current_time = time.time()
-        dt = current_time - last_time
-        last_time = current_time
+def _pack_particle_pool(pool, with_debris_fields):
+    """Copy the live part of a particle pool into flat arrays keyed by field"""
+    values = world_particle_values(pool)
+    packed = {name: np.array(values[name], dtype=np.float64) for name in EJECTA_POOL_FIELDS}
+    if with_debris_fields:
+        for name in ('color', 'initial_distance', 'absorption_delay', 'mass_factor', 'planet_type'):
+            packed[name] = values[name].copy() if name == 'planet_type' else values[name].astype(np.float64)
+        packed['absorption_effect'] = np.zeros(pool['count'], dtype=bool)
+    return packed
+
+def _load_particle_pool(pool, snapshot, prefix, fields):
+    """Refill a particle pool from the `prefix`_field arrays of a snapshot"""
+    clear_particle_pool(pool)
+    append_particles(pool, **{name: np.asarray(snapshot[f"{prefix}_{name}"]) for name in fields
+                              if f"{prefix}_{name}" in snapshot})
+
+def capture_snapshot():
+    """Capture the full simulation state as a flat dict of numpy arrays"""
+    trails, trail_lengths = _pack_trails(planets)
+    snapshot = {
+        'format_version': np.array(SNAPSHOT_FORMAT_VERSION),
+        'planet_name': np.array([p['name'] for p in planets], dtype='U16'),
+        'planet_mass': np.array([p['mass'] for p in planets], dtype=np.float64),
+        'planet_radius': np.array([p['radius'] for p in planets], dtype=np.float64),
+        'planet_color': np.array([p['color'] for p in planets], dtype=np.float64).reshape(len(planets), 3),
+        'planet_position': np.array([p['position'] for p in planets]).reshape(len(planets), 3),
+        'planet_velocity': np.array([p['velocity'] for p in planets]).reshape(len(planets), 3),
+        'planet_acceleration': np.array([p['acceleration'] for p in planets]).reshape(len(planets), 3),
+        'planet_captured': np.array([p['captured'] for p in planets], dtype=bool),
+        'planet_spaghettified': np.array([p['spaghettified'] for p in planets], dtype=bool),
+        'planet_logically_captured': np.array([p.get('logically_captured', False) for p in planets], dtype=bool),
+        'planet_spaghetti_factor': np.array([p['spaghetti_factor'] for p in planets], dtype=np.float64),
+        'planet_trail': trails,
+        'planet_trail_length': trail_lengths,
+        'engulfed_planets': np.array(engulfed_planets, dtype='U16'),
+        'flags': np.array([is_solar_system_active, sun_exists, is_black_hole_active, is_supernova_active,
+                           is_red_giant_active, keys_locked, spaceship_exists,
+                           camera_state['is_following_planet']], dtype=bool),
+        'sequence_stage': np.array(sequence_stage),
+        'selected_planet_index': np.array(selected_planet_index),
+        'camera_mode': np.array(camera_mode),
+        # Timers are stored relative to the capture time so a restore can rebase them
+        'timer_offsets': np.array([simulation_time - sequence_start_time,
+                                   simulation_time - red_giant_start_time,
+                                   current_time - supernova_start_time,
+                                   debris_generation_cooldown - current_time]),
+        'black_hole': np.array([black_hole_mass, black_hole_alpha, accretion_disk_rotation, current_sun_radius]),
+        'sun_position': sun_position.copy(),
+        'black_hole_position': black_hole_position.copy(),
+        'camera': np.array([camera_state['distance'], camera_state['azimuth'], camera_state['elevation']]),
+        'camera_target': np.array(camera_state['target'], dtype=np.float64),
+        'spaceship': np.array([spaceship_position, spaceship_velocity, spaceship_rotation], dtype=np.float64),
+        'fleet_position': fleet['position'].copy(),
+        'fleet_velocity': fleet['velocity'].copy(),
+        'fleet_rotation': fleet['rotation'].copy(),
+        'fleet_behaviour': fleet['behaviour'].copy(),
+        'fleet_autopilot': np.array(fleet_behaviour)
+    }
+    for key, value in _pack_particle_pool(live_debris_pool(), True).items():
+        snapshot['debris_' + key] = value
+    for key, value in _pack_particle_pool(supernova_pool, False).items():
+        snapshot['supernova_' + key] = value
+    for key, value in world_particle_values(minor_bodies).items():
+        snapshot['minor_' + key] = value.copy()
+    return snapshot
+
+def restore_snapshot(snapshot):
+    """Restore the full simulation state from a snapshot dict"""
+    global planets, engulfed_planets
+    global is_solar_system_active, sun_exists, is_black_hole_active, is_supernova_active
+    global is_red_giant_active, keys_locked, spaceship_exists, sequence_stage, selected_planet_index
+    global camera_mode, sequence_start_time, red_giant_start_time, supernova_start_time
+    global debris_generation_cooldown, black_hole_mass, black_hole_alpha, accretion_disk_rotation
+    global current_sun_radius, sun_position, black_hole_position
+    global spaceship_position, spaceship_velocity, spaceship_rotation, fleet, fleet_behaviour
+
+    version = int(snapshot['format_version'])
+    if version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {version}")
+
+    names = snapshot['planet_name']
+    positions = np.array(snapshot['planet_position'], dtype=np.float64)
+    velocities = np.array(snapshot['planet_velocity'], dtype=np.float64)
+    accelerations = np.array(snapshot['planet_acceleration'], dtype=np.float64)
+    colors = snapshot['planet_color']
+    trails = np.array(snapshot['planet_trail'], dtype=np.float64)
+    trail_lengths = snapshot['planet_trail_length']
+    planets = []
+    for i in range(len(names)):
+        planets.append({
+            'name': str(names[i]),
+            'mass': float(snapshot['planet_mass'][i]),
+            'radius': float(snapshot['planet_radius'][i]),
+            'position': positions[i],
+            'velocity': velocities[i],
+            'acceleration': accelerations[i],
+            'color': tuple(float(c) for c in colors[i]),
+            'orbital_trail': list(trails[i, :int(trail_lengths[i])]),
+            'captured': bool(snapshot['planet_captured'][i]),
+            'spaghettified': bool(snapshot['planet_spaghettified'][i]),
+            'logically_captured': bool(snapshot['planet_logically_captured'][i]),
+            'spaghetti_factor': float(snapshot['planet_spaghetti_factor'][i])
+        })
+    engulfed_planets = [str(name) for name in snapshot['engulfed_planets']]
+
+    _load_particle_pool(debris_pool, snapshot, 'debris', DEBRIS_POOL_FIELDS)
+    if debris_shards is not None:
+        clear_sharded_debris()
+        spawn_sharded_debris(world_particle_values(debris_pool))
+        clear_particle_pool(debris_pool)
+    _load_particle_pool(supernova_pool, snapshot, 'supernova', EJECTA_POOL_FIELDS)
+    _load_particle_pool(minor_bodies, snapshot, 'minor', MINOR_BODY_FIELDS)
+
+    flags = snapshot['flags']
+    (is_solar_system_active, sun_exists, is_black_hole_active, is_supernova_active,
+     is_red_giant_active, keys_locked, spaceship_exists, following) = (bool(f) for f in flags)
+    sequence_stage = int(snapshot['sequence_stage'])
+    selected_planet_index = int(snapshot['selected_planet_index'])
+    camera_mode = int(snapshot['camera_mode'])
+
+    offsets = snapshot['timer_offsets']
+    sequence_start_time = simulation_time - float(offsets[0])
+    red_giant_start_time = simulation_time - float(offsets[1])
+    supernova_start_time = current_time - float(offsets[2])
+    debris_generation_cooldown = current_time + float(offsets[3])
+
+    black_hole_mass, black_hole_alpha, accretion_disk_rotation, current_sun_radius = (
+        float(v) for v in snapshot['black_hole'])
+    sun_position = np.array(snapshot['sun_position'], dtype=np.float64)
+    black_hole_position = np.array(snapshot['black_hole_position'], dtype=np.float64)
+
+    camera_state['distance'], camera_state['azimuth'], camera_state['elevation'] = (
+        float(v) for v in snapshot['camera'])
+    camera_state['target'] = np.array(snapshot['camera_target'], dtype=np.float64)
+    camera_state['is_following_planet'] = following
+
+    ship = np.array(snapshot['spaceship'], dtype=np.float64)
+    spaceship_position, spaceship_velocity, spaceship_rotation = ship[0], ship[1], ship[2]
+    fleet = {
+        'position': np.array(snapshot['fleet_position'], dtype=np.float64).reshape(-1, 3),
+        'velocity': np.array(snapshot['fleet_velocity'], dtype=np.float64).reshape(-1, 3),
+        'rotation': np.array(snapshot['fleet_rotation'], dtype=np.float64).reshape(-1, 3),
+        'behaviour': np.array(snapshot['fleet_behaviour'], dtype=np.int8)
+    }
+    fleet_behaviour = int(snapshot['fleet_autopilot'])
+    rebuild_event_schedule()
+    if ephemeris is not None:
+        reattach_ephemeris()
+
+def save_snapshot(path, compress=False):
+    """Write the current state to an .npz file (uncompressed files can be memory-mapped on load)"""
+    snapshot = capture_snapshot()
+    if compress:
+        np.savez_compressed(path, **snapshot)
+    else:
+        np.savez(path, **snapshot)
+    return snapshot
+
+def _read_npz_member(handle, info, path, use_mmap):
+    """Read one stored .npy member of an .npz archive, memory-mapping it when large"""
+    handle.seek(info.header_offset)
+    local_header = struct.unpack('<4s5H3I2H', handle.read(30))
+    handle.seek(info.header_offset + 30 + local_header[9] + local_header[10])
+    version = np.lib.format.read_magic(handle)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+    count = int(np.prod(shape)) if shape else 1
+    order = 'F' if fortran_order else 'C'
+    if use_mmap and count * dtype.itemsize >= SNAPSHOT_MMAP_MIN_BYTES:
+        return np.memmap(path, dtype=dtype, mode='r', offset=handle.tell(), shape=shape, order=order)
+    data = np.frombuffer(handle.read(count * dtype.itemsize), dtype=dtype, count=count)
+    return data.reshape(shape, order=order)
+
+def load_snapshot_file(path, use_mmap=True):
+    """Load a snapshot .npz into a dict of arrays, memory-mapping large uncompressed members"""
+    snapshot = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as handle:
+        for info in archive.infolist():
+            key = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type == zipfile.ZIP_STORED:
+                snapshot[key] = _read_npz_member(handle, info, path, use_mmap)
+            else:
+                with archive.open(info) as member:
+                    snapshot[key] = np.lib.format.read_array(member)
+    return snapshot
+
+def push_ring_snapshot():
+    """Push the current state onto the in-memory rewind ring"""
+    global last_ring_snapshot_time
+    snapshot_ring.append(capture_snapshot())
+    last_ring_snapshot_time = current_time
+
+def rewind_simulation():
+    """Restore the most recent snapshot from the rewind ring"""
+    global last_ring_snapshot_time
+    if not snapshot_ring:
+        log_message("Rewind buffer is empty")
+        return False
+    start = time.perf_counter()
+    restore_snapshot(snapshot_ring.pop())
+    last_ring_snapshot_time = current_time
+    log_message(f"Rewound simulation ({len(snapshot_ring)} snapshots left, {(time.perf_counter() - start) * 1000.0:.2f} ms)")
+    return True
+
+def quicksave_simulation():
+    """Save the current state to the quicksave file"""
+    start = time.perf_counter()
+    save_snapshot(QUICKSAVE_PATH)
+    log_message(f"Snapshot saved to {QUICKSAVE_PATH} ({(time.perf_counter() - start) * 1000.0:.2f} ms)")
+
+def quickload_simulation():
+    """Restore the state stored in the quicksave file"""
+    try:
+        start = time.perf_counter()
+        restore_snapshot(load_snapshot_file(QUICKSAVE_PATH))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as error:
+        log_message(f"Could not load snapshot {QUICKSAVE_PATH}: {error}")
+        return
+    log_message(f"Snapshot restored from {QUICKSAVE_PATH} ({(time.perf_counter() - start) * 1000.0:.2f} ms)")
+
+# ============================================================================
+# TRAJECTORY RECORDER & TIMELINE REPLAY
+# (Append-Only Chunked Recording File, Background Writer, O(1) Seek Replay)
+# ============================================================================
+
+def _recorder_chunk_dtype(num_slots):
+    """Fixed-size record layout for one chunk of RECORDER_CHUNK_STEPS physics steps"""
+    steps = RECORDER_CHUNK_STEPS
+    frames = RECORDER_CHUNK_STEPS // RECORDER_DEBRIS_INTERVAL
+    capacity = RECORDER_DEBRIS_CAPACITY
+    return np.dtype([
+        ('step_count', np.int32),
+        ('time', np.float64, (steps,)),
+        ('scene', np.float64, (steps, 5)),
+        ('position', np.float64, (steps, num_slots, 3)),
+        ('velocity', np.float64, (steps, num_slots, 3)),
+        ('flags', np.uint8, (steps, num_slots)),
+        ('debris_count', np.int32, (frames,)),
+        ('debris_position', np.float32, (frames, capacity, 3)),
+        ('debris_color', np.float32, (frames, capacity, 3)),
+        ('debris_fade', np.float32, (frames, capacity)),
+        ('fleet_count', np.int32, (frames,)),
+        ('fleet_position', np.float32, (frames, RECORDER_FLEET_CAPACITY, 3)),
+        ('fleet_rotation', np.float32, (frames, RECORDER_FLEET_CAPACITY, 3)),
+        ('minor_count', np.int32, (frames,)),
+        ('minor_position', np.float32, (frames, RECORDER_MINOR_BODY_CAPACITY, 3)),
+        ('minor_group', np.uint8, (frames, RECORDER_MINOR_BODY_CAPACITY))
+    ])
+
+def _recorder_writer(handle, chunk_queue, free_buffers):
+    """Background thread: append finished chunks to the recording file"""
+    while True:
+        chunk = chunk_queue.get()
+        if chunk is None:
+            break
+        handle.write(chunk.tobytes())
+        handle.flush()
+        free_buffers.put(chunk)
+    handle.close()
+
+def _take_recorder_buffer():
+    """Get an empty chunk buffer from the free pool, allocating only when the writer is behind"""
+    try:
+        buffer = recorder_state['free_buffers'].get_nowait()
+    except queue.Empty:
+        buffer = np.zeros((), dtype=recorder_state['dtype'])
+    buffer['step_count'] = 0
+    return buffer
+
+def start_recording(path=RECORDER_PATH):
+    """Start streaming every physics step to an append-only recording file"""
+    global recorder_active, recorder_state
+    if recorder_active:
+        return
+    slots = [p['name'] for p in planets]
+    header = {
+        'version': RECORDER_FORMAT_VERSION,
+        'chunk_steps': RECORDER_CHUNK_STEPS,
+        'debris_interval': RECORDER_DEBRIS_INTERVAL,
+        'debris_capacity': RECORDER_DEBRIS_CAPACITY,
+        'fleet_capacity': RECORDER_FLEET_CAPACITY,
+        'minor_body_capacity': RECORDER_MINOR_BODY_CAPACITY,
+        'dt': DT,
+        'slots': slots,
+        'radius': [p['radius'] for p in planets],
+        'mass': [p['mass'] for p in planets],
+        'color': [list(p['color']) for p in planets]
+    }
+    header_bytes = RECORDER_MAGIC + json.dumps(header).encode('utf-8')
+    if len(header_bytes) > RECORDER_HEADER_SIZE:
+        raise ValueError("Recording header does not fit in RECORDER_HEADER_SIZE")
+    handle = open(path, 'wb')
+    handle.write(header_bytes.ljust(RECORDER_HEADER_SIZE, b'\0'))
+    chunk_queue = queue.Queue()
+    free_buffers = queue.Queue()
+    writer = threading.Thread(target=_recorder_writer, args=(handle, chunk_queue, free_buffers), daemon=True)
+    recorder_state = {
+        'path': path,
+        'slot_index': {name: i for i, name in enumerate(slots)},
+        'dtype': _recorder_chunk_dtype(len(slots)),
+        'queue': chunk_queue,
+        'free_buffers': free_buffers,
+        'thread': writer,
+        'time': 0.0,
+        'steps': 0
+    }
+    recorder_state['buffer'] = _take_recorder_buffer()
+    writer.start()
+    recorder_active = True
+    log_message(f"Recording trajectories to {path}")
+
+def _record_debris_frame(buffer, frame):
+    """Copy the current debris pool into one fixed-capacity debris frame"""
+    pool = live_debris_pool()
+    count = min(pool['count'], RECORDER_DEBRIS_CAPACITY)
+    buffer['debris_count'][frame] = count
+    buffer['debris_position'][frame, :count] = pool['position'][:count] + pool['origin']
+    buffer['debris_color'][frame, :count] = pool['color'][:count]
+    buffer['debris_fade'][frame, :count] = pool['age'][:count] / pool['lifetime'][:count]
+
+def _record_fleet_frame(buffer, frame):
+    """Copy the fleet ships' positions and rotations into one fixed-capacity fleet frame"""
+    count = min(len(fleet['position']), RECORDER_FLEET_CAPACITY)
+    buffer['fleet_count'][frame] = count
+    buffer['fleet_position'][frame, :count] = fleet['position'][:count]
+    buffer['fleet_rotation'][frame, :count] = fleet['rotation'][:count]
+
+def _record_minor_body_frame(buffer, frame):
+    """Copy the minor bodies, every k-th one past RECORDER_MINOR_BODY_CAPACITY, into one minor-body frame"""
+    total = minor_bodies['count']
+    stride = max(1, -(-total // RECORDER_MINOR_BODY_CAPACITY))
+    count = len(range(0, total, stride))
+    buffer['minor_count'][frame] = count
+    buffer['minor_position'][frame, :count] = minor_bodies['position'][:total:stride] + minor_bodies['origin']
+    buffer['minor_group'][frame, :count] = minor_bodies['group'][:total:stride]
+
+def record_physics_step(dt):
+    """Append the state after one physics step to the current chunk buffer"""
+    state = recorder_state
+    buffer = state['buffer']
+    row = int(buffer['step_count'])
+    state['time'] += dt
+    buffer['time'][row] = state['time']
+    buffer['scene'][row] = (sequence_stage, black_hole_alpha, black_hole_mass, current_sun_radius,
+                            sun_exists | (is_solar_system_active << 1) | (is_black_hole_active << 2)
+                            | (is_supernova_active << 3) | (is_red_giant_active << 4))
+    flags = buffer['flags'][row]
+    flags[:] = 0
+    slot_index = state['slot_index']
+    for planet in planets:
+        slot = slot_index.get(planet['name'])
+        if slot is None:
+            continue
+        buffer['position'][row, slot] = planet['position']
+        buffer['velocity'][row, slot] = planet['velocity']
+        flags[slot] = (RECORDER_FLAG_PRESENT
+                       | (RECORDER_FLAG_CAPTURED if planet['captured'] else 0)
+                       | (RECORDER_FLAG_SPAGHETTIFIED if planet['spaghettified'] else 0)
+                       | (RECORDER_FLAG_ENGULFED if planet['name'] in engulfed_planets else 0))
+    if row % RECORDER_DEBRIS_INTERVAL == 0:
+        _record_debris_frame(buffer, row // RECORDER_DEBRIS_INTERVAL)
+        _record_fleet_frame(buffer, row // RECORDER_DEBRIS_INTERVAL)
+        _record_minor_body_frame(buffer, row // RECORDER_DEBRIS_INTERVAL)
+    buffer['step_count'] = row + 1
+    state['steps'] += 1
+    if row + 1 == RECORDER_CHUNK_STEPS:
+        state['queue'].put(buffer)
+        state['buffer'] = _take_recorder_buffer()
+
+def stop_recording():
+    """Flush the partial chunk and wait for the writer thread to finish"""
+    global recorder_active
+    if not recorder_active:
+        return
+    recorder_active = False
+    state = recorder_state
+    if state['buffer']['step_count'] > 0:
+        state['queue'].put(state['buffer'])
+    state['queue'].put(None)
+    state['thread'].join()
+    log_message(f"Recording stopped: {state['steps']} steps written to {state['path']}")
+
+def open_recording(path=RECORDER_PATH):
+    """Memory-map a recording file and return its header and chunk array"""
+    with open(path, 'rb') as handle:
+        raw_header = handle.read(RECORDER_HEADER_SIZE)
+    if not raw_header.startswith(RECORDER_MAGIC):
+        raise ValueError(f"{path} is not a trajectory recording")
+    header = json.loads(raw_header[len(RECORDER_MAGIC):].rstrip(b'\0').decode('utf-8'))
+    if header['version'] != RECORDER_FORMAT_VERSION:
+        raise ValueError(f"Unsupported recording format version {header['version']}")
+    dtype = _recorder_chunk_dtype(len(header['slots']))
+    num_chunks = (os.path.getsize(path) - RECORDER_HEADER_SIZE) // dtype.itemsize
+    if num_chunks == 0:
+        raise ValueError(f"{path} contains no recorded steps")
+    chunks = np.memmap(path, dtype=dtype, mode='r', offset=RECORDER_HEADER_SIZE, shape=(num_chunks,))
+    total_steps = (num_chunks - 1) * header['chunk_steps'] + int(chunks[-1]['step_count'])
+    return header, chunks, total_steps
+
+def start_replay(path=RECORDER_PATH):
+    """Enter replay mode, stashing the live simulation so it resumes afterwards"""
+    global replay_active, replay_state
+    if recorder_active:
+        stop_recording()
+    try:
+        header, chunks, total_steps = open_recording(path)
+    except (OSError, ValueError) as error:
+        log_message(f"Could not open recording {path}: {error}")
+        return
+    replay_state = {
+        'header': header,
+        'chunks': chunks,
+        'total_steps': total_steps,
+        'times': chunks['time'].reshape(-1)[:total_steps].copy(),
+        'cursor': 0.0,
+        'speed': 1.0,
+        'paused': False,
+        'live_snapshot': capture_snapshot(),
+        'bodies': [
+            {
+                'name': name,
+                'mass': header['mass'][slot],
+                'radius': header['radius'][slot],
+                'position': np.zeros(3),
+                'velocity': np.zeros(3),
+                'acceleration': np.zeros(3),
+                'color': tuple(header['color'][slot]),
+                'orbital_trail': [],
+                'captured': False,
+                'spaghettified': False,
+                'spaghetti_factor': 1.0
+            }
+            for slot, name in enumerate(header['slots'])
+        ]
+    }
+    replay_active = True
+    apply_replay_step(0)
+    log_message(f"Replaying {path}: {total_steps} steps ({replay_state['times'][-1]:.1f} s)")
+
+def stop_replay():
+    """Leave replay mode and restore the live simulation"""
+    global replay_active
+    if not replay_active:
+        return
+    replay_active = False
+    restore_snapshot(replay_state['live_snapshot'])
+    log_message("Replay stopped, live simulation resumed")
+
+def apply_replay_step(step):
+    """Load recorded step `step` into the render state (O(1) seek)"""
+    global planets, engulfed_planets, fleet
+    global sequence_stage, black_hole_alpha, black_hole_mass, current_sun_radius
+    global sun_exists, is_solar_system_active, is_black_hole_active, is_supernova_active, is_red_giant_active
+
+    header = replay_state['header']
+    chunks = replay_state['chunks']
+    chunk_steps = header['chunk_steps']
+    step = max(0, min(replay_state['total_steps'] - 1, int(step)))
+    chunk = chunks[step // chunk_steps]
+    row = step % chunk_steps
+
+    stage, black_hole_alpha, black_hole_mass, current_sun_radius, scene_flags = chunk['scene'][row]
+    sequence_stage = int(stage)
+    scene_flags = int(scene_flags)
+    sun_exists = bool(scene_flags & 1)
+    is_solar_system_active = bool(scene_flags & 2)
+    is_black_hole_active = bool(scene_flags & 4)
+    is_supernova_active = bool(scene_flags & 8)
+    is_red_giant_active = bool(scene_flags & 16)
+
+    trail_steps = np.arange(max(0, step - ORBITAL_TRAIL_LENGTH + 1), step + 1)
+    trail_chunks = trail_steps // chunk_steps
+    trail_rows = trail_steps % chunk_steps
+    flags = chunk['flags'][row]
+    planets = []
+    engulfed_planets = []
+    for slot, body in enumerate(replay_state['bodies']):
+        if not flags[slot] & RECORDER_FLAG_PRESENT:
+            continue
+        body['position'][:] = chunk['position'][row, slot]
+        body['velocity'][:] = chunk['velocity'][row, slot]
+        body['captured'] = bool(flags[slot] & RECORDER_FLAG_CAPTURED)
+        body['spaghettified'] = bool(flags[slot] & RECORDER_FLAG_SPAGHETTIFIED)
+        body['orbital_trail'] = list(chunks['position'][trail_chunks, trail_rows, slot])
+        if flags[slot] & RECORDER_FLAG_ENGULFED:
+            engulfed_planets.append(body['name'])
+        planets.append(body)
+
+    frame = row // RECORDER_DEBRIS_INTERVAL
+    count = int(chunk['debris_count'][frame])
+    clear_particle_pool(debris_pool)
+    if debris_shards is not None:
+        clear_sharded_debris()
+    append_particles(debris_pool,
+                     position=chunk['debris_position'][frame, :count],
+                     color=chunk['debris_color'][frame, :count],
+                     age=chunk['debris_fade'][frame, :count],
+                     lifetime=np.ones(count))
+    clear_particle_pool(supernova_pool)
+
+    ships = int(chunk['fleet_count'][frame])
+    fleet = {
+        'position': chunk['fleet_position'][frame, :ships].astype(np.float64),
+        'velocity': np.zeros((ships, 3)),
+        'rotation': chunk['fleet_rotation'][frame, :ships].astype(np.float64),
+        'behaviour': np.zeros(ships, dtype=np.int8)
+    }
+    bodies = int(chunk['minor_count'][frame])
+    clear_particle_pool(minor_bodies)
+    append_particles(minor_bodies,
+                     position=chunk['minor_position'][frame, :bodies],
+                     group=chunk['minor_group'][frame, :bodies],
+                     parent=np.full(bodies, -1))
+    replay_state['step'] = step
+    replay_state['time'] = float(chunk['time'][row])
+
+def advance_replay(frame_dt):
+    """Advance the replay cursor by wall-clock time and apply the step it lands on"""
+    if not replay_state['paused']:
+        replay_state['cursor'] += frame_dt / replay_state['header']['dt'] * replay_state['speed']
+        replay_state['cursor'] = min(replay_state['cursor'], replay_state['total_steps'] - 1)
+    apply_replay_step(replay_state['cursor'])
+
+def scrub_replay(seconds):
+    """Jump the replay cursor forwards or backwards by `seconds` of recorded time"""
+    times = replay_state['times']
+    target = int(np.searchsorted(times, replay_state['time'] + seconds))
+    replay_state['cursor'] = float(max(0, min(replay_state['total_steps'] - 1, target)))
+    apply_replay_step(replay_state['cursor'])
+
+def toggle_recording():
+    """Start or stop the trajectory recorder"""
+    if recorder_active:
+        stop_recording()
+    else:
+        start_recording()
+
+def toggle_replay():
+    """Enter or leave replay of the last recording"""
+    if replay_active:
+        stop_replay()
+    else:
+        start_replay()
+
+# ============================================================================
+# PARAMETER SWEEP ENGINE
+# (Headless Runs, Process-Pool Fan-Out, Streaming & Resumable Results Table)
+# ============================================================================
+
+def _planet_energy_terms(planet):
+    """Kinetic and potential energy of a planet in the currently active gravity field"""
+    speed = np.linalg.norm(planet['velocity'])
+    kinetic = 0.5 * planet['mass'] * speed * speed
+    potential = 0.0
+    if sequence_stage >= 1:
+        r = np.linalg.norm(planet['position'] - sun_position)
+        if r > 0:
+            potential -= G * black_hole_mass * planet['mass'] / r
+    else:
+        if is_solar_system_active and sun_exists:
+            r = np.linalg.norm(planet['position'] - sun_position)
+            if r > 0:
+                potential -= G * SUN_MASS * planet['mass'] / r
+        if is_black_hole_active:
+            r = np.linalg.norm(planet['position'] - black_hole_position)
+            if r > 0:
+                potential -= G * black_hole_mass * planet['mass'] / r
+    return kinetic, potential
+
+def relative_energy_drift(start_energy, end_energy, energy_scale):
+    """Energy change divided by the summed magnitudes of the starting energy terms.
+
+    The total energy of a bound system can sit arbitrarily close to zero, so it
+    makes a poor denominator; sum(|KE_i|) + sum(|PE_i|) only vanishes when
+    every body is at rest at infinity. Works on scalars and per-member arrays.
+    """
+    energy_scale = np.asarray(energy_scale, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drift = np.where(energy_scale > 0, (np.asarray(end_energy) - start_energy) / energy_scale, 0.0)
+    return drift if drift.ndim else float(drift)
+
+def _apply_parameter_overrides(params):
+    """Override module-level constants/variables by name, returning the previous values"""
+    previous = {}
+    for name, value in params.items():
+        current = globals().get(name)
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            raise KeyError(f"{name} is not a numeric simulation parameter")
+        previous[name] = current
+        globals()[name] = type(current)(value)
+    return previous
+
+def sweep_metric_columns():
+    """Column names of the per-run summary metrics"""
+    columns = []
+    for name, *_ in PLANET_DATA:
+        columns.append(f"capture_time_{name}")
+        columns.append(f"engulf_time_{name}")
+    return columns + ['captured_count', 'engulfed_count', 'debris_final', 'debris_peak', 'energy_drift', 'wall_time']
+
+def run_headless_simulation(params=None, seed=0, duration=SWEEP_DEFAULT_DURATION, scenario='black_hole'):
+    """Run one simulation without a window and return its summary metrics"""
+    global current_time, last_time
+    if scenario not in SWEEP_SCENARIOS:
+        raise ValueError(f"Unknown scenario {scenario!r}, expected one of {SWEEP_SCENARIOS}")
+    random.seed(seed)
+    np.random.seed(seed % (2 ** 32))
+    wall_start = time.perf_counter()
+    current_time = 0.0
+    last_time = 0.0
+    reset_simulation()
+    previous = _apply_parameter_overrides(params or {})
+    try:
+        if scenario == 'black_hole':
+            trigger_black_hole_sequence()
+        elif scenario == 'red_giant':
+            trigger_red_giant_sequence()
+        elif scenario == 'collision':
+            setup_collision_rebound_preset()
+
+        names = [p['name'] for p in planets]
+        initial_energy = {p['name']: _planet_energy_terms(p) for p in planets}
+        capture_times = {}
+        engulf_times = {}
+        debris_peak = 0
+
+        for step in range(int(round(duration / DT))):
+            current_time += DT
+            update_physics(DT)
+            handle_sequences(DT)
+            sim_time = (step + 1) * DT
+            active = {p['name'] for p in planets if not p['captured']}
+            for name in names:
+                if name not in active and name not in capture_times:
+                    capture_times[name] = sim_time
+            for name in engulfed_planets:
+                engulf_times.setdefault(name, sim_time)
+            debris_peak = max(debris_peak, debris_particle_count())
+
+        survivors = [p for p in planets if not p['captured']]
+        start_energy = sum(sum(initial_energy[p['name']]) for p in survivors)
+        energy_scale = sum(abs(kinetic) + abs(potential) for kinetic, potential in
+                           (initial_energy[p['name']] for p in survivors))
+        end_energy = sum(sum(_planet_energy_terms(p)) for p in survivors)
+        energy_drift = relative_energy_drift(start_energy, end_energy, energy_scale)
+    finally:
+        _apply_parameter_overrides(previous)
+
+    metrics = {}
+    for name, *_ in PLANET_DATA:
+        metrics[f"capture_time_{name}"] = capture_times.get(name, float('nan'))
+        metrics[f"engulf_time_{name}"] = engulf_times.get(name, float('nan'))
+    metrics['captured_count'] = len(capture_times)
+    metrics['engulfed_count'] = len(engulf_times)
+    metrics['debris_final'] = debris_particle_count()
+    metrics['debris_peak'] = debris_peak
+    metrics['energy_drift'] = energy_drift
+    metrics['wall_time'] = time.perf_counter() - wall_start
+    return metrics
+
+def _sweep_worker(task):
+    """Process-pool entry point: run one sweep task with console output silenced"""
+    run_id, params, seed, duration, scenario = task
+    previous_sinks = set_log_sinks([])
+    try:
+        metrics = run_headless_simulation(params, seed, duration, scenario)
+    finally:
+        set_log_sinks(previous_sinks)
+    return run_id, params, seed, metrics
+
+def _sweep_run_id(params, seed, duration, scenario):
+    """Stable identifier of a sweep run, used to skip finished runs when resuming"""
+    key = json.dumps({'params': params, 'seed': seed, 'duration': duration, 'scenario': scenario}, sort_keys=True)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def build_parameter_grid(axes):
+    """Expand {name: [values]} into the full cartesian list of parameter sets"""
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+def sample_parameter_space(ranges, count, seed=0):
+    """Draw `count` uniform random parameter sets from {name: (low, high)}"""
+    rng = np.random.default_rng(seed)
+    names = sorted(ranges)
+    return [{name: float(rng.uniform(*ranges[name])) for name in names} for _ in range(count)]
+
+def run_parameter_sweep(parameter_sets, results_path=SWEEP_RESULTS_PATH, duration=SWEEP_DEFAULT_DURATION,
+                        scenario='black_hole', base_seed=0, workers=None):
+    """Run headless simulations for every parameter set across a process pool.
+
+    Rows are appended to `results_path` as runs finish, so an interrupted sweep
+    resumes by skipping the run ids already present in the table.
+    """
+    param_names = sorted({name for params in parameter_sets for name in params})
+    columns = ['run_id', 'seed', 'scenario', 'duration'] + param_names + sweep_metric_columns()
+
+    tasks = []
+    for index, params in enumerate(parameter_sets):
+        seed = int(np.random.SeedSequence([base_seed, index]).generate_state(1)[0])
+        tasks.append((_sweep_run_id(params, seed, duration, scenario), params, seed, duration, scenario))
+
+    finished = set()
+    write_header = not (os.path.exists(results_path) and os.path.getsize(results_path) > 0)
+    if not write_header:
+        with open(results_path, newline='') as handle:
+            reader = csv.DictReader(handle)
+            if reader.fieldnames != columns:
+                raise ValueError(f"{results_path} was written by a sweep with different columns")
+            finished = {row['run_id'] for row in reader}
+    pending = [task for task in tasks if task[0] not in finished]
+    log_message("Sweep: {} runs, {} already done, {} to run", len(tasks), len(tasks) - len(pending), len(pending))
+
+    with open(results_path, 'a', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+            handle.flush()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_sweep_worker, task) for task in pending]
+            for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                try:
+                    run_id, params, seed, metrics = future.result()
+                except Exception as error:
+                    log_message("Sweep run failed: {}", error)
+                    continue
+                row = {'run_id': run_id, 'seed': seed, 'scenario': scenario, 'duration': duration}
+                row.update(params)
+                row.update(metrics)
+                writer.writerow(row)
+                handle.flush()
+                log_message("Sweep progress: {}/{} runs", completed, len(pending), key='sweep_progress')
+    return results_path
+
+def run_sweep_from_spec(spec_path, workers=None):
+    """Run a sweep described by a JSON spec file.
+
+    The spec holds either "grid": {name: [values]} or "random": {name: [low, high]}
+    with "samples", plus optional "duration", "scenario", "seed" and "results".
+    With "ensemble": true the runs are batched into one vectorized ensemble,
+    optionally with "angle_jitter" in degrees.
+    """
+    with open(spec_path) as handle:
+        spec = json.load(handle)
+    if 'grid' in spec:
+        parameter_sets = build_parameter_grid(spec['grid'])
+    elif 'random' in spec:
+        parameter_sets = sample_parameter_space(spec['random'], spec['samples'], spec.get('seed', 0))
+    else:
+        raise ValueError("Sweep spec needs a 'grid' or a 'random' section")
+    if spec.get('ensemble', False):
+        return run_ensemble_sweep(parameter_sets,
+                                  results_path=spec.get('results', SWEEP_RESULTS_PATH),
+                                  duration=spec.get('duration', SWEEP_DEFAULT_DURATION),
+                                  scenario=spec.get('scenario', 'black_hole'),
+                                  angle_jitter=spec.get('angle_jitter', 0.0),
+                                  base_seed=spec.get('seed', 0))
+    return run_parameter_sweep(parameter_sets,
+                               results_path=spec.get('results', SWEEP_RESULTS_PATH),
+                               duration=spec.get('duration', SWEEP_DEFAULT_DURATION),
+                               scenario=spec.get('scenario', 'black_hole'),
+                               base_seed=spec.get('seed', 0),
+                               workers=workers)
+
+# ============================================================================
+# BATCHED ENSEMBLE INTEGRATION
+# (M Independent Universes Advanced as M x N x 3 Arrays in One Step)
+# ============================================================================
+
+def create_ensemble(members, scenario='black_hole', black_hole_masses=None, capture_multipliers=None,
+                    angle_jitter=0.0, seed=0):
+    """Build M copies of the PLANET_DATA system as stacked arrays.
+
+    black_hole_masses and capture_multipliers are scalars or per-member arrays;
+    angle_jitter perturbs every initial angle from PLANET_DATA by a normal
+    offset with that standard deviation in degrees.
+    """
+    if scenario not in ('solar_system', 'black_hole'):
+        raise ValueError("Ensembles support the 'solar_system' and 'black_hole' scenarios")
+    rng = np.random.default_rng(seed)
+    orbit = np.array([row[3] for row in PLANET_DATA])
+    angles = np.radians(np.array([row[5] for row in PLANET_DATA]) + rng.normal(0.0, angle_jitter, (members, len(PLANET_DATA))))
+    position = np.zeros((members, len(PLANET_DATA), 3))
+    position[..., 0] = orbit * np.cos(angles)
+    position[..., 1] = orbit * np.sin(angles)
+    orbital_speed = np.sqrt(G * SUN_MASS / orbit)
+    velocity = np.zeros_like(position)
+    velocity[..., 0] = -orbital_speed * np.sin(angles)
+    velocity[..., 1] = orbital_speed * np.cos(angles)
+    shape = (members, len(PLANET_DATA))
+    ensemble = {
+        'scenario': scenario,
+        'time': 0.0,
+        'names': [row[0] for row in PLANET_DATA],
+        'mass': np.array([row[1] for row in PLANET_DATA]),
+        'radius': np.array([row[2] for row in PLANET_DATA]),
+        'position': position,
+        'velocity': velocity,
+        'acceleration': np.zeros_like(position),
+        'black_hole_mass': np.broadcast_to(np.asarray(BLACK_HOLE_MASS if black_hole_masses is None else black_hole_masses,
+                                                      dtype=np.float64), (members,)).copy(),
+        'capture_multiplier': np.broadcast_to(np.asarray(LOGICAL_CAPTURE_RADIUS_MULTIPLIER if capture_multipliers is None
+                                                         else capture_multipliers, dtype=np.float64), (members,)).copy(),
+        'active': np.ones(shape, dtype=bool),
+        'logically_captured': np.zeros(shape, dtype=bool),
+        'spaghettified': np.zeros(shape, dtype=bool),
+        'spaghetti_factor': np.ones(shape),
+        'capture_time': np.full(shape, np.nan),
+        'debris_cooldown': np.zeros(members),
+        'debris_count': np.zeros(members, dtype=np.int64),
+        'debris_yield': np.array([np.prod(calculate_debris_layout(*row[:3])) for row in PLANET_DATA])
+    }
+    ensemble['initial_energy'] = np.stack(_ensemble_energy_terms(ensemble))
+    return ensemble
+
+def _ensemble_attractor_mass(ensemble):
+    """Per-member mass of the central attractor, shaped (M, 1, 1)"""
+    if ensemble['scenario'] == 'black_hole':
+        return ensemble['black_hole_mass'][:, None, None]
+    return np.full((len(ensemble['black_hole_mass']), 1, 1), SUN_MASS)
+
+def _ensemble_acceleration(attractor_mass, position):
+    """Central-body gravity for every body of every member (matches calculate_gravitational_acceleration)"""
+    r_vec = sun_position - position
+    r_mag = np.sqrt(np.einsum('...i,...i->...', r_vec, r_vec))[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acceleration = np.where(r_mag > 0, G * attractor_mass * r_vec / r_mag ** 3, 0.0)
+    return acceleration
+
+def _ensemble_drift_kick_kernel(chunk, start, stop, ensemble, attractor_mass, dt):
+    """Velocity Verlet drift and kick for ensemble members [start, stop), in place"""
+    position = ensemble['position'][start:stop]
+    velocity = ensemble['velocity'][start:stop]
+    acceleration = ensemble['acceleration'][start:stop]
+    new_position = position + velocity * dt + 0.5 * acceleration * (dt * dt)
+    new_acceleration = _ensemble_acceleration(attractor_mass[start:stop], new_position)
+    new_velocity = velocity + 0.5 * (acceleration + new_acceleration) * dt
+    mask = ensemble['active'][start:stop, :, None]
+    np.copyto(position, new_position, where=mask)
+    np.copyto(velocity, new_velocity, where=mask)
+    np.copyto(acceleration, new_acceleration, where=mask)
+
+def _ensemble_energy_terms(ensemble):
+    """Per-body kinetic and potential energy in the central field, each shaped (M, N)"""
+    r_vec = ensemble['position'] - sun_position
+    r_mag = np.sqrt(np.einsum('...i,...i->...', r_vec, r_vec))
+    speed_sq = np.einsum('...i,...i->...', ensemble['velocity'], ensemble['velocity'])
+    with np.errstate(divide='ignore'):
+        potential = np.where(r_mag > 0, -G * _ensemble_attractor_mass(ensemble)[..., 0] * ensemble['mass'] / r_mag, 0.0)
+    return 0.5 * ensemble['mass'] * speed_sq, potential
+
+def step_ensemble(ensemble, dt=DT):
+    """Advance every member of the ensemble by one Velocity Verlet step.
+
+    Event handling follows update_physics(): the debris cooldown ticks down,
+    active bodies are integrated, then black-hole interactions run and
+    captures are resolved in planet order with the capture_planet() cooldown
+    rules. Planet-planet collisions are not modelled in ensembles.
+    """
+    ensemble['time'] += dt
+    cooldown = ensemble['debris_cooldown']
+    np.subtract(cooldown, dt, out=cooldown, where=cooldown > 0)
+
+    active = ensemble['active']
+    position = ensemble['position']
+    velocity = ensemble['velocity']
+    run_chunked(_ensemble_drift_kick_kernel, active.shape[0], ensemble, _ensemble_attractor_mass(ensemble), dt,
+                chunk_size=max(1, PARALLEL_CHUNK_SIZE // active.shape[1]))
+    mask = active[..., None]
+
+    if ensemble['scenario'] != 'black_hole':
+        return
+
+    members = np.arange(active.shape[0])
+    live_velocity = velocity.copy()
+    zone = black_hole_interaction_kernel(position, live_velocity, ensemble['logically_captured'],
+                                         ensemble['spaghettified'], ensemble['spaghetti_factor'],
+                                         black_hole_position, ensemble['black_hole_mass'][:, None],
+                                         ensemble['capture_multiplier'][:, None])
+    np.copyto(velocity, live_velocity, where=mask)
+    captured = (zone == BLACK_HOLE_ZONE_HORIZON) & active
+    if not captured.any():
+        return
+    active &= ~captured
+    ensemble['capture_time'][captured] = ensemble['time']
+
+    # Only the first capture of a step can spawn debris: it restarts the cooldown
+    first = np.argmax(captured, axis=1)
+    emits = captured[members, first] & (ensemble['time'] >= cooldown)
+    ensemble['debris_count'] += np.where(emits, ensemble['debris_yield'][first], 0)
+    cooldown[emits] = ensemble['time'] + 0.5
+
+def run_ensemble(ensemble, duration, dt=DT):
+    """Advance an ensemble for `duration` simulated seconds and return it"""
+    for _ in range(int(round(duration / dt))):
+        step_ensemble(ensemble, dt)
+        if not ensemble['active'].any():
+            break
+    return ensemble
+
+def ensemble_summary(ensemble):
+    """Per-member summary metrics, one dict per member"""
+    survivors = ensemble['active']
+    kinetic, potential = ensemble['initial_energy']
+    start_energy = np.where(survivors, kinetic + potential, 0.0).sum(axis=1)
+    energy_scale = np.where(survivors, np.abs(kinetic) + np.abs(potential), 0.0).sum(axis=1)
+    end_energy = np.where(survivors, sum(_ensemble_energy_terms(ensemble)), 0.0).sum(axis=1)
+    drift = relative_energy_drift(start_energy, end_energy, energy_scale)
+    rows = []
+    for member in range(len(drift)):
+        row = {f"capture_time_{name}": float(ensemble['capture_time'][member, i])
+               for i, name in enumerate(ensemble['names'])}
+        row['captured_count'] = int((~survivors[member]).sum())
+        row['debris_spawned'] = int(ensemble['debris_count'][member])
+        row['energy_drift'] = float(drift[member])
+        rows.append(row)
+    return rows
+
+def ensemble_metric_columns():
+    """Column names of the per-member ensemble summary metrics, in ensemble_summary() order"""
+    return [f"capture_time_{name}" for name, *_ in PLANET_DATA] + ['captured_count', 'debris_spawned', 'energy_drift']
+
+def run_ensemble_sweep(parameter_sets, results_path=SWEEP_RESULTS_PATH, duration=SWEEP_DEFAULT_DURATION,
+                       scenario='black_hole', angle_jitter=0.0, base_seed=0):
+    """Run every parameter set as one member of a single ensemble and append the results table.
+
+    Like run_parameter_sweep(), an existing table is never truncated: members
+    whose run id is already present are skipped. The jitter of a member depends
+    on its index, so the whole ensemble is still integrated whenever any member
+    is missing.
+    """
+    unsupported = {name for params in parameter_sets for name in params} - set(ENSEMBLE_PARAMETERS)
+    if unsupported:
+        raise KeyError(f"Ensemble sweeps only vary {ENSEMBLE_PARAMETERS}, got {sorted(unsupported)}")
+    param_names = sorted({name for params in parameter_sets for name in params})
+    columns = ['run_id', 'member', 'scenario', 'duration'] + param_names + ensemble_metric_columns()
+    run_ids = [_sweep_run_id(params, [base_seed, member, angle_jitter], duration, scenario)
+               for member, params in enumerate(parameter_sets)]
+
+    finished = set()
+    write_header = not (os.path.exists(results_path) and os.path.getsize(results_path) > 0)
+    if not write_header:
+        with open(results_path, newline='') as handle:
+            reader = csv.DictReader(handle)
+            if reader.fieldnames != columns:
+                raise ValueError(f"{results_path} was written by a sweep with different columns")
+            finished = {row['run_id'] for row in reader}
+    pending = [member for member, run_id in enumerate(run_ids) if run_id not in finished]
+    log_message("Ensemble sweep: {} members, {} already done, {} to run",
+                len(run_ids), len(run_ids) - len(pending), len(pending))
+    if not pending:
+        return results_path
+
+    wall_start = time.perf_counter()
+    ensemble = create_ensemble(
+        len(parameter_sets), scenario,
+        black_hole_masses=[params.get('black_hole_mass', BLACK_HOLE_MASS) for params in parameter_sets],
+        capture_multipliers=[params.get('LOGICAL_CAPTURE_RADIUS_MULTIPLIER', LOGICAL_CAPTURE_RADIUS_MULTIPLIER)
+                             for params in parameter_sets],
+        angle_jitter=angle_jitter, seed=base_seed)
+    run_ensemble(ensemble, duration)
+    rows = ensemble_summary(ensemble)
+    with open(results_path, 'a', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+        for member in pending:
+            writer.writerow({'run_id': run_ids[member], 'member': member, 'scenario': scenario,
+                             'duration': duration, **parameter_sets[member], **rows[member]})
+    log_message(f"Ensemble sweep: {len(pending)} members in {time.perf_counter() - wall_start:.2f} s")
+    return results_path
+
+# ============================================================================
+# FLEET SIMULATION
+# (N Star Destroyers as Arrays, Batched Dynamics & Autopilot, Instanced Hull)
+# ============================================================================
+
+def spawn_fleet_squadron(count=FLEET_SQUADRON_SIZE):
+    """Add `count` ships in a loose shell around the selected planet"""
+    global fleet
+    if not planets:
+        return
+    idx = max(0, min(len(planets) - 1, selected_planet_index))
+    planet = planets[idx]
+    direction = np.random.normal(size=(count, 3))
+    direction /= np.sqrt(np.einsum('ij,ij->i', direction, direction))[:, None]
+    distance = planet['radius'] * 3.0 + 20.0 + np.random.uniform(0.0, 60.0, count)
+    position = planet['position'] + direction * distance[:, None]
+    yaw = np.degrees(np.arctan2(direction[:, 0], -direction[:, 1]))
+    rotation = np.zeros((count, 3))
+    rotation[:, 1] = yaw
+    fleet = {
+        'position': np.concatenate([fleet['position'], position]),
+        'velocity': np.concatenate([fleet['velocity'], np.zeros((count, 3))]),
+        'rotation': np.concatenate([fleet['rotation'], rotation]),
+        'behaviour': np.concatenate([fleet['behaviour'], np.full(count, fleet_behaviour, dtype=np.int8)])
+    }
+    log_message(f"Fleet squadron of {count} ships spawned near {planet['name']} ({len(fleet['position'])} ships total)")
+
+def clear_fleet():
+    """Remove every fleet ship"""
+    global fleet
+    fleet = {
+        'position': np.zeros((0, 3)),
+        'velocity': np.zeros((0, 3)),
+        'rotation': np.zeros((0, 3)),
+        'behaviour': np.zeros(0, dtype=np.int8)
+    }
+
+def cycle_fleet_behaviour():
+    """Switch the whole fleet to the next autopilot behaviour"""
+    global fleet_behaviour
+    fleet_behaviour = (fleet_behaviour + 1) % len(FLEET_BEHAVIOUR_NAMES)
+    fleet['behaviour'][:] = fleet_behaviour
+    log_message(f"Fleet autopilot: {FLEET_BEHAVIOUR_NAMES[fleet_behaviour]}")
+
+def fleet_attractor():
+    """Position and mass the orbit autopilot circles, or None when nothing is there"""
+    if is_black_hole_active:
+        return black_hole_position, black_hole_mass
+    if sun_exists:
+        return sun_position, SUN_MASS
+    return None
+
+def update_fleet_autopilot(dt):
+    """Steer orbiting ships towards circular velocity and push fleeing ships away from the black hole"""
+    position = fleet['position']
+    velocity = fleet['velocity']
+    behaviour = fleet['behaviour']
+    max_delta_v = FLEET_AUTOPILOT_ACCELERATION * dt
+
+    orbiting = behaviour == FLEET_BEHAVIOUR_ORBIT
+    attractor = fleet_attractor()
+    if orbiting.any() and attractor is not None:
+        centre, mass = attractor
+        r_vec = position[orbiting] - centre
+        r = np.sqrt(np.einsum('ij,ij->i', r_vec, r_vec))
+        tangent = np.cross(np.array([0.0, 0.0, 1.0]), r_vec)
+        tangent_mag = np.sqrt(np.einsum('ij,ij->i', tangent, tangent))
+        tangent = np.where((tangent_mag > 1e-9)[:, None], tangent / np.maximum(tangent_mag, 1e-9)[:, None],
+                           np.array([1.0, 0.0, 0.0]))
+        speed = np.minimum(np.sqrt(G * mass / np.maximum(r, 1.0)) * FLEET_ORBIT_SPEED_FRACTION, spaceship_max_speed)
+        steer = tangent * speed[:, None] - velocity[orbiting]
+        steer_mag = np.sqrt(np.einsum('ij,ij->i', steer, steer))
+        scale = np.minimum(1.0, max_delta_v / np.maximum(steer_mag, 1e-9))
+        velocity[orbiting] += steer * scale[:, None]
+
+    fleeing = behaviour == FLEET_BEHAVIOUR_FLEE
+    if fleeing.any() and is_black_hole_active:
+        away = position[fleeing] - black_hole_position
+        distance = np.sqrt(np.einsum('ij,ij->i', away, away))
+        threatened = distance < BLACK_HOLE_VISUAL_RADIUS * FLEET_FLEE_RADIUS_MULTIPLIER
+        away = np.where((distance > 0)[:, None], away / np.maximum(distance, 1e-9)[:, None], np.array([1.0, 0.0, 0.0]))
+        velocity[fleeing] += away * (max_delta_v * threatened)[:, None]
+
+def update_fleet(dt):
+    """Advance every fleet ship: autopilot, then the shared ship dynamics, then face the direction of travel"""
+    if not len(fleet['position']):
+        return
+    update_fleet_autopilot(dt)
+    fleet['position'] = apply_ship_dynamics(fleet['position'], fleet['velocity'], dt)
+
+    velocity = fleet['velocity']
+    horizontal = np.hypot(velocity[:, 0], velocity[:, 1])
+    moving = np.hypot(horizontal, velocity[:, 2]) > 1.0
+    rotation = fleet['rotation']
+    rotation[moving, 0] = np.degrees(np.arctan2(velocity[moving, 2], horizontal[moving]))
+    rotation[moving, 1] = np.degrees(np.arctan2(velocity[moving, 1], velocity[moving, 0]))
+
+def fleet_model_matrices():
+    """Per-ship model matrices (translate, yaw, pitch, roll, scale) as column-major (N, 16) float32 rows"""
+    position = fleet['position']
+    pitch, yaw, roll = np.radians(fleet['rotation']).T
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cr, sr = np.cos(roll), np.sin(roll)
+
+    # Same order as draw_star_destroyer: Rz(yaw) * Ry(pitch) * Rx(roll)
+    basis = np.empty((len(position), 3, 3))
+    basis[:, 0, 0] = cy * cp
+    basis[:, 0, 1] = cy * sp * sr - sy * cr
+    basis[:, 0, 2] = cy * sp * cr + sy * sr
+    basis[:, 1, 0] = sy * cp
+    basis[:, 1, 1] = sy * sp * sr + cy * cr
+    basis[:, 1, 2] = sy * sp * cr - cy * sr
+    basis[:, 2, 0] = -sp
+    basis[:, 2, 1] = cp * sr
+    basis[:, 2, 2] = cp * cr
+
+    matrices = np.zeros((len(position), 4, 4), dtype=np.float32)
+    matrices[:, :3, :3] = np.transpose(basis, (0, 2, 1)) * spaceship_scale
+    matrices[:, 3, :3] = position
+    matrices[:, 3, 3] = 1.0
+    return matrices.reshape(-1, 16)
+
+def draw_fleet():
+    """Draw every fleet ship by instancing the cached hull display list"""
+    if not len(fleet['position']):
+        return
+    hull = get_star_destroyer_display_list()
+    for matrix in fleet_model_matrices():
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        glCallList(hull)
+        glPopMatrix()
+
+# ============================================================================
+# EVENT SCHEDULER
+# (Heap of Timed Events on the Simulation Clock, Predicted Engulf Checks)
+# ============================================================================
+
+def schedule_event(when, kind, payload=None):
+    """Push an event due at simulation time `when` and return its id"""
+    event_id = next(event_sequence)
+    heapq.heappush(event_queue, (when, event_id, kind, payload))
+    return event_id
+
+def clear_scheduled_events():
+    """Drop every pending event and engulf prediction"""
+    event_queue.clear()
+    engulf_predictions.clear()
+
+def process_due_events():
+    """Fire every event whose time has come, in time order"""
+    while event_queue and event_queue[0][0] <= simulation_time:
+        _, event_id, kind, payload = heapq.heappop(event_queue)
+        fire_scheduled_event(kind, payload, event_id)
+
+def fire_scheduled_event(kind, payload, event_id):
+    """Apply one scheduled sequence transition or engulf check"""
+    global sun_exists, sequence_stage, is_supernova_active, black_hole_alpha
+    global is_red_giant_active, is_solar_system_active
+
+    if kind == SCHEDULED_SUPERNOVA_START:
+        if not supernova_pool['count']:
+            create_supernova_explosion()
+            sun_exists = False
+
+    elif kind == SCHEDULED_SUPERNOVA_END:
+        sequence_stage = 2
+        is_supernova_active = False
+
+    elif kind == SCHEDULED_BLACK_HOLE_VISIBLE:
+        sequence_stage = 3
+        black_hole_alpha = 1.0
+
+    elif kind == SCHEDULED_RED_GIANT_COMPLETE:
+        log_message("Red giant phase complete - transitioning to supernova!", key='red_giant_progress')
+        engulf_predictions.clear()
+        is_red_giant_active = False
+        is_solar_system_active = False
+        sun_exists = False
+        is_supernova_active = True
+        create_supernova_explosion()
+
+    elif kind == SCHEDULED_ENGULF_CHECK:
+        prediction = engulf_predictions.get(payload)
+        if prediction is None or prediction[1] != event_id:
+            return
+        del engulf_predictions[payload]
+        planet = next((p for p in planets if p['name'] == payload), None)
+        if planet is None or planet['captured'] or payload in engulfed_planets:
+            return
+        if np.linalg.norm(planet['position'] - sun_position) <= current_sun_radius:
+            engulfed_planets.append(payload)
+            log_message(f"{payload} has been engulfed by the red giant!")
+        else:
+            schedule_engulf_check(planet)
+
+def red_giant_radius_at(when):
+    """Radius of the expanding red giant at simulation time `when`"""
+    elapsed = min(max(when - red_giant_start_time, 0.0), RED_GIANT_DURATION)
+    return SUN_INITIAL_RADIUS + RED_GIANT_EXPANSION_RATE * elapsed
+
+def predict_engulf_time(planet):
+    """Simulation time at which the red giant's surface reaches a planet, assuming linear radial motion"""
+    offset = planet['position'] - sun_position
+    distance = np.linalg.norm(offset)
+    radius = red_giant_radius_at(simulation_time)
+    if distance <= radius:
+        return simulation_time
+    radial_speed = np.dot(planet['velocity'], offset) / distance
+    closing_speed = RED_GIANT_EXPANSION_RATE - radial_speed
+    if closing_speed <= 0.0:
+        return math.inf
+    return simulation_time + (distance - radius) / closing_speed
+
+def schedule_engulf_check(planet):
+    """(Re)schedule a planet's engulf check at its predicted time, or a checkpoint on the way there.
+
+    Far-off predictions get a checkpoint halfway to the predicted time (at most
+    ENGULF_PREDICTION_HORIZON ahead) that re-predicts from the body's current
+    motion, so curved orbits converge on the true crossing. Checks past the end
+    of the expansion are not scheduled, and the check time is always strictly
+    in the future so a failed check cannot fire again in the same step.
+    """
+    predicted = predict_engulf_time(planet)
+    lead = predicted - simulation_time
+    when = predicted if lead <= ENGULF_PREDICTION_RESOLUTION else (
+        simulation_time + min(0.5 * lead, ENGULF_PREDICTION_HORIZON))
+    if when > red_giant_start_time + RED_GIANT_DURATION:
+        engulf_predictions.pop(planet['name'], None)
+        return
+    when = max(when, np.nextafter(simulation_time, math.inf))
+    engulf_predictions[planet['name']] = (predicted, schedule_event(when, SCHEDULED_ENGULF_CHECK, planet['name']))
+
+def note_orbit_change(planet):
+    """React to an impulse on a planet: leave its analytic orbit and reschedule its engulf check if it moved enough"""
+    release_kepler_orbit(planet)
+    if ephemeris is not None:
+        release_ephemeris()
+    prediction = engulf_predictions.get(planet['name'])
+    if prediction is None:
+        return
+    if abs(predict_engulf_time(planet) - prediction[0]) > ENGULF_RESCHEDULE_TOLERANCE:
+        schedule_engulf_check(planet)
+
+def rebuild_event_schedule():
+    """Recreate the pending events implied by the current sequence state (after a restore)"""
+    clear_scheduled_events()
+    if sequence_stage == 1:
+        schedule_event(simulation_time, SCHEDULED_SUPERNOVA_START)
+        schedule_event(sequence_start_time + SUPERNOVA_DURATION, SCHEDULED_SUPERNOVA_END)
+    if sequence_stage in (1, 2):
+        schedule_event(sequence_start_time + SUPERNOVA_DURATION + BLACK_HOLE_FADE_IN_DURATION,
+                       SCHEDULED_BLACK_HOLE_VISIBLE)
+    if is_red_giant_active:
+        schedule_event(red_giant_start_time + RED_GIANT_DURATION, SCHEDULED_RED_GIANT_COMPLETE)
+        check_planet_engulfing()
+        for planet in planets:
+            if not planet['captured'] and planet['name'] not in engulfed_planets:
+                schedule_engulf_check(planet)
+
+# ============================================================================
+# ANALYTIC KEPLER PROPAGATION
+# (Orbital Elements, Vectorized Newton Solve of Kepler's Equation)
+# ============================================================================
+
+def kepler_field_active():
+    """True while the Sun is the only attractor, so every free planet follows an exact Kepler orbit"""
+    return (sequence_stage == 0 and is_solar_system_active and sun_exists
+            and not is_black_hole_active and not is_red_giant_active)
+
+def kepler_elements_from_state(offset, velocity, mu, epoch):
+    """Convert (N, 3) Sun-relative positions and velocities into element rows.
+
+    Each row holds [epoch, a, e, n, M0, p_x, p_y, p_z, q_x, q_y, q_z], where p
+    points at periapsis and q completes the orbital plane. Also returns a mask
+    of the bodies on bound elliptic orbits (the only ones that can be
+    propagated analytically).
+    """
+    r = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+    h = np.cross(offset, velocity)
+    h_mag = np.sqrt(np.einsum('ij,ij->i', h, h))
+    speed_sq = np.einsum('ij,ij->i', velocity, velocity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        e_vec = np.cross(velocity, h) / mu - offset / r[:, None]
+        e = np.sqrt(np.einsum('ij,ij->i', e_vec, e_vec))
+        energy = 0.5 * speed_sq - mu / r
+        a = -mu / (2.0 * energy)
+        bound = (r > 0) & (h_mag > 0) & (energy < 0) & (e < KEPLER_MAX_ECCENTRICITY)
+
+        circular = e < 1e-10
+        p_hat = np.where(circular[:, None], offset / r[:, None], e_vec / np.where(circular, 1.0, e)[:, None])
+        q_hat = np.cross(h / h_mag[:, None], p_hat)
+        true_anomaly = np.arctan2(np.einsum('ij,ij->i', offset, q_hat), np.einsum('ij,ij->i', offset, p_hat))
+        eccentric_anomaly = 2.0 * np.arctan2(np.sqrt(1.0 - e) * np.sin(0.5 * true_anomaly),
+                                             np.sqrt(1.0 + e) * np.cos(0.5 * true_anomaly))
+        mean_anomaly = eccentric_anomaly - e * np.sin(eccentric_anomaly)
+        mean_motion = np.sqrt(mu / a ** 3)
+
+    rows = np.column_stack([np.full(len(offset), epoch), a, e, mean_motion, mean_anomaly, p_hat, q_hat])
+    return rows, bound
+
+def solve_kepler_equation(mean_anomaly, eccentricity, out=None):
+    """Eccentric anomaly E with E - e sin E = M, by vectorized Newton iteration (temporaries in physics_buffer)"""
+    count = len(mean_anomaly)
+    mean_anomaly = np.mod(mean_anomaly, physics_scalar('kepler_two_pi', 2.0 * math.pi),
+                          out=physics_buffer('kepler_mean_anomaly', (count,)))
+    eccentric_anomaly = out if out is not None else np.empty(count)
+    np.copyto(eccentric_anomaly, mean_anomaly)
+    high = np.greater_equal(eccentricity, physics_scalar('kepler_high_eccentricity', 0.8),
+                            out=physics_buffer('kepler_high', (count,), bool))
+    if np.count_nonzero(high):
+        np.copyto(eccentric_anomaly, math.pi, where=high)
+    one = physics_scalar('one', 1.0)
+    tolerance = physics_scalar('kepler_tolerance', KEPLER_TOLERANCE)
+    delta = physics_buffer('kepler_delta', (count,))
+    slope = physics_buffer('kepler_slope', (count,))
+    converged = physics_buffer('kepler_converged', (count,), bool)
+    for _ in range(KEPLER_MAX_ITERATIONS):
+        # delta = (E - e sin E - M) / (1 - e cos E), evaluated in the same order in place
+        np.sin(eccentric_anomaly, out=delta)
+        np.multiply(eccentricity, delta, out=delta)
+        np.subtract(eccentric_anomaly, delta, out=delta)
+        delta -= mean_anomaly
+        np.cos(eccentric_anomaly, out=slope)
+        np.multiply(eccentricity, slope, out=slope)
+        np.subtract(one, slope, out=slope)
+        delta /= slope
+        eccentric_anomaly -= delta
+        # max |delta| < tolerance, counted rather than reduced (a NaN never converges either way)
+        np.less(np.abs(delta, out=slope), tolerance, out=converged)
+        if np.count_nonzero(converged) == count:
+            break
+    return eccentric_anomaly
+
+def kepler_state_at(rows, when, mu):
+    """Sun-relative (N, 3) positions and velocities of element rows at simulation time `when`"""
+    epoch, a, e, mean_motion, mean_anomaly = rows[:, :5].T
+    position, velocity = np.empty((len(rows), 3)), np.empty((len(rows), 3))
+    _kepler_state(epoch, a, e, mean_motion, mean_anomaly, rows[:, 5:8].T, rows[:, 8:11].T, when, mu,
+                  position.T, velocity.T)
+    return position, velocity
+
+def _kepler_state(epoch, a, e, mean_motion, mean_anomaly, p_hat, q_hat, when, mu, position, velocity):
+    """kepler_state_at() on element columns, filling `position` and `velocity`.
+
+    p_hat, q_hat, position and velocity are indexed by axis first (three 1-D
+    columns each), so every product is a plain loop; temporaries live in
+    physics_buffer.
+    """
+    count = len(epoch)
+    anomaly = np.subtract(when, epoch, out=physics_buffer('kepler_anomaly', (count,)))
+    np.multiply(mean_motion, anomaly, out=anomaly)
+    np.add(mean_anomaly, anomaly, out=anomaly)
+    eccentric_anomaly = solve_kepler_equation(anomaly, e, out=physics_buffer('kepler_eccentric', (count,)))
+    one = physics_scalar('one', 1.0)
+    cos_e = np.cos(eccentric_anomaly, out=physics_buffer('kepler_cos', (count,)))
+    sin_e = np.sin(eccentric_anomaly, out=physics_buffer('kepler_sin', (count,)))
+    minor = np.multiply(e, e, out=physics_buffer('kepler_minor', (count,)))
+    np.subtract(one, minor, out=minor)
+    np.sqrt(minor, out=minor)
+    # r = a (1 - e cos E); speed_scale = sqrt(mu a) / r
+    r = np.multiply(e, cos_e, out=physics_buffer('kepler_r', (count,)))
+    np.subtract(one, r, out=r)
+    np.multiply(a, r, out=r)
+    speed_scale = np.multiply(mu, a, out=physics_buffer('kepler_speed', (count,)))
+    np.sqrt(speed_scale, out=speed_scale)
+    speed_scale /= r
+    term = physics_buffer('kepler_term', (count,))
+    p_weight = physics_buffer('kepler_weight', (count,))
+    q_weight = physics_buffer('kepler_weight_q', (count,))
+    # position = (a (cos E - e)) p + (a minor sin E) q
+    np.subtract(cos_e, e, out=p_weight)
+    np.multiply(a, p_weight, out=p_weight)
+    np.multiply(a, minor, out=q_weight)
+    q_weight *= sin_e
+    for axis in range(3):
+        np.multiply(p_weight, p_hat[axis], out=position[axis])
+        np.multiply(q_weight, q_hat[axis], out=term)
+        np.add(position[axis], term, out=position[axis])
+    # velocity = (-speed_scale sin E) p + (speed_scale minor cos E) q
+    np.negative(speed_scale, out=p_weight)
+    p_weight *= sin_e
+    np.multiply(speed_scale, minor, out=q_weight)
+    q_weight *= cos_e
+    for axis in range(3):
+        np.multiply(p_weight, p_hat[axis], out=velocity[axis])
+        np.multiply(q_weight, q_hat[axis], out=term)
+        np.add(velocity[axis], term, out=velocity[axis])
+
+def release_kepler_orbit(planet):
+    """Hand a planet back to numerical integration, priming its acceleration for the next Verlet step"""
+    if planet.pop('kepler', None) is not None:
+        planet['acceleration'] = calculate_gravitational_acceleration(planet['position'])
+
+def sync_kepler_orbits(dt):
+    """Put free planets on analytic orbits while the field allows it, and release them all when it stops.
+
+    Runs after the clock has moved on by `dt` but before bodies are advanced,
+    so fresh elements take their epoch at the start of the step.
+    """
+    if not kepler_field_active():
+        for planet in planets:
+            release_kepler_orbit(planet)
+        return
+    for planet in planets:
+        if not planet['captured'] and 'kepler' not in planet:
+            break
+    else:
+        return
+    fresh = [planet for planet in planets if not planet['captured'] and 'kepler' not in planet]
+    offset = np.array([planet['position'] for planet in fresh]) - sun_position
+    velocity = np.array([planet['velocity'] for planet in fresh])
+    rows, bound = kepler_elements_from_state(offset, velocity, G * SUN_MASS, simulation_time - dt)
+    for planet, row, is_bound in zip(fresh, rows, bound):
+        if is_bound:
+            planet['kepler'] = row
+
+def kepler_orbit_table():
+    """Packed elements and state buffers of the uncaptured planets on analytic orbits.
+
+    Kept in physics_scratch and rebuilt only when one of those orbits changes
+    (a planet joins, leaves or gets fresh elements), so advancing them packs
+    nothing per step.
+    """
+    table = physics_scratch['kepler_table']
+    if table is not None:
+        bodies, rows = table['bodies'], table['rows']
+        k = 0
+        for planet in planets:
+            if planet['captured'] or 'kepler' not in planet:
+                continue
+            if k == len(bodies) or bodies[k] is not planet or rows[k] is not planet['kepler']:
+                break
+            k += 1
+        else:
+            if k == len(bodies):
+                return table
+    bodies = [planet for planet in planets if 'kepler' in planet and not planet['captured']]
+    elements = np.array([planet['kepler'] for planet in bodies]).reshape(len(bodies), 11)
+    table = {'bodies': bodies, 'rows': [planet['kepler'] for planet in bodies]}
+    for column, name in enumerate(('epoch', 'semi_major_axis', 'eccentricity', 'mean_motion', 'mean_anomaly')):
+        table[name] = np.ascontiguousarray(elements[:, column])
+    table['p_hat'] = tuple(np.ascontiguousarray(elements[:, 5 + axis]) for axis in range(3))
+    table['q_hat'] = tuple(np.ascontiguousarray(elements[:, 8 + axis]) for axis in range(3))
+    # State buffers are kept as column views for the arithmetic and row views for the write-back
+    rows = []
+    for name in ('offset', 'velocity', 'acceleration'):
+        state = np.zeros((len(bodies), 3))
+        table[name] = tuple(state[:, axis] for axis in range(3))
+        rows.append(list(state))
+    table['targets'] = list(zip(bodies, *rows))
+    physics_scratch['kepler_table'] = table
+    return table
+
+def advance_kepler_planets():
+    """Move every planet on an analytic orbit to its exact state at the current simulation time"""
+    table = kepler_orbit_table()
+    count = len(table['bodies'])
+    if not count:
+        return
+    offset, velocity, acceleration = table['offset'], table['velocity'], table['acceleration']
+    _kepler_state(table['epoch'], table['semi_major_axis'], table['eccentricity'], table['mean_motion'],
+                  table['mean_anomaly'], table['p_hat'], table['q_hat'], physics_scalar('kepler_when', simulation_time),
+                  physics_scalar('kepler_mu', G * SUN_MASS), offset, velocity)
+    # acceleration = -mu * offset / r**3
+    r_cubed = physics_buffer('kepler_r_cubed', (count,))
+    term = physics_buffer('kepler_term', (count,))
+    _rowwise_dot(offset, offset, r_cubed, term)
+    np.sqrt(r_cubed, out=r_cubed)
+    np.power(r_cubed, physics_scalar('three', 3.0), out=r_cubed)
+    negative_mu = physics_scalar('kepler_negative_mu', -G * SUN_MASS)
+    for axis in range(3):
+        np.multiply(negative_mu, offset[axis], out=acceleration[axis])
+        np.divide(acceleration[axis], r_cubed, out=acceleration[axis])
+    for planet, planet_offset, planet_velocity, planet_acceleration in table['targets']:
+        np.add(planet_offset, sun_position, out=planet['position'])
+        np.copyto(planet['velocity'], planet_velocity)
+        np.copyto(planet['acceleration'], planet_acceleration)
+        extend_orbital_trail(planet)
+
+# ============================================================================
+# SUBSTEP SCHEDULER & TIME WARP
+# (Fixed Steps Within a Per-Frame CPU Budget, Carried-Over Time, Adaptive Step)
+# ============================================================================
+
+def change_time_scale(direction):
+    """Move one notch up (+1) or down (-1) the TIME_SCALE_STEPS ladder"""
+    global time_scale_index
+    time_scale_index = max(0, min(len(TIME_SCALE_STEPS) - 1, time_scale_index + direction))
+    substep_state['backlog'] = 0.0
+    log_message("Time scale: {:g}x", TIME_SCALE_STEPS[time_scale_index], key='time_scale')
+
+def run_physics_step(dt):
+    """One physics step plus the per-step bookkeeping that idle() used to inline"""
+    update_physics(dt)
+    handle_sequences(dt)
+    if recorder_active:
+        record_physics_step(dt)
+    probe_mark('sequences')
+
+def substep_limit():
+    """Largest step the scheduler may take in the current field, a power of two times DT.
+
+    Planets on analytic orbits or the ephemeris are exact at any step, so the
+    quiet solar system may go up to SUBSTEP_MAX_MULTIPLIER x DT. While any
+    planet is Verlet-integrated (black hole, red giant, collision preset) the
+    step stays within SUBSTEP_ORBIT_FRACTION of its free-fall time around the
+    attractor and at most SUBSTEP_INTEGRATED_MAX_MULTIPLIER x DT, so captures,
+    engulfing and collisions are not stepped over.
+    """
+    integrated = [planet for planet in planets if not planet['captured'] and 'kepler' not in planet]
+    if ephemeris is not None or (kepler_field_active() and not integrated):
+        return DT * SUBSTEP_MAX_MULTIPLIER
+    limit = DT * SUBSTEP_INTEGRATED_MAX_MULTIPLIER
+    attractor = fleet_attractor()
+    if integrated and attractor is not None:
+        centre, mass = attractor
+        offset = np.array([planet['position'] for planet in integrated]) - centre
+        r_cubed = np.einsum('ij,ij->i', offset, offset) ** 1.5
+        limit = min(limit, SUBSTEP_ORBIT_FRACTION * math.sqrt(float(r_cubed.min()) / (G * mass)))
+    return DT * 2.0 ** max(0, math.floor(math.log2(max(limit / DT, 1.0))))
+
+def advance_simulation(wall_dt):
+    """Advance the simulation by `wall_dt` real seconds at the requested time scale.
+
+    Whole steps of substep_state['step_size'] are run until the simulated-time
+    backlog is used up or FRAME_PHYSICS_BUDGET of CPU time is spent; whatever
+    is left is carried to the next frame. When the budget runs out the step
+    size doubles (up to substep_limit()), and it halves back towards DT once
+    frames finish comfortably. Recordings always use DT.
+    """
+    state = substep_state
+    requested_scale = TIME_SCALE_STEPS[time_scale_index]
+    wall_dt = min(wall_dt, MAX_FRAME_DELTA)
+    state['backlog'] = min(state['backlog'] + wall_dt * requested_scale, requested_scale * MAX_TIME_BACKLOG)
+    limit = substep_limit()
+    state['step_size'] = min(state['step_size'], limit)
+    step = DT if recorder_active else state['step_size']
+
+    start = time.perf_counter()
+    deadline = start + FRAME_PHYSICS_BUDGET
+    simulated = 0.0
+    over_budget = False
+    while state['backlog'] >= step:
+        run_physics_step(step)
+        state['backlog'] -= step
+        simulated += step
+        if time.perf_counter() > deadline:
+            over_budget = state['backlog'] >= step
+            break
+    spent = time.perf_counter() - start
+
+    if over_budget and not recorder_active:
+        state['step_size'] = min(state['step_size'] * 2.0, limit)
+    elif spent < 0.5 * FRAME_PHYSICS_BUDGET and state['step_size'] > DT:
+        state['step_size'] = max(state['step_size'] * 0.5, DT)
+
+    if wall_dt > 0:
+        state['achieved_scale'] += (simulated / wall_dt - state['achieved_scale']) * TIME_SCALE_SMOOTHING
+
+# ============================================================================
+# PARTICLE POOLS & PARALLEL CHUNKED KERNELS
+# (Struct-of-Arrays Pools, Persistent Thread Pool, Deterministic Chunks)
+# ============================================================================
+
+def create_particle_pool(fields, capacity=PARTICLE_POOL_INITIAL_CAPACITY):
+    """Empty struct-of-arrays pool with one array per field of `fields` ({name: (shape, dtype)})"""
+    pool = {'count': 0, 'origin': np.zeros(3)}
+    for name, (shape, dtype) in fields.items():
+        pool[name] = np.zeros((capacity,) + shape, dtype=dtype)
+    return pool
+
+def particle_fields(pool):
+    """Names of the per-particle arrays of a pool"""
+    return [name for name in pool if name not in PARTICLE_POOL_META]
+
+def append_particles(pool, **values):
+    """Append a batch of particles given in world coordinates; fields not given take PARTICLE_FIELD_DEFAULTS or zero.
+
+    Positions are stored relative to the pool's floating origin. Grows the
+    pool by doubling.
+    """
+    added = len(values['position'])
+    count = pool['count']
+    capacity = len(pool['position'])
+    if count + added > capacity:
+        capacity = max(capacity * 2, count + added)
+        for name in particle_fields(pool):
+            array = pool[name]
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:count] = array[:count]
+            pool[name] = grown
+    for name in particle_fields(pool):
+        if name == 'position':
+            pool[name][count:count + added] = values[name] - pool['origin']
+        else:
+            pool[name][count:count + added] = values[name] if name in values else PARTICLE_FIELD_DEFAULTS.get(name, 0)
+    pool['count'] = count + added
+
+def world_particle_values(pool):
+    """Live particles of a pool as {field: array}, positions converted back to float64 world coordinates"""
+    count = pool['count']
+    values = {name: pool[name][:count] for name in particle_fields(pool)}
+    values['position'] = values['position'] + pool['origin']
+    return values
+
+def compact_particle_pool(pool, keep):
+    """Drop the live particles where `keep` is False, preserving the order of the survivors"""
+    count = pool['count']
+    survivors = int(np.count_nonzero(keep))
+    if survivors == count:
+        return
+    for name in particle_fields(pool):
+        array = pool[name]
+        array[:survivors] = array[:count][keep]
+    pool['count'] = survivors
+
+def clear_particle_pool(pool):
+    """Remove every particle (capacity is kept)"""
+    pool['count'] = 0
+
+def spawn_debris_particles(particles):
+    """Add debris described as dicts (the capture_planet() layout) to the pool or the shards"""
+    if not particles:
+        return
+    values = {
+        'position': np.array([p['position'] for p in particles]),
+        'velocity': np.array([p['velocity'] for p in particles]),
+        'color': np.array([p['color'] for p in particles], dtype=np.float64),
+        'age': np.array([p['age'] for p in particles]),
+        'lifetime': np.array([p['lifetime'] for p in particles]),
+        'initial_distance': np.array([p['initial_distance'] for p in particles]),
+        'absorption_delay': np.array([p['absorption_delay'] for p in particles]),
+        'mass_factor': np.array([p['mass_factor'] for p in particles]),
+        'planet_type': np.array([p['planet_type'] for p in particles], dtype='U16')
+    }
+    if debris_shards is not None:
+        spawn_sharded_debris(values)
+    else:
+        append_particles(debris_pool, **values)
+        enforce_particle_budget()
+
+def set_kernel_threads(threads):
+    """Use `threads` worker threads for chunked kernels (1 runs every chunk inline)"""
+    global kernel_threads, kernel_executor
+    if kernel_executor is not None:
+        kernel_executor.shutdown(wait=True)
+        kernel_executor = None
+    kernel_threads = max(1, int(threads))
+
+def run_chunked(kernel, count, *args, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Run kernel(chunk, start, stop, *args) over fixed [start, stop) chunks of `count` items.
+
+    Chunk boundaries depend only on `count` and `chunk_size`, never on the
+    thread count, so every kernel that writes only its own slice gives
+    bit-identical results whether it runs inline or on the thread pool.
+    """
+    global kernel_executor
+    bounds = [(chunk, start, min(start + chunk_size, count))
+              for chunk, start in enumerate(range(0, count, chunk_size))]
+    if kernel_threads <= 1 or len(bounds) <= 1:
+        for chunk, start, stop in bounds:
+            kernel(chunk, start, stop, *args)
+        return
+    if kernel_executor is None:
+        kernel_executor = concurrent.futures.ThreadPoolExecutor(max_workers=kernel_threads,
+                                                                thread_name_prefix="kernel")
+    futures = [kernel_executor.submit(kernel, chunk, start, stop, *args) for chunk, start, stop in bounds]
+    for future in futures:
+        future.result()
+
+def _scratch(name, shape, dtype=np.float64):
+    """Per-thread reusable buffer of at least `shape`, returned as a view of exactly that shape"""
+    buffers = getattr(kernel_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = kernel_scratch.buffers = {}
+    size = int(np.prod(shape))
+    buffer = buffers.get((name, np.dtype(dtype).str))
+    if buffer is None or buffer.size < size:
+        buffer = buffers[(name, np.dtype(dtype).str)] = np.empty(max(size, PARALLEL_CHUNK_SIZE * 3), dtype=dtype)
+    return buffer[:size].reshape(shape)
+
+def _debris_chunk_kernel(chunk, start, stop, pool, keep, dt, black_hole_on, bh_position, bh_mass, seed):
+    """update_debris_particles() rules for pool[start:stop]: drift, black-hole pull and spiral, absorption"""
+    count = stop - start
+    position = pool['position'][start:stop]
+    velocity = pool['velocity'][start:stop]
+    age = pool['age'][start:stop]
+    lifetime = pool['lifetime'][start:stop]
+    delay = pool['absorption_delay'][start:stop]
+    alive = keep[start:stop]
+
+    offset = _scratch('offset', (count, 3))
+    np.subtract(position, bh_position, out=offset)
+    distance = _scratch('distance', (count,))
+    np.einsum('ij,ij->i', offset, offset, out=distance)
+    np.sqrt(distance, out=distance)
+
+    far = distance > BLACK_HOLE_VISUAL_RADIUS * 8.0
+    near = ~far
+    if far.any():
+        position[far] += velocity[far] * (dt * 0.5)
+        age[far] += dt
+        alive[far] = ~((age[far] >= lifetime[far]) | (distance[far] > BLACK_HOLE_VISUAL_RADIUS * 12.0))
+
+    if black_hole_on:
+        pulled = np.nonzero(near & (age > delay) & (distance > BLACK_HOLE_VISUAL_RADIUS))[0]
+        if len(pulled):
+            d = distance[pulled]
+            to_black_hole = offset[pulled] / -d[:, None]
+            distance_factor = np.maximum(0.5, BLACK_HOLE_VISUAL_RADIUS * 5.0 / d)
+            gravity_strength = (G * bh_mass * 2.0) / (d * d + 10.0)
+            pulled_velocity = velocity[pulled] + to_black_hole * (gravity_strength * 0.2 * distance_factor * dt)[:, None]
+            age_factor = np.minimum(1.0, (age[pulled] - delay[pulled]) / (lifetime[pulled] * 0.3))
+            proximity_factor = np.maximum(2.0, BLACK_HOLE_VISUAL_RADIUS * 6.0 / d)
+            spiral_strength = SPIRAL_DECAY_RATE * 2.0 * age_factor * proximity_factor
+            spiralled = ((pulled_velocity + to_black_hole * (spiral_strength * d * 0.3 * dt)[:, None])
+                         * (1.0 - 0.02 * proximity_factor * age_factor)[:, None])
+            velocity[pulled] = np.where((age_factor > 0.05)[:, None], spiralled, pulled_velocity)
+
+    near_index = np.nonzero(near)[0]
+    position[near_index] += velocity[near_index] * dt
+    age[near_index] += dt
+    alive[near_index] = age[near_index] < lifetime[near_index]
+
+    if black_hole_on and len(near_index):
+        outer_radius = BLACK_HOLE_VISUAL_RADIUS * 6.0
+        moved = position[near_index] - bh_position
+        d = np.sqrt(np.einsum('ij,ij->i', moved, moved))
+        absorbed = d < BLACK_HOLE_VISUAL_RADIUS * 1.2
+        alive[near_index[absorbed]] = False
+
+        escaped = ~absorbed & (d > outer_radius)
+        if escaped.any():
+            rng = np.random.default_rng([seed, chunk])
+            index = near_index[escaped]
+            direction = moved[escaped] / -d[escaped][:, None]
+            position[index] = bh_position + direction * (outer_radius - 5.0)
+            orbital_speed = math.sqrt(G * bh_mass / outer_radius) * 0.6
+            tangent = np.zeros_like(direction)
+            tangent[:, 0] = -direction[:, 1]
+            tangent[:, 1] = direction[:, 0]
+            tangent_mag = np.sqrt(np.einsum('ij,ij->i', tangent, tangent))
+            flat = tangent_mag > 0
+            tangent[flat] /= tangent_mag[flat][:, None]
+            # One draw per particle of the chunk, so which particles escape never shifts another's kick
+            radial_kick = rng.uniform(-2.0, 0.5, count)[index]
+            velocity[index] = np.where(flat[:, None],
+                                       tangent * orbital_speed + direction * radial_kick[:, None],
+                                       np.array([orbital_speed, 0.0, 0.0]))
+
+def advance_debris_pool(pool, dt, black_hole_on, bh_position, bh_mass, seed):
+    """Advance every live debris particle in chunks and drop the removed ones"""
+    keep = np.ones(pool['count'], dtype=bool)
+    run_chunked(_debris_chunk_kernel, pool['count'], pool, keep, dt, black_hole_on,
+                np.asarray(bh_position, dtype=np.float64), float(bh_mass), seed)
+    compact_particle_pool(pool, keep)
+
+def _ejecta_chunk_kernel(chunk, start, stop, pool, keep, dt):
+    """Ballistic drift and ageing of supernova ejecta in pool[start:stop]"""
+    position = pool['position'][start:stop]
+    position += pool['velocity'][start:stop] * dt
+    age = pool['age'][start:stop]
+    age += dt
+    np.less(age, pool['lifetime'][start:stop], out=keep[start:stop])
+
+def _debris_color_chunk_kernel(chunk, start, stop, pool, camera_pos, vertices, colors, classes):
+    """Render vertices, colours and near/far/culled class for debris in pool[start:stop]"""
+    count = stop - start
+    position = pool['position'][start:stop]
+    offset = _scratch('camera_offset', (count, 3))
+    np.subtract(position, camera_pos, out=offset)
+    distance = _scratch('camera_distance', (count,))
+    np.einsum('ij,ij->i', offset, offset, out=distance)
+    np.sqrt(distance, out=distance)
+
+    if vertices is not None:
+        vertices[start:stop] = position
+    fade = pool['age'][start:stop] / pool['lifetime'][start:stop]
+    near = distance < BLACK_HOLE_VISUAL_RADIUS * 5.0
+    # Near particles darken towards 30% of their colour over their lifetime: lerp(c, 0.3 c, 0.7 t)
+    shade = np.where(near, 1.0 - 0.49 * fade, 1.0) * pool['weight'][start:stop]
+    np.multiply(pool['color'][start:stop], shade[:, None], out=colors[start:stop], casting='unsafe')
+    np.minimum(colors[start:stop], 1.0, out=colors[start:stop])
+    cls = classes[start:stop]
+    cls[:] = np.where(near, DEBRIS_DRAW_NEAR, DEBRIS_DRAW_FAR)
+    cls[distance > BLACK_HOLE_VISUAL_RADIUS * 15.0] = DEBRIS_DRAW_CULLED
+
+def _ejecta_color_chunk_kernel(chunk, start, stop, pool, vertices, colors):
+    """Render vertices and white-yellow-orange-red lifetime colours for ejecta in pool[start:stop]"""
+    vertices[start:stop] = pool['position'][start:stop]
+    fade = pool['age'][start:stop] / pool['lifetime'][start:stop]
+    weight = pool['weight'][start:stop]
+    for channel in range(3):
+        colors[start:stop, channel] = np.interp(fade, EJECTA_COLOR_KNOTS, EJECTA_COLOR_RAMP[:, channel]) * weight
+    np.minimum(colors[start:stop], 1.0, out=colors[start:stop])
+
+def _render_buffers(name, count):
+    """Reusable float32 vertex/colour buffers of at least `count` rows"""
+    buffers = render_buffers.get(name)
+    if buffers is None or len(buffers[0]) < count:
+        capacity = max(count, PARTICLE_POOL_INITIAL_CAPACITY)
+        buffers = render_buffers[name] = (np.zeros((capacity, 3), dtype=np.float32),
+                                          np.zeros((capacity, 3), dtype=np.float32),
+                                          np.zeros(capacity, dtype=np.int8))
+    return buffers
+
+def draw_point_arrays(vertices, colors, size):
+    """Draw float32 vertex/colour arrays as GL points in one call"""
+    if not len(vertices):
+        return
+    glPointSize(size)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(vertices))
+    glColorPointer(3, GL_FLOAT, 0, np.ascontiguousarray(colors))
+    glDrawArrays(GL_POINTS, 0, len(vertices))
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+def benchmark_parallel_kernels(thread_counts=None, particles=1_000_000, steps=10, seed=0):
+    """Time the chunked debris kernel per thread count and check results match the single-threaded run.
+
+    Returns rows of (threads, seconds per step, speedup, identical).
+    """
+    thread_counts = thread_counts or sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    rng = np.random.default_rng(seed)
+    outer = BLACK_HOLE_VISUAL_RADIUS * 6.0
+    template = create_particle_pool(DEBRIS_POOL_FIELDS, particles)
+    append_particles(template,
+                     position=black_hole_position + rng.normal(0.0, outer * 0.6, (particles, 3)),
+                     velocity=rng.normal(0.0, 20.0, (particles, 3)),
+                     color=rng.uniform(0.2, 1.0, (particles, 3)),
+                     lifetime=rng.uniform(7.0, 13.0, particles),
+                     absorption_delay=rng.uniform(0.0, 1.5, particles))
+    previous_threads = kernel_threads
+    rows = []
+    reference = None
+    try:
+        for threads in thread_counts:
+            set_kernel_threads(threads)
+            pool = {name: (value.copy() if name != 'count' else value) for name, value in template.items()}
+            start = time.perf_counter()
+            for step in range(steps):
+                advance_debris_pool(pool, DT, True, black_hole_position, BLACK_HOLE_MASS, seed + step)
+            per_step = (time.perf_counter() - start) / steps
+            result = pool['position'][:pool['count']]
+            if reference is None:
+                reference = (per_step, result)
+            identical = bool(np.array_equal(result, reference[1]))
+            rows.append((threads, per_step, reference[0] / per_step, identical))
+            log_message("Kernel benchmark: {} threads, {:.2f} ms/step, {:.2f}x speedup, identical: {}",
+                        threads, per_step * 1000.0, reference[0] / per_step, identical)
+    finally:
+        set_kernel_threads(previous_threads)
+    return rows
+
+# ============================================================================
+# SHARED-MEMORY DEBRIS SHARDS
+# (Worker Process per Shard, Step Barrier, Per-Shard Free Lists, Zero-Copy Render)
+# ============================================================================
+
+def _debris_shard_layout(shards, capacity):
+    """Byte layout of the shared debris block: [(name, shape, dtype, offset)] and total size"""
+    fields = [(name, (shards, capacity) + shape, dtype) for name, (shape, dtype) in DEBRIS_POOL_FIELDS.items()]
+    fields += [('alive', (shards, capacity), np.uint8),
+               ('free_slots', (shards, capacity), np.int64),
+               ('free_count', (shards,), np.int64),
+               ('control', (DEBRIS_SHARD_CONTROL_SIZE,), np.float64)]
+    layout = []
+    offset = 0
+    for name, shape, dtype in fields:
+        offset = (offset + 63) // 64 * 64
+        layout.append((name, shape, np.dtype(dtype), offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+def _debris_shard_views(buffer, shards, capacity):
+    """NumPy views of every shared debris array over `buffer` (no copies)"""
+    layout, _ = _debris_shard_layout(shards, capacity)
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset) for name, shape, dtype, offset in layout}
+
+def _advance_debris_shard(arrays, shard, barrier):
+    """Worker loop: advance shard `shard` once per step between the two barrier waits"""
+    control = arrays['control']
+    alive = arrays['alive'][shard]
+    free_slots = arrays['free_slots'][shard]
+    free_count = arrays['free_count']
+    local_fields = ('position', 'velocity', 'age', 'lifetime', 'absorption_delay')
+    while True:
+        barrier.wait()
+        if control[0] == DEBRIS_SHARD_COMMAND_STOP:
+            return
+        live = np.flatnonzero(alive)
+        if len(live):
+            _, dt, black_hole_on, bh_x, bh_y, bh_z, bh_mass, seed = control
+            local = {name: arrays[name][shard][live] for name in local_fields}
+            keep = np.ones(len(live), dtype=bool)
+            _debris_chunk_kernel(shard, 0, len(live), local, keep, dt, bool(black_hole_on),
+                                 np.array([bh_x, bh_y, bh_z]), bh_mass, int(seed))
+            for name in ('position', 'velocity', 'age'):
+                arrays[name][shard][live] = local[name]
+            # Only this process writes its shard's free list during the step phase
+            removed = live[~keep]
+            alive[removed] = 0
+            top = free_count[shard]
+            free_slots[top:top + len(removed)] = removed
+            free_count[shard] = top + len(removed)
+        barrier.wait()
+
+def _debris_shard_worker(memory_name, shards, capacity, shard, barrier):
+    """Worker process entry point: attach to the shared debris block and run one shard"""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        _advance_debris_shard(_debris_shard_views(memory.buf, shards, capacity), shard, barrier)
+    finally:
+        memory.close()
+
+def start_debris_shards(processes, capacity=DEBRIS_SHARD_CAPACITY):
+    """Move the debris pool into shared memory advanced by `processes` worker processes"""
+    global debris_shards
+    if debris_shards is not None:
+        stop_debris_shards()
+    context = multiprocessing.get_context('spawn')
+    _, size = _debris_shard_layout(processes, capacity)
+    memory = shared_memory.SharedMemory(create=True, size=size)
+    arrays = _debris_shard_views(memory.buf, processes, capacity)
+    arrays['alive'][:] = 0
+    arrays['free_slots'][:] = np.arange(capacity - 1, -1, -1)
+    arrays['free_count'][:] = capacity
+    barrier = context.Barrier(processes + 1)
+    workers = [context.Process(target=_debris_shard_worker, name=f"debris-shard-{shard}",
+                               args=(memory.name, processes, capacity, shard, barrier), daemon=True)
+               for shard in range(processes)]
+    for worker in workers:
+        worker.start()
+    debris_shards = {
+        'memory': memory,
+        'arrays': arrays,
+        'shards': processes,
+        'capacity': capacity,
+        'barrier': barrier,
+        'workers': workers,
+        'next_shard': 0,
+        'dropped': 0
+    }
+    if debris_pool['count']:
+        spawn_sharded_debris(world_particle_values(debris_pool))
+        clear_particle_pool(debris_pool)
+    log_message("Debris sharded across {} processes ({} slots each)", processes, capacity)
+
+def stop_debris_shards():
+    """Stop the shard workers and bring their live debris back into the in-process pool"""
+    global debris_shards
+    shards = debris_shards
+    if shards is None:
+        return
+    gathered = gather_sharded_debris()
+    shards['arrays']['control'][0] = DEBRIS_SHARD_COMMAND_STOP
+    try:
+        shards['barrier'].wait(timeout=DEBRIS_SHARD_BARRIER_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    for worker in shards['workers']:
+        worker.join(timeout=DEBRIS_SHARD_BARRIER_TIMEOUT)
+        if worker.is_alive():
+            worker.terminate()
+    debris_shards = None
+    del shards['arrays']
+    shards['memory'].close()
+    shards['memory'].unlink()
+    if gathered['count']:
+        append_particles(debris_pool, **{name: gathered[name][:gathered['count']] for name in DEBRIS_POOL_FIELDS})
+
+def spawn_sharded_debris(values):
+    """Place a batch of particles into free shard slots, dealing them round-robin across shards.
+
+    Runs between steps, when the main process owns every free list. Particles
+    that find their shard full are dropped and counted.
+    """
+    shards = debris_shards
+    arrays = shards['arrays']
+    added = len(values['position'])
+    target = (shards['next_shard'] + np.arange(added)) % shards['shards']
+    shards['next_shard'] = (shards['next_shard'] + added) % shards['shards']
+    for shard in range(shards['shards']):
+        rows = np.flatnonzero(target == shard)
+        top = int(arrays['free_count'][shard])
+        if len(rows) > top:
+            shards['dropped'] += len(rows) - top
+            rows = rows[:top]
+        if not len(rows):
+            continue
+        slots = arrays['free_slots'][shard, top - len(rows):top][::-1]
+        arrays['free_count'][shard] = top - len(rows)
+        for name in DEBRIS_POOL_FIELDS:
+            arrays[name][shard, slots] = values[name][rows] if name in values else PARTICLE_FIELD_DEFAULTS.get(name, 0)
+        arrays['alive'][shard, slots] = 1
+
+def clear_sharded_debris():
+    """Free every shard slot (between steps only)"""
+    arrays = debris_shards['arrays']
+    arrays['alive'][:] = 0
+    arrays['free_slots'][:] = np.arange(debris_shards['capacity'] - 1, -1, -1)
+    arrays['free_count'][:] = debris_shards['capacity']
+
+def step_debris_shards(dt, black_hole_on, bh_position, bh_mass, seed):
+    """Publish the step parameters and advance every shard in parallel; returns once all are done"""
+    control = debris_shards['arrays']['control']
+    control[:] = (DEBRIS_SHARD_COMMAND_STEP, dt, float(black_hole_on), *bh_position, bh_mass, seed)
+    try:
+        debris_shards['barrier'].wait(timeout=DEBRIS_SHARD_BARRIER_TIMEOUT)
+        debris_shards['barrier'].wait(timeout=DEBRIS_SHARD_BARRIER_TIMEOUT)
+    except threading.BrokenBarrierError:
+        log_message("Debris shard worker stopped responding, falling back to the in-process pool")
+        stop_debris_shards()
+
+def sharded_debris_count():
+    """Number of live particles across all shards"""
+    if debris_shards is None:
+        return 0
+    return debris_shards['shards'] * debris_shards['capacity'] - int(debris_shards['arrays']['free_count'].sum())
+
+def gather_sharded_debris():
+    """Copy the live shard particles into a compact pool (shard-major slot order)"""
+    arrays = debris_shards['arrays']
+    live = arrays['alive'].reshape(-1).astype(bool)
+    pool = {'count': int(np.count_nonzero(live)), 'origin': np.zeros(3)}
+    for name in DEBRIS_POOL_FIELDS:
+        field = arrays[name]
+        pool[name] = field.reshape((-1,) + field.shape[2:])[live]
+    return pool
+
+def debris_particle_count():
+    """Live debris particles in the in-process pool and the shards"""
+    return debris_pool['count'] + sharded_debris_count()
+
+def live_debris_pool():
+    """The pool holding the current debris: the in-process pool, or a gathered copy of the shards"""
+    if debris_shards is None:
+        return debris_pool
+    return gather_sharded_debris()
+
+def draw_sharded_debris(camera_pos):
+    """Draw shard debris straight from the shared position buffer, indexed by visible live slot"""
+    arrays = debris_shards['arrays']
+    total = debris_shards['shards'] * debris_shards['capacity']
+    alive = np.flatnonzero(arrays['alive'].reshape(-1))
+    count = len(alive)
+    if not count:
+        return
+    # Only live slots are shaded; the colour buffer stays slot-indexed so the shared positions can be drawn in place
+    flat_position = arrays['position'].reshape(total, 3)
+    live = {name: arrays[name].reshape((total,) + arrays[name].shape[2:])[alive]
+            for name in ('position', 'color', 'age', 'lifetime', 'weight')}
+    _, colors, _ = _render_buffers('debris_shards', total)
+    _, live_colors, live_classes = _render_buffers('debris_shards_live', count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        run_chunked(_debris_color_chunk_kernel, count, live, camera_pos, None, live_colors, live_classes)
+    colors[alive] = live_colors[:count]
+    for draw_class, size in ((DEBRIS_DRAW_NEAR, 3.0), (DEBRIS_DRAW_FAR, 1.5)):
+        indices = alive[live_classes[:count] == draw_class].astype(np.uint32)
+        if not len(indices):
+            continue
+        glPointSize(size)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_DOUBLE, 0, flat_position)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawElements(GL_POINTS, len(indices), GL_UNSIGNED_INT, indices)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+def benchmark_debris_shards(process_counts=(1, 2, 4), particles=1_000_000, steps=10, seed=0):
+    """Time sharded debris steps per process count against the in-process chunked pool.
+
+    Returns rows of (processes, seconds per step, speedup over the in-process pool).
+    """
+    rng = np.random.default_rng(seed)
+    outer = BLACK_HOLE_VISUAL_RADIUS * 6.0
+    values = {
+        'position': black_hole_position + rng.normal(0.0, outer * 0.6, (particles, 3)),
+        'velocity': rng.normal(0.0, 20.0, (particles, 3)),
+        'color': rng.uniform(0.2, 1.0, (particles, 3)),
+        'lifetime': rng.uniform(7.0, 13.0, particles),
+        'absorption_delay': rng.uniform(0.0, 1.5, particles)
+    }
+    pool = create_particle_pool(DEBRIS_POOL_FIELDS, particles)
+    append_particles(pool, **values)
+    start = time.perf_counter()
+    for step in range(steps):
+        advance_debris_pool(pool, DT, True, black_hole_position, BLACK_HOLE_MASS, seed + step)
+    baseline = (time.perf_counter() - start) / steps
+    log_message("Shard benchmark: in-process pool, {:.2f} ms/step", baseline * 1000.0)
+
+    previous = debris_shards['shards'] if debris_shards is not None else 0
+    if previous:
+        stashed = gather_sharded_debris()
+        stop_debris_shards()
+        clear_particle_pool(debris_pool)
+    rows = []
+    try:
+        for processes in process_counts:
+            start_debris_shards(processes, -(-particles // processes))
+            spawn_sharded_debris(values)
+            start = time.perf_counter()
+            for step in range(steps):
+                step_debris_shards(DT, True, black_hole_position, BLACK_HOLE_MASS, seed + step)
+            per_step = (time.perf_counter() - start) / steps
+            stop_debris_shards()
+            clear_particle_pool(debris_pool)
+            rows.append((processes, per_step, baseline / per_step))
+            log_message("Shard benchmark: {} processes, {:.2f} ms/step, {:.2f}x speedup",
+                        processes, per_step * 1000.0, baseline / per_step)
+    finally:
+        if previous:
+            start_debris_shards(previous)
+            spawn_sharded_debris({name: stashed[name] for name in DEBRIS_POOL_FIELDS})
+    return rows
+
+# ============================================================================
+# TELEMETRY SERVER
+# (asyncio TCP Stream of Quantized Delta Frames, Drop-to-Latest Clients)
+# ============================================================================
+
+def capture_telemetry_snapshot():
+    """Quantize the streamed part of the simulation state into integer arrays"""
+    names = tuple(planet['name'] for planet in planets)
+    position = np.array([planet['position'] for planet in planets], dtype=np.float64).reshape(-1, 3)
+    velocity = np.array([planet['velocity'] for planet in planets], dtype=np.float64).reshape(-1, 3)
+    flags = np.array([planet['captured']
+                      | (planet['spaghettified'] << 1)
+                      | (planet.get('logically_captured', False) << 2)
+                      | ((planet['name'] in engulfed_planets) << 3)
+                      for planet in planets], dtype=np.uint8)
+    limit = np.iinfo(np.int32).max
+    telemetry_state['frame'] += 1
+    return {
+        'frame': telemetry_state['frame'],
+        'time': simulation_time,
+        'published_at': time.perf_counter(),
+        'names': names,
+        'position': np.clip(np.rint(position / TELEMETRY_POSITION_QUANTUM), -limit, limit).astype(np.int32),
+        'velocity': np.clip(np.rint(velocity / TELEMETRY_VELOCITY_QUANTUM), -limit, limit).astype(np.int32),
+        'flags': flags,
+        'stage': sequence_stage,
+        'black_hole_mass': int(round(black_hole_mass / TELEMETRY_MASS_QUANTUM)),
+        'debris': debris_particle_count()
+    }
+
+def _pack_telemetry_deltas(current, previous):
+    """Width byte plus the deltas `current - previous` in the narrowest signed integer type that fits"""
+    delta = current.astype(np.int64).reshape(-1)
+    if previous is not None:
+        delta -= previous.reshape(-1)
+    peak = int(np.abs(delta).max()) if len(delta) else 0
+    width = 1 if peak < 2 ** 7 else 2 if peak < 2 ** 15 else 4
+    return struct.pack('<B', width) + delta.astype(f'<i{width}').tobytes()
+
+def encode_telemetry_frame(snapshot, previous, mask, keyframe=False):
+    """Binary frame of the fields in `mask`, delta-encoded against the client's previous snapshot.
+
+    A keyframe (no usable previous snapshot, changed body list or forced)
+    carries the body names and absolute values. The frame starts with its
+    length so clients can split the stream.
+    """
+    keyframe = keyframe or previous is None or previous['names'] != snapshot['names']
+    body_count = len(snapshot['names'])
+    parts = [TELEMETRY_FRAME_HEADER.pack(snapshot['frame'], snapshot['time'],
+                                         TELEMETRY_FLAG_KEYFRAME if keyframe else 0, mask, body_count)]
+    if keyframe:
+        names = "\n".join(snapshot['names']).encode('utf-8')
+        parts.append(struct.pack('<H', len(names)) + names)
+    for field, bit in (('position', TELEMETRY_FIELD_POSITION), ('velocity', TELEMETRY_FIELD_VELOCITY)):
+        if mask & bit:
+            parts.append(_pack_telemetry_deltas(snapshot[field], None if keyframe else previous[field]))
+    if mask & TELEMETRY_FIELD_FLAGS:
+        parts.append(snapshot['flags'].tobytes())
+    if mask & TELEMETRY_FIELD_STAGE:
+        parts.append(struct.pack('<B', snapshot['stage']))
+    if mask & TELEMETRY_FIELD_BLACK_HOLE:
+        parts.append(struct.pack('<i', snapshot['black_hole_mass']))
+    if mask & TELEMETRY_FIELD_DEBRIS:
+        parts.append(struct.pack('<I', snapshot['debris']))
+    payload = b''.join(parts)
+    return struct.pack('<I', len(payload)) + payload
+
+def decode_telemetry_frame(payload, previous=None):
+    """Decode one frame payload (without its length prefix) for a viewer.
+
+    `previous` is the dict this function returned for the client's last frame;
+    delta frames need it. Quantized arrays are kept under 'position_q' and
+    'velocity_q' for the next call.
+    """
+    frame, sim_time, frame_flags, mask, body_count = TELEMETRY_FRAME_HEADER.unpack_from(payload)
+    offset = TELEMETRY_FRAME_HEADER.size
+    keyframe = bool(frame_flags & TELEMETRY_FLAG_KEYFRAME)
+    if not keyframe and previous is None:
+        raise ValueError("Delta frame received before a keyframe")
+    decoded = {'frame': frame, 'time': sim_time, 'mask': mask, 'keyframe': keyframe}
+    if keyframe:
+        (length,) = struct.unpack_from('<H', payload, offset)
+        offset += 2
+        names = payload[offset:offset + length].decode('utf-8')
+        decoded['names'] = tuple(names.split("\n")) if names else ()
+        offset += length
+    else:
+        decoded['names'] = previous['names']
+    for field, bit, quantum in (('position', TELEMETRY_FIELD_POSITION, TELEMETRY_POSITION_QUANTUM),
+                                ('velocity', TELEMETRY_FIELD_VELOCITY, TELEMETRY_VELOCITY_QUANTUM)):
+        if not mask & bit:
+            continue
+        (width,) = struct.unpack_from('<B', payload, offset)
+        offset += 1
+        values = np.frombuffer(payload, dtype=f'<i{width}', count=body_count * 3, offset=offset).astype(np.int64)
+        offset += body_count * 3 * width
+        if not keyframe:
+            values += previous[field + '_q'].reshape(-1)
+        decoded[field + '_q'] = values.reshape(-1, 3)
+        decoded[field] = decoded[field + '_q'] * quantum
+    if mask & TELEMETRY_FIELD_FLAGS:
+        decoded['flags'] = np.frombuffer(payload, dtype=np.uint8, count=body_count, offset=offset).copy()
+        offset += body_count
+    if mask & TELEMETRY_FIELD_STAGE:
+        (decoded['stage'],) = struct.unpack_from('<B', payload, offset)
+        offset += 1
+    if mask & TELEMETRY_FIELD_BLACK_HOLE:
+        (mass,) = struct.unpack_from('<i', payload, offset)
+        decoded['black_hole_mass'] = mass * TELEMETRY_MASS_QUANTUM
+        offset += 4
+    if mask & TELEMETRY_FIELD_DEBRIS:
+        (decoded['debris'],) = struct.unpack_from('<I', payload, offset)
+    return decoded
+
+async def _read_telemetry_subscriptions(reader, client):
+    """Apply subscription masks sent by the client (one byte each, latest wins)"""
+    while True:
+        data = await reader.read(64)
+        if not data:
+            return
+        client['mask'] = data[-1] & TELEMETRY_FIELDS_ALL
+
+async def _serve_telemetry_client(reader, writer):
+    """Send each client the newest snapshot whenever it can accept more, dropping any it missed"""
+    import asyncio
+    # Keep socket and transport buffers small so a slow client falls behind by dropped frames, not queued ones
+    writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, TELEMETRY_SEND_BUFFER)
+    writer.transport.set_write_buffer_limits(high=TELEMETRY_SEND_BUFFER)
+    client = {
+        'peer': writer.get_extra_info('peername'),
+        'writer': writer,
+        'subscriptions': None,
+        'mask': TELEMETRY_FIELDS_ALL,
+        'latest': None,
+        'ready': asyncio.Event(),
+        'previous': None,
+        'previous_mask': None,
+        'since_keyframe': 0,
+        'frames': 0,
+        'bytes': 0,
+        'dropped': 0,
+        'lag_frames': 0,
+        'lag_seconds': 0.0
+    }
+    telemetry_state['clients'].append(client)
+    subscriptions = client['subscriptions'] = asyncio.ensure_future(_read_telemetry_subscriptions(reader, client))
+    subscriptions.add_done_callback(lambda _: client['ready'].set())
+    try:
+        while True:
+            await client['ready'].wait()
+            client['ready'].clear()
+            if subscriptions.done():
+                break
+            snapshot, client['latest'] = client['latest'], None
+            if snapshot is None:
+                continue
+            mask = client['mask']
+            keyframe = mask != client['previous_mask'] or client['since_keyframe'] >= TELEMETRY_KEYFRAME_INTERVAL
+            frame = encode_telemetry_frame(snapshot, client['previous'], mask, keyframe)
+            writer.write(frame)
+            await writer.drain()
+            client['since_keyframe'] = 0 if keyframe or client['previous'] is None else client['since_keyframe'] + 1
+            client['previous'] = snapshot
+            client['previous_mask'] = mask
+            client['frames'] += 1
+            client['bytes'] += len(frame)
+            client['lag_frames'] = telemetry_state['frame'] - snapshot['frame']
+            client['lag_seconds'] = time.perf_counter() - snapshot['published_at']
+            telemetry_stats['frames_sent'] += 1
+            telemetry_stats['bytes_sent'] += len(frame)
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        telemetry_state['clients'].remove(client)
+        subscriptions.cancel()
+        writer.close()
+
+def _distribute_telemetry(snapshot):
+    """Loop thread: hand a snapshot to every client, replacing any it has not sent yet"""
+    for client in telemetry_state['clients']:
+        if client['latest'] is not None:
+            client['dropped'] += 1
+            telemetry_stats['frames_dropped'] += 1
+        client['latest'] = snapshot
+        client['ready'].set()
+
+def _run_telemetry_loop(loop, server_ready, host, port):
+    """Thread entry point: run the telemetry server's event loop until stopped"""
+    import asyncio
+    asyncio.set_event_loop(loop)
+    try:
+        telemetry_state['server'] = loop.run_until_complete(asyncio.start_server(_serve_telemetry_client, host, port))
+    except OSError as error:
+        log_message("Telemetry server could not listen on {}:{}: {}", host, port, error)
+        server_ready.set()
+        loop.close()
+        return
+    server_ready.set()
+    loop.run_forever()
+    telemetry_state['server'].close()
+    # Ending each client's subscription reader and connection lets its sender task return on its own
+    for client in list(telemetry_state['clients']):
+        client['subscriptions'].cancel()
+        client['writer'].transport.abort()
+    loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+    loop.run_until_complete(telemetry_state['server'].wait_closed())
+    loop.close()
+
+def start_telemetry_server(port=TELEMETRY_DEFAULT_PORT, host=TELEMETRY_HOST):
+    """Start streaming telemetry to local viewers from a background event-loop thread"""
+    import asyncio  # deferred like the GL import: only telemetry needs it
+    if telemetry_state['thread'] is not None:
+        return
+    loop = asyncio.new_event_loop()
+    server_ready = threading.Event()
+    thread = threading.Thread(target=_run_telemetry_loop, args=(loop, server_ready, host, port),
+                              name="telemetry", daemon=True)
+    thread.start()
+    server_ready.wait()
+    if telemetry_state['server'] is None:
+        thread.join()
+        return
+    telemetry_state['loop'] = loop
+    telemetry_state['thread'] = thread
+    log_message("Telemetry streaming on {}:{}", host, port)
+
+def stop_telemetry_server():
+    """Close every client connection and stop the telemetry thread"""
+    loop = telemetry_state['loop']
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    telemetry_state['thread'].join()
+    telemetry_state['loop'] = None
+    telemetry_state['thread'] = None
+    telemetry_state['server'] = None
+    log_message("Telemetry stopped: {} frames published, {} sent, {} dropped, {} bytes",
+                telemetry_stats['frames_published'], telemetry_stats['frames_sent'],
+                telemetry_stats['frames_dropped'], telemetry_stats['bytes_sent'])
+
+def publish_telemetry():
+    """Publish the current state to the telemetry clients at most every TELEMETRY_PUBLISH_INTERVAL"""
+    loop = telemetry_state['loop']
+    if loop is None or not telemetry_state['clients']:
+        return
+    now = time.perf_counter()
+    if now - telemetry_state['last_publish'] < TELEMETRY_PUBLISH_INTERVAL:
+        return
+    telemetry_state['last_publish'] = now
+    telemetry_stats['frames_published'] += 1
+    loop.call_soon_threadsafe(_distribute_telemetry, capture_telemetry_snapshot())
+
+def telemetry_metrics():
+    """Bytes per frame overall and per client, with each client's backlog and lag"""
+    clients = []
+    for client in list(telemetry_state['clients']):
+        clients.append({
+            'peer': client['peer'],
+            'mask': client['mask'],
+            'frames': client['frames'],
+            'bytes_per_frame': client['bytes'] / client['frames'] if client['frames'] else 0.0,
+            'dropped': client['dropped'],
+            'lag_frames': client['lag_frames'],
+            'lag_seconds': client['lag_seconds']
+        })
+    sent = telemetry_stats['frames_sent']
+    return {
+        'frames_published': telemetry_stats['frames_published'],
+        'frames_sent': sent,
+        'frames_dropped': telemetry_stats['frames_dropped'],
+        'bytes_per_frame': telemetry_stats['bytes_sent'] / sent if sent else 0.0,
+        'clients': clients
+    }
+
+# ============================================================================
+# STARTUP
+# (Deferred PyOpenGL Import, Shared GL Objects, Startup Profile)
+# ============================================================================
+
+def _load_gl():
+    """Import PyOpenGL on first use and publish its names as module globals.
+
+    Headless jobs (sweeps, ensembles, shard and telemetry workers) never draw,
+    so they skip the GL import entirely. Names this module already defines
+    keep their meaning, as they did under the old star imports.
+    """
+    if 'glBegin' in globals():
+        return
+    from OpenGL import GL, GLU, GLUT
+    namespace = globals()
+    for module in (GLU, GLUT, GL):
+        names = getattr(module, '__all__', None) or [name for name in dir(module) if not name.startswith('_')]
+        for name in names:
+            if name not in namespace:
+                namespace[name] = getattr(module, name)
+
+def shared_quadric():
+    """One GLU quadric reused by every sphere draw instead of a new one per call"""
+    global gl_quadric
+    if gl_quadric is None:
+        gl_quadric = gluNewQuadric()
+    return gl_quadric
+
+def report_startup_profile():
+    """Log the startup phase times recorded so far"""
+    for phase in STARTUP_PHASES:
+        value = startup_profile[phase]
+        if value is not None:
+            log_message("Startup {:<12} {:8.1f} ms", phase, value * 1000.0)
+
+# ============================================================================
+# MIXED PRECISION & FLOATING ORIGIN
+# (float32 Particle Storage Relative to a Moving Origin, Accuracy Report)
+# ============================================================================
+
+def set_pool_precision(pool, dtype):
+    """Store a pool's PRECISION_FIELDS arrays as `dtype` (ages and planet types keep theirs)"""
+    for name in PRECISION_FIELDS:
+        if name in pool and pool[name].dtype != dtype:
+            pool[name] = pool[name].astype(dtype)
+
+def recenter_particle_pool(pool, origin):
+    """Move a pool's floating origin to `origin`, rebasing its relative positions in float64"""
+    origin = np.asarray(origin, dtype=np.float64)
+    count = pool['count']
+    if count:
+        pool['position'][:count] = pool['position'][:count] + (pool['origin'] - origin)
+    pool['origin'] = origin.copy()
+
+def set_particle_precision(mode):
+    """Switch particle storage between 'float64' (world coordinates) and 'mixed' (float32 around a floating origin).
+
+    Mixed mode stores every per-particle float in PRECISION_FIELDS as
+    float32; bodies, ships and particle ages stay float64.
+    """
+    global particle_precision
+    if mode not in PRECISION_MODES:
+        raise ValueError(f"Unknown precision mode {mode!r}, expected one of {tuple(PRECISION_MODES)}")
+    for pool in (debris_pool, supernova_pool):
+        if mode == 'float64':
+            set_pool_precision(pool, np.float64)
+            recenter_particle_pool(pool, np.zeros(3))
+        else:
+            recenter_particle_pool(pool, floating_origin_target())
+            set_pool_precision(pool, PRECISION_MODES[mode])
+    render_buffers.clear()
+    particle_precision = mode
+
+def floating_origin_target():
+    """Where the particle origin should sit: the black hole while it exists, otherwise the camera target"""
+    if is_black_hole_active:
+        return black_hole_position
+    return camera_state['target']
+
+def update_floating_origin():
+    """Re-centre the particle pools once their origin is FLOATING_ORIGIN_RECENTER_DISTANCE from its target"""
+    target = np.asarray(floating_origin_target(), dtype=np.float64)
+    for pool in (debris_pool, supernova_pool):
+        if np.linalg.norm(pool['origin'] - target) > FLOATING_ORIGIN_RECENTER_DISTANCE:
+            recenter_particle_pool(pool, target)
+
+def _radial_quantiles(values, centre):
+    """10th, 50th and 90th percentile distance of a particle set from `centre`"""
+    if not len(values['position']):
+        return np.zeros(3)
+    return np.percentile(np.linalg.norm(values['position'] - centre, axis=1), [10.0, 50.0, 90.0])
+
+def _precision_test_pool(values, dtype, origin):
+    """Debris pool holding `values` (world coordinates) with PRECISION_FIELDS stored as `dtype`"""
+    pool = create_particle_pool(DEBRIS_POOL_FIELDS, len(values['position']))
+    set_pool_precision(pool, dtype)
+    if dtype != np.float64:
+        recenter_particle_pool(pool, origin)
+    append_particles(pool, **values)
+    return pool
+
+def _compare_precision_runs(reference, mixed, centre):
+    """Survivor mismatch, per-particle position error and radial quantile shift between two particle sets"""
+    common, ref_index, mixed_index = np.intersect1d(reference['mass_factor'], mixed['mass_factor'],
+                                                    return_indices=True)
+    error = np.linalg.norm(reference['position'][ref_index] - mixed['position'][mixed_index], axis=1)
+    quantile_shift = np.abs(_radial_quantiles(reference, centre) - _radial_quantiles(mixed, centre))
+    return {
+        'survivor_mismatch': len(reference['mass_factor']) + len(mixed['mass_factor']) - 2 * len(common),
+        'p50': float(np.percentile(error, 50)) if len(error) else 0.0,
+        'p99': float(np.percentile(error, 99)) if len(error) else 0.0,
+        'radial_shift': float(quantile_shift.max() / BLACK_HOLE_VISUAL_RADIUS)
+    }
+
+def precision_accuracy_report(duration=PRECISION_REPORT_DURATION, particles=20000, seed=0):
+    """Advance the same debris field in float64 and in mixed precision side by side and compare them.
+
+    Particles carry their index in 'mass_factor' (exact in float32 below
+    2**24 particles) so survivors can be matched. Every checkpoint must
+    meet three tolerances:
+
+    - error_p99: starting from the float64 run's state at the checkpoint,
+      both precisions run PRECISION_ERROR_WINDOW seconds and the p99
+      per-particle position error must stay within
+      PRECISION_POSITION_TOLERANCE world units;
+    - radial_shift: the radial quantiles of the two long runs must agree
+      within PRECISION_RADIAL_TOLERANCE;
+    - survivor_mismatch: at most PRECISION_SURVIVOR_TOLERANCE of the
+      particles may be alive in only one of the long runs.
+
+    The long runs' own per-particle distance (divergence_p50/p99) is
+    reported but not judged: the respawn kicks amplify any rounding
+    difference, so single trajectories drift apart in either precision.
+    """
+    rng = np.random.default_rng(seed)
+    outer = BLACK_HOLE_VISUAL_RADIUS * 6.0
+    centre = black_hole_position + np.array([900.0, -400.0, 0.0])
+    values = {
+        'position': centre + rng.normal(0.0, outer * 0.6, (particles, 3)),
+        'velocity': rng.normal(0.0, 20.0, (particles, 3)),
+        'color': rng.uniform(0.2, 1.0, (particles, 3)),
+        'lifetime': np.full(particles, duration * 2.0),
+        # Staggered delays keep part of the field orbiting in the disk for the whole run
+        'absorption_delay': rng.uniform(0.0, duration, particles),
+        'mass_factor': np.arange(particles, dtype=np.float64)
+    }
+    pools = {mode: _precision_test_pool(values, dtype, centre) for mode, dtype in PRECISION_MODES.items()}
+
+    total_steps = int(round(duration / DT))
+    window_steps = max(1, int(round(PRECISION_ERROR_WINDOW / DT)))
+    checkpoints = sorted({max(1, int(round(fraction * total_steps))) for fraction in PRECISION_REPORT_CHECKPOINTS})
+    elapsed = dict.fromkeys(pools, 0.0)
+    rows = []
+    for step in range(1, total_steps + 1):
+        for mode, pool in pools.items():
+            start = time.perf_counter()
+            advance_debris_pool(pool, DT, True, centre - pool['origin'], BLACK_HOLE_MASS, seed + step)
+            elapsed[mode] += time.perf_counter() - start
+        if step not in checkpoints:
+            continue
+        reference = world_particle_values(pools['float64'])
+        long_run = _compare_precision_runs(reference, world_particle_values(pools['mixed']), centre)
+
+        shared = {name: np.array(array) for name, array in reference.items()}
+        window = {mode: _precision_test_pool(shared, dtype, centre) for mode, dtype in PRECISION_MODES.items()}
+        for offset in range(window_steps):
+            for pool in window.values():
+                advance_debris_pool(pool, DT, True, centre - pool['origin'], BLACK_HOLE_MASS, seed + step + offset)
+        windowed = _compare_precision_runs(world_particle_values(window['float64']),
+                                           world_particle_values(window['mixed']), centre)
+
+        row = {
+            'time': step * DT,
+            'survivors_float64': len(reference['mass_factor']),
+            'survivors_mixed': pools['mixed']['count'],
+            'survivor_mismatch': long_run['survivor_mismatch'],
+            'error_p50': windowed['p50'],
+            'error_p99': windowed['p99'],
+            'radial_shift': long_run['radial_shift'],
+            'divergence_p50': long_run['p50'],
+            'divergence_p99': long_run['p99']
+        }
+        row['within_tolerance'] = (
+            row['error_p99'] <= PRECISION_POSITION_TOLERANCE
+            and row['radial_shift'] <= PRECISION_RADIAL_TOLERANCE
+            and row['survivor_mismatch'] <= PRECISION_SURVIVOR_TOLERANCE * max(1, row['survivors_float64']))
+        rows.append(row)
+
+    within = all(row['within_tolerance'] for row in rows)
+    report = {
+        'checkpoints': rows,
+        'within_tolerance': within,
+        'bytes_per_particle': {mode: sum(pool[name].itemsize * int(np.prod(pool[name].shape[1:]))
+                                         for name in particle_fields(pool))
+                               for mode, pool in pools.items()},
+        'step_ms': {mode: seconds * 1000.0 / total_steps for mode, seconds in elapsed.items()}
+    }
+    for row in rows:
+        log_message("Precision report t={:6.2f}s: {} - {:.0f} s error p50 {:.1e} p99 {:.1e} (limit {:.1e}), "
+                    "survivors {} / {} ({} mismatched), radial quantile shift {:.2%} of the horizon radius, "
+                    "long-run divergence p50 {:.1e} p99 {:.1e} (not judged)",
+                    row['time'], "ok" if row['within_tolerance'] else "OUT OF TOLERANCE", PRECISION_ERROR_WINDOW,
+                    row['error_p50'], row['error_p99'], PRECISION_POSITION_TOLERANCE,
+                    row['survivors_float64'], row['survivors_mixed'], row['survivor_mismatch'],
+                    row['radial_shift'], row['divergence_p50'], row['divergence_p99'])
+    sizes = report['bytes_per_particle']
+    speeds = report['step_ms']
+    log_message("Precision report: {} at {} of {} checkpoints; mixed stores {} bytes/particle against {} ({:.0%}) "
+                "and steps in {:.2f} ms against {:.2f} ms ({:.0%})",
+                "within tolerance" if within else "OUT OF TOLERANCE",
+                sum(row['within_tolerance'] for row in rows), len(rows),
+                sizes['mixed'], sizes['float64'], sizes['mixed'] / sizes['float64'],
+                speeds['mixed'], speeds['float64'], speeds['mixed'] / max(speeds['float64'], 1e-12))
+    return report
+
+# ============================================================================
+# SCENARIO GENERATOR
+# (Seeded Asteroid Belts, Kuiper Clouds & Moon Systems Built Directly as Arrays)
+# ============================================================================
+
+def _sample_semi_major_axes(rng, count, inner, outer, radial):
+    """Semi-major axes in [inner, outer]: uniform in radius, uniform per unit area, or a clipped gaussian"""
+    if radial == 'uniform':
+        return rng.uniform(inner, outer, count)
+    if radial == 'area':
+        return np.sqrt(rng.uniform(inner * inner, outer * outer, count))
+    if radial == 'gaussian':
+        return np.clip(rng.normal(0.5 * (inner + outer), (outer - inner) / 6.0, count), inner, outer)
+    raise ValueError(f"Unknown radial profile {radial!r}, expected one of {RADIAL_PROFILES}")
+
+def sample_eccentric_anomaly(rng, e):
+    """Eccentric anomalies of bodies caught at a uniformly random time along their orbits.
+
+    A uniform mean anomaly gives E the density (1 - e cos E) / 2 pi, so E is
+    drawn by rejection against a uniform proposal instead of solving Kepler's
+    equation for every body.
+    """
+    anomaly = rng.uniform(0.0, 2.0 * math.pi, len(e))
+    pending = np.nonzero(rng.uniform(0.0, 1.0 + e) > 1.0 - e * np.cos(anomaly))[0]
+    while len(pending):
+        anomaly[pending] = rng.uniform(0.0, 2.0 * math.pi, len(pending))
+        rejected = rng.uniform(0.0, 1.0 + e[pending]) > 1.0 - e[pending] * np.cos(anomaly[pending])
+        pending = pending[rejected]
+    return anomaly
+
+def _orbit_state_chunk_kernel(chunk, start, stop, elements, mu, position, velocity):
+    """Focus-relative positions and velocities of orbits[start:stop] from their elements"""
+    a, e, inclination, node, periapsis, eccentric_anomaly = (column[start:stop] for column in elements)
+    cos_e = np.cos(eccentric_anomaly)
+    sin_e = np.sin(eccentric_anomaly)
+    minor = np.sqrt(1.0 - e * e)
+    speed_scale = np.sqrt(mu / a) / (1.0 - e * cos_e)
+
+    # Perifocal position and velocity side by side as [state][x/y], then rotated by
+    # the argument of periapsis, tilted by the inclination and turned by the node
+    plane = np.empty((2, 2, stop - start))
+    plane[0, 0] = a * (cos_e - e)
+    plane[0, 1] = a * minor * sin_e
+    plane[1, 0] = -speed_scale * sin_e
+    plane[1, 1] = speed_scale * minor * cos_e
+    cos_peri, sin_peri = np.cos(periapsis), np.sin(periapsis)
+    x = plane[:, 0] * cos_peri - plane[:, 1] * sin_peri
+    y = plane[:, 0] * sin_peri + plane[:, 1] * cos_peri
+    z = y * np.sin(inclination)
+    y *= np.cos(inclination)
+    cos_node, sin_node = np.cos(node), np.sin(node)
+    for state, out in enumerate((position, velocity)):
+        out[start:stop, 0] = x[state] * cos_node - y[state] * sin_node
+        out[start:stop, 1] = x[state] * sin_node + y[state] * cos_node
+        out[start:stop, 2] = z[state]
+
+def orbit_states_from_elements(a, e, inclination, node, periapsis, eccentric_anomaly, mu):
+    """Focus-relative (N, 3) positions and velocities from classical elements (angles in radians)"""
+    position = np.empty((len(a), 3))
+    velocity = np.empty((len(a), 3))
+    run_chunked(_orbit_state_chunk_kernel, len(a), (a, e, inclination, node, periapsis, eccentric_anomaly),
+                mu, position, velocity)
+    return position, velocity
+
+def sample_orbits(rng, count, inner, outer, radial, eccentricity, inclination, mu, isotropic=False):
+    """Focus-relative (N, 3) positions and velocities of `count` random Kepler orbits.
+
+    Eccentricity and inclination (degrees) are Rayleigh-distributed with the
+    given scales; `isotropic` instead spreads orbital planes evenly over the
+    sphere. Node, argument of periapsis and mean anomaly are uniform.
+    """
+    a = _sample_semi_major_axes(rng, count, inner, outer, radial)
+    e = np.minimum(rng.rayleigh(eccentricity, count), KEPLER_MAX_ECCENTRICITY)
+    if isotropic:
+        tilt = np.arccos(rng.uniform(-1.0, 1.0, count))
+    else:
+        tilt = np.minimum(np.radians(rng.rayleigh(inclination, count)), math.pi)
+    node, periapsis = rng.uniform(0.0, 2.0 * math.pi, (2, count))
+    return orbit_states_from_elements(a, e, tilt, node, periapsis, sample_eccentric_anomaly(rng, e), mu)
+
+def _central_attractor():
+    """Position and mass that belts and clouds orbit: the black hole if there is one, else the Sun"""
+    return fleet_attractor() or (sun_position, SUN_MASS)
+
+def _minor_body_batch(position, velocity, group, parent):
+    """Generated bodies as the arrays add_minor_bodies() takes"""
+    count = len(position)
+    return {
+        'position': position,
+        'velocity': velocity,
+        'group': np.full(count, group, dtype=np.uint8),
+        'parent': np.full(count, parent, dtype=np.int32)
+    }
+
+def generate_asteroid_belt(count=ASTEROID_BELT_COUNT, inner=ASTEROID_BELT_RANGE[0], outer=ASTEROID_BELT_RANGE[1],
+                           radial='uniform', eccentricity=ASTEROID_BELT_ECCENTRICITY,
+                           inclination=ASTEROID_BELT_INCLINATION, seed=0):
+    """Asteroid belt on Kepler orbits around the central attractor"""
+    centre, mass = _central_attractor()
+    rng = np.random.default_rng(seed)
+    position, velocity = sample_orbits(rng, count, inner, outer, radial, eccentricity, inclination, G * mass)
+    position += centre
+    return _minor_body_batch(position, velocity, MINOR_BODY_BELT, -1)
+
+def generate_kuiper_cloud(count=KUIPER_CLOUD_COUNT, inner=KUIPER_CLOUD_RANGE[0], outer=KUIPER_CLOUD_RANGE[1],
+                          radial='area', eccentricity=KUIPER_CLOUD_ECCENTRICITY,
+                          inclination=KUIPER_CLOUD_INCLINATION, isotropic=False, seed=0):
+    """Thick Kuiper-style belt beyond the planets, or a spherical shell with `isotropic`"""
+    centre, mass = _central_attractor()
+    rng = np.random.default_rng(seed)
+    position, velocity = sample_orbits(rng, count, inner, outer, radial, eccentricity, inclination, G * mass,
+                                       isotropic)
+    position += centre
+    return _minor_body_batch(position, velocity, MINOR_BODY_KUIPER, -1)
+
+def generate_moon_system(parent_index, count=MOON_SYSTEM_COUNT, inner=MOON_ORBIT_RANGE[0], outer=MOON_ORBIT_RANGE[1],
+                         radial='uniform', inclination=MOON_ORBIT_INCLINATION, seed=0):
+    """Moons on circular orbits around planets[parent_index].
+
+    Orbit radii are given in parent radii; the outer edge is pulled in to a
+    fraction of the parent's Hill radius so the central attractor does not
+    strip the moons straight away.
+    """
+    planet = planets[parent_index]
+    centre, mass = _central_attractor()
+    hill_radius = np.linalg.norm(planet['position'] - centre) * (planet['mass'] / (3.0 * mass)) ** (1.0 / 3.0)
+    inner *= planet['radius']
+    outer = max(inner, min(outer * planet['radius'], MOON_HILL_FRACTION * hill_radius))
+    rng = np.random.default_rng(seed)
+    position, velocity = sample_orbits(rng, count, inner, outer, radial, 0.0, inclination, G * planet['mass'])
+    position += planet['position']
+    velocity += planet['velocity']
+    return _minor_body_batch(position, velocity, MINOR_BODY_MOON, parent_index)
+
+def minor_body_field():
+    """Gravity acting on minor bodies: central (centre, mass) sources as in calculate_gravitational_acceleration,
+    plus planet positions and masses (zero once captured) for moons"""
+    if sequence_stage >= 1:
+        sources = [(sun_position, black_hole_mass)]
+    else:
+        sources = []
+        if is_solar_system_active and sun_exists:
+            sources.append((sun_position, SUN_MASS))
+        if is_black_hole_active:
+            sources.append((black_hole_position, black_hole_mass))
+    parent_position = np.array([planet['position'] for planet in planets]).reshape(-1, 3)
+    parent_mass = np.array([0.0 if planet['captured'] else planet['mass'] for planet in planets])
+    return sources, parent_position, parent_mass
+
+def minor_body_acceleration(position, parent, field):
+    """Acceleration of minor bodies from the central sources and, for moons, their parent planet"""
+    sources, parent_position, parent_mass = field
+    acceleration = np.zeros_like(position)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for centre, mass in sources:
+            r_vec = centre - position
+            r_sq = np.einsum('ij,ij->i', r_vec, r_vec)
+            acceleration += np.where(r_sq > 0, G * mass / (r_sq * np.sqrt(r_sq)), 0.0)[:, None] * r_vec
+        moons = np.nonzero((parent >= 0) & (parent < len(parent_mass)))[0]
+        if len(moons):
+            owner = parent[moons]
+            r_vec = parent_position[owner] - position[moons]
+            r_sq = np.einsum('ij,ij->i', r_vec, r_vec)
+            acceleration[moons] += np.where(r_sq > 0, G * parent_mass[owner] / (r_sq * np.sqrt(r_sq)), 0.0)[:, None] * r_vec
+    return acceleration
+
+def add_minor_bodies(bodies):
+    """Append generated bodies to the minor body pool and prime their accelerations for Verlet"""
+    added = len(bodies['position'])
+    if not added:
+        return
+    start = minor_bodies['count']
+    append_particles(minor_bodies, **bodies)
+    run_chunked(_minor_body_acceleration_chunk_kernel, added, minor_bodies, start, minor_body_field())
+    log_message("Added {} minor bodies ({} total)", added, minor_bodies['count'])
+
+def clear_minor_bodies():
+    """Remove every minor body"""
+    clear_particle_pool(minor_bodies)
+
+def _minor_body_acceleration_chunk_kernel(chunk, start, stop, pool, offset, field):
+    """Accelerations of minor bodies pool[offset + start:offset + stop] at their current positions"""
+    rows = slice(offset + start, offset + stop)
+    pool['acceleration'][rows] = minor_body_acceleration(pool['position'][rows], pool['parent'][rows], field)
+
+def _minor_body_chunk_kernel(chunk, start, stop, pool, keep, dt, field, sinks):
+    """Velocity Verlet step for minor bodies in pool[start:stop], dropping those inside a sink"""
+    position = pool['position'][start:stop]
+    velocity = pool['velocity'][start:stop]
+    acceleration = pool['acceleration'][start:stop]
+    position += velocity * dt + 0.5 * acceleration * (dt * dt)
+    new_acceleration = minor_body_acceleration(position, pool['parent'][start:stop], field)
+    velocity += 0.5 * (acceleration + new_acceleration) * dt
+    acceleration[:] = new_acceleration
+
+    alive = keep[start:stop]
+    for centre, radius in sinks:
+        offset = position - centre
+        alive &= np.einsum('ij,ij->i', offset, offset) > radius * radius
+
+def update_minor_bodies(dt):
+    """Advance every minor body in chunks and drop those swallowed by the Sun or the black hole"""
+    count = minor_bodies['count']
+    if not count:
+        return
+    sinks = []
+    if is_black_hole_active:
+        sinks.append((black_hole_position, BLACK_HOLE_VISUAL_RADIUS))
+    if is_solar_system_active and sun_exists:
+        sinks.append((sun_position, current_sun_radius))
+    keep = np.ones(count, dtype=bool)
+    run_chunked(_minor_body_chunk_kernel, count, minor_bodies, keep, dt, minor_body_field(), sinks)
+    compact_particle_pool(minor_bodies, keep)
+
+def draw_minor_bodies():
+    """Draw minor bodies as points coloured by group"""
+    count = minor_bodies['count']
+    if not count:
+        return
+    vertices, colors, _ = _render_buffers('minor_bodies', count)
+    vertices[:count] = minor_bodies['position'][:count]
+    np.take(MINOR_BODY_COLORS, minor_bodies['group'][:count], axis=0, out=colors[:count])
+    draw_point_arrays(vertices[:count], colors[:count], MINOR_BODY_POINT_SIZE)
+
+def benchmark_scenario_generator(bodies=GENERATOR_BENCHMARK_BODIES, seed=0):
+    """Time generating and adding `bodies` bodies with each generator and check the seed reproduces them.
+
+    Returns rows of (generator, seconds, reproducible).
+    """
+    if not planets:
+        init_planets()
+    heaviest = int(np.argmax([planet['mass'] for planet in planets]))
+    generators = (('asteroid belt', lambda s: generate_asteroid_belt(bodies, seed=s)),
+                  ('kuiper cloud', lambda s: generate_kuiper_cloud(bodies, seed=s)),
+                  ('moon system', lambda s: generate_moon_system(heaviest, bodies, seed=s)))
+    rows = []
+    for name, generate in generators:
+        clear_minor_bodies()
+        start = time.perf_counter()
+        add_minor_bodies(generate(seed))
+        elapsed = time.perf_counter() - start
+        reproducible = bool(np.array_equal(generate(seed)['position'], minor_bodies['position'][:bodies]))
+        rows.append((name, elapsed, reproducible))
+        log_message("Generator benchmark: {} bodies of {} in {:.0f} ms, reproducible: {}",
+                    bodies, name, elapsed * 1000.0, reproducible)
+    clear_minor_bodies()
+    return rows
+
+# ============================================================================
+# SIMULATION ENGINE
+# (Self-Contained World State Swapped Into the Module, Batched step(n), Views)
+# ============================================================================
+
+def _capture_simulation_state():
+    """Current values of every per-simulation module global"""
+    module = globals()
+    return {name: module[name] for name in SIMULATION_STATE}
+
+def _install_simulation_state(state):
+    """Make `state` the module's per-simulation globals"""
+    globals().update(state)
+
+def new_simulation_state():
+    """Fresh per-simulation state: copies of the initial values of the GLOBAL VARIABLES block"""
+    state = copy.deepcopy(_pristine_simulation_state)
+    state['event_sequence'] = itertools.count()
+    return state
+
+def _live_views(pool):
+    """Views of the live rows of every per-particle array of a pool"""
+    count = pool['count']
+    return {name: pool[name][:count] for name in particle_fields(pool)}
+
+class Simulation:
+    """One simulated world that owns its state.
+
+    Every physics function in this module works on module globals. A
+    Simulation keeps its own set of the per-simulation globals
+    (SIMULATION_STATE) and installs it for the length of each method call,
+    so several worlds can live in one process and be stepped in turn from a
+    script or notebook. Calls may nest; a simulation is not thread-safe.
+    The GLUT app drives the one it activates in init_simulation().
+    """
+
+    def __init__(self, state=None):
+        self.state = state if state is not None else new_simulation_state()
+        self._outer = []
+        self._bodies = None
+        self._pick_bvh = None
+        self._pick_targets = None
+        if state is None:
+            with self:
+                init_planets()
+
+    @classmethod
+    def from_module(cls):
+        """Wrap the world currently held in the module globals"""
+        return cls(_capture_simulation_state())
+
+    def __enter__(self):
+        global active_simulation
+        if active_simulation is self:
+            self._outer.append(None)
+            return self
+        outer_state = _capture_simulation_state()
+        if active_simulation is not None:
+            active_simulation.state = outer_state
+        self._outer.append((active_simulation, outer_state))
+        _install_simulation_state(self.state)
+        active_simulation = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global active_simulation
+        entry = self._outer.pop()
+        if entry is None:
+            return False
+        outer, outer_state = entry
+        self.state = _capture_simulation_state()
+        _install_simulation_state(outer_state)
+        active_simulation = outer
+        return False
+
+    def activate(self):
+        """Leave this simulation installed in the module globals (the GLUT callbacks read them directly)"""
+        global active_simulation
+        if active_simulation is self:
+            return
+        if active_simulation is not None:
+            active_simulation.state = _capture_simulation_state()
+        _install_simulation_state(self.state)
+        active_simulation = self
+
+    # Stepping
+
+    def step(self, n=1, dt=DT):
+        """Run `n` fixed steps of `dt` in one call and return the simulation time"""
+        global current_time
+        with self:
+            physics_step = run_physics_step
+            for _ in range(n):
+                current_time += dt
+                physics_step(dt)
+            return simulation_time
+
+    def advance(self, wall_dt):
+        """Advance by `wall_dt` real seconds at the current time scale (the interactive frame loop)"""
+        with self:
+            advance_simulation(wall_dt)
+
+    # Accessors
+
+    @property
+    def time(self):
+        """Simulated seconds since the last reset"""
+        with self:
+            return simulation_time
+
+    def status(self):
+        """Scalar summary of the world: stage flags, black hole mass and what has been captured or engulfed"""
+        with self:
+            # Captured planets leave the planets list, as in the sweep metrics
+            present = {planet['name'] for planet in planets if not planet['captured']}
+            return {
+                'time': simulation_time,
+                'sequence_stage': sequence_stage,
+                'sun_exists': sun_exists,
+                'black_hole_active': is_black_hole_active,
+                'black_hole_mass': black_hole_mass,
+                'red_giant_active': is_red_giant_active,
+                'sun_radius': current_sun_radius,
+                'keys_locked': keys_locked,
+                'captured': [row[0] for row in PLANET_DATA if row[0] not in present],
+                'engulfed': list(engulfed_planets),
+                'debris': debris_particle_count(),
+                'minor_bodies': minor_bodies['count']
+            }
+
+    def body_arrays(self):
+        """Planet state as arrays: name, position, velocity, acceleration, mass, radius, captured, spaghetti_factor.
+
+        The arrays are allocated once and refreshed in place on every call,
+        so a caller can hold on to them and call again after step().
+        """
+        with self:
+            count = len(planets)
+            arrays = self._bodies
+            if arrays is None or len(arrays['mass']) != count:
+                arrays = self._bodies = {
+                    'name': np.zeros(count, dtype='U16'),
+                    'position': np.zeros((count, 3)),
+                    'velocity': np.zeros((count, 3)),
+                    'acceleration': np.zeros((count, 3)),
+                    'mass': np.zeros(count),
+                    'radius': np.zeros(count),
+                    'captured': np.zeros(count, dtype=bool),
+                    'spaghetti_factor': np.ones(count)
+                }
+            for index, planet in enumerate(planets):
+                for name, array in arrays.items():
+                    array[index] = planet[name]
+            return arrays
+
+    def debris_arrays(self):
+        """Views of the live debris arrays; positions are relative to the pool origin (zero unless mixed precision)"""
+        with self:
+            return _live_views(debris_pool)
+
+    def ejecta_arrays(self):
+        """Views of the live supernova ejecta arrays, positions relative to the pool origin"""
+        with self:
+            return _live_views(supernova_pool)
+
+    def minor_body_arrays(self):
+        """Views of the live minor body arrays (world positions)"""
+        with self:
+            return _live_views(minor_bodies)
+
+    def fleet_arrays(self):
+        """The fleet's position, velocity, rotation and behaviour arrays"""
+        with self:
+            return dict(fleet)
+
+    # Commands (the keyboard actions)
+
+    def _event_allowed(self):
+        """Event keys refuse to fire while an earlier event holds the lock"""
+        if keys_locked:
+            log_message("Event keys are locked! Press R to reset and unlock. Another event cannot be triggered.")
+            return False
+        return True
+
+    def trigger_black_hole(self):
+        """B: start the supernova -> black hole sequence; returns False while events are locked"""
+        with self:
+            if not self._event_allowed():
+                return False
+            trigger_black_hole_sequence()
+            return True
+
+    def trigger_red_giant(self):
+        """X: start the red giant expansion; returns False while events are locked"""
+        with self:
+            if not self._event_allowed():
+                return False
+            trigger_red_giant_sequence()
+            return True
+
+    def collision_preset(self):
+        """P: set up the planet collision demonstration; returns False while events are locked"""
+        with self:
+            if not self._event_allowed():
+                return False
+            setup_collision_rebound_preset()
+            return True
+
+    def reset(self):
+        """R: back to the initial solar system, with event keys unlocked"""
+        global keys_locked
+        with self:
+            reset_simulation()
+            keys_locked = False
+
+    def adjust_black_hole_mass(self, delta):
+        """Up/Down: change the black hole mass, never below 100"""
+        global black_hole_mass
+        with self:
+            black_hole_mass = max(100.0, black_hole_mass + delta)
+            return black_hole_mass
+
+    def select_planet(self, index):
+        """Left/Right: select a planet (wrapping), retargeting the camera if it follows the selection"""
+        global selected_planet_index
+        with self:
+            if not planets:
+                return None
+            selected_planet_index = index % len(planets)
+            if camera_state['is_following_planet']:
+                camera_state['target'] = planets[selected_planet_index]['position'].copy()
+            return selected_planet_index
+
+    def spawn_spaceship(self):
+        """G: spawn the Star Destroyer near the selected planet"""
+        with self:
+            spawn_spaceship_near_selected_planet()
+
+    def despawn_spaceship(self):
+        """L: remove the Star Destroyer"""
+        global spaceship_exists
+        with self:
+            spaceship_exists = False
+
+    def spawn_fleet(self, count=FLEET_SQUADRON_SIZE):
+        """N: add a fleet squadron near the selected planet"""
+        with self:
+            spawn_fleet_squadron(count)
+
+    def cycle_fleet(self):
+        """M: switch the fleet autopilot behaviour"""
+        with self:
+            cycle_fleet_behaviour()
+
+    def disband_fleet(self):
+        """J: remove every fleet ship"""
+        with self:
+            clear_fleet()
+
+    def add_asteroid_belt(self, **options):
+        """T: add an asteroid belt (generate_asteroid_belt options)"""
+        with self:
+            add_minor_bodies(generate_asteroid_belt(**options))
+
+    def add_kuiper_cloud(self, **options):
+        """I: add a Kuiper-style cloud (generate_kuiper_cloud options)"""
+        with self:
+            add_minor_bodies(generate_kuiper_cloud(**options))
+
+    def add_moons(self, parent_index=None, **options):
+        """7: add moons around a planet (the selected one by default); returns False if it is gone"""
+        with self:
+            index = selected_planet_index if parent_index is None else parent_index
+            if not planets or index >= len(planets) or planets[index]['captured']:
+                return False
+            add_minor_bodies(generate_moon_system(index, **options))
+            return True
+
+    def refit_picking(self):
+        """Bring the picking BVH up to date with the current positions (the client calls this once a frame)"""
+        with self:
+            centers, radii, layout = pick_targets()
+            bvh = self._pick_bvh
+            if bvh is None or bvh['layout'] != layout:
+                bvh = self._pick_bvh = build_pick_bvh(centers, radii, layout)
+            elif refit_pick_bvh(bvh, centers, radii) > PICK_REBUILD_GROWTH * bvh['build_extent']:
+                bvh = self._pick_bvh = build_pick_bvh(centers, radii, layout)
+            self._pick_targets = (centers, radii)
+            return bvh
+
+    def pick(self, origin, direction, slope=0.0):
+        """Nearest body along a ray as (kind, index) (see PICK_KIND_NAMES), or None.
+
+        `slope` widens the ray into a cone so point-sized bodies can be hit.
+        Uses the BVH from the last refit_picking(), refitting first if there is none.
+        """
+        if self._pick_bvh is None:
+            self.refit_picking()
+        centers, radii = self._pick_targets
+        hit = query_pick_bvh(self._pick_bvh, centers, radii, origin, direction, slope)
+        if hit < 0:
+            return None
+        for kind, start, stop in self._pick_bvh['layout_ranges']:
+            if start <= hit < stop:
+                return kind, hit - start
+        return None
+
+    def pick_position(self, picked):
+        """World position at the last refit of a body returned by pick()"""
+        kind, index = picked
+        return self._pick_targets[0][pick_offset(self._pick_bvh, kind) + index].copy()
+
+    def predict_trajectory(self):
+        """The spaceship's predicted path (time, position, velocity, contact views), updated incrementally"""
+        global trajectory_prediction
+        with self:
+            if trajectory_prediction is None:
+                trajectory_prediction = create_trajectory_prediction()
+            update_trajectory_prediction(trajectory_prediction)
+            return trajectory_arrays(trajectory_prediction)
+
+    def attach_ephemeris(self, table):
+        """Drive the planets from an ephemeris table (see attach_ephemeris); returns False if it does not fit"""
+        with self:
+            return attach_ephemeris(table)
+
+    def rewind(self):
+        """K: restore the newest snapshot of the rewind ring"""
+        with self:
+            return rewind_simulation()
+
+    def snapshot(self):
+        """Capture the world as a snapshot dict (see capture_snapshot)"""
+        with self:
+            return capture_snapshot()
+
+    def restore(self, snapshot):
+        """Restore a snapshot taken from this or another simulation"""
+        with self:
+            restore_snapshot(snapshot)
+
+_pristine_simulation_state = copy.deepcopy({name: globals()[name] for name in SIMULATION_STATE
+                                            if name != 'event_sequence'})
+
+def _state_fingerprint(value):
+    """Comparable digest of a piece of simulation state: arrays by content, containers item by item"""
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, dict):
+        return tuple((key, _state_fingerprint(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple, collections.deque)):
+        return tuple(_state_fingerprint(item) for item in value)
+    return repr(value)
+
+def _world_fingerprints():
+    """Fingerprints of every module global the installed world sees, except SIMULATION_SHARED_STATE"""
+    return {name: _state_fingerprint(value) for name, value in globals().items()
+            if (name in SIMULATION_STATE or (name == name.lower() and not name.startswith('_')))
+            and name not in SIMULATION_SHARED_STATE
+            and not callable(value) and not isinstance(value, types.ModuleType)}
+
+def check_simulation_isolation(frames=SIMULATION_ISOLATION_FRAMES):
+    """Step world A hard while world B runs a quiet solar system, and check A never reaches into B.
+
+    A gets a black hole, a spaceship, a fleet, a 4x time warp, the ship
+    camera and a particle budget. No global B sees, other than those in
+    SIMULATION_SHARED_STATE, may change while A steps, and B advanced in
+    turn with A must end exactly where a twin of B advanced alone does.
+    Returns the names that broke either rule; an empty list means the
+    worlds are isolated.
+    """
+    alone, world_b, world_a = Simulation(), Simulation(), Simulation()
+    leaked = set()
+
+    def check_world_b(seen):
+        """Fingerprint what B sees now and note every global that moved since `seen`"""
+        with world_b:
+            now = _world_fingerprints()
+        leaked.update(name for name in seen.keys() | now.keys() if seen.get(name) != now.get(name))
+
+    with world_b:
+        seen = _world_fingerprints()
+    with world_a:
+        world_a.trigger_black_hole()
+        world_a.spawn_spaceship()
+        world_a.spawn_fleet(10)
+        for _ in range(2):
+            change_time_scale(+1)
+        request_camera_transition(1)
+        set_particle_budget(PARTICLE_BUDGET_RANGE[0])
+    for _ in range(frames):
+        check_world_b(seen)
+        world_a.advance(DT)
+        check_world_b(seen)
+        world_b.advance(DT)
+        alone.advance(DT)
+        with world_b:
+            seen = _world_fingerprints()
+    leaked.update(name for name in SIMULATION_STATE
+                  if _state_fingerprint(world_b.state[name]) != _state_fingerprint(alone.state[name]))
+    leaked = sorted(leaked)
+    log_message("Simulation isolation over {} frames: {}", frames,
+                "worlds are isolated" if not leaked else "world A reached into B through " + ", ".join(leaked))
+    return leaked
+
+# ============================================================================
+# PARTICLE BUDGET
+# (Shared Cap or Frame-Time Target, Priority Scores, Stochastic Reweighted Thinning)
+# ============================================================================
+
+def register_particle_emitter(pool_name, point_sizes=((math.inf, 1.0),)):
+    """Put the particle pool held in module global `pool_name` under the shared budget.
+
+    `point_sizes` lists (camera distance up to, point size in pixels) steps
+    the pool is drawn with; beyond the last step a particle is not drawn.
+    The pool needs a 'weight' field.
+    """
+    particle_emitters[pool_name] = tuple(point_sizes)
+
+def set_particle_budget(cap=None, frame_target=None):
+    """Bound the live emitter particles by `cap`, or adapt the cap so particle updates take `frame_target` seconds per step"""
+    if cap is not None:
+        particle_budget['cap'] = int(np.clip(cap, *PARTICLE_BUDGET_RANGE))
+    particle_budget['frame_target'] = frame_target
+    particle_budget['cost_per_particle'] = 0.0
+
+def budgeted_particle_count():
+    """Live particles across every emitter pool (sharded debris is not budgeted)"""
+    module = globals()
+    total = 0
+    for name in particle_emitters:
+        total += module[name]['count']
+    return total
+
+def adapt_particle_budget(elapsed):
+    """Fold one step's particle update time into the per-particle cost and retarget the cap"""
+    target = particle_budget['frame_target']
+    count = budgeted_particle_count()
+    if target is None or not count or debris_shards is not None:
+        return
+    cost = elapsed / count
+    smoothed = particle_budget['cost_per_particle']
+    smoothed = cost if smoothed == 0.0 else smoothed + (cost - smoothed) * PARTICLE_BUDGET_SMOOTHING
+    particle_budget['cost_per_particle'] = smoothed
+    particle_budget['cap'] = int(np.clip(target / smoothed, *PARTICLE_BUDGET_RANGE))
+
+def particle_priority(pool, point_sizes, camera_pos):
+    """Priority of every live particle of a pool, in [PARTICLE_PRIORITY_FLOOR, 1].
+
+    Blends the drawn point size, remaining lifetime, nearness to the camera
+    and nearness to the event horizon with PARTICLE_PRIORITY_WEIGHTS.
+    """
+    count = pool['count']
+    position = pool['position'][:count] + pool['origin']
+    offset = position - camera_pos
+    camera_distance = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+    limits = np.array([limit for limit, _ in point_sizes])
+    sizes = np.array([size for _, size in point_sizes] + [0.0])
+    size = sizes[np.searchsorted(limits, camera_distance)] / sizes.max()
+    age = 1.0 - np.clip(pool['age'][:count] / pool['lifetime'][:count], 0.0, 1.0)
+    camera = 1.0 / (1.0 + camera_distance / max(camera_state['distance'], 1.0))
+    if is_black_hole_active:
+        offset = position - black_hole_position
+        horizon = np.minimum(1.0, BLACK_HOLE_ZONE_EDGES[2] / np.maximum(np.sqrt(np.einsum('ij,ij->i', offset, offset)),
+                                                                        BLACK_HOLE_VISUAL_RADIUS))
+    else:
+        horizon = np.zeros(count)
+    weights = PARTICLE_PRIORITY_WEIGHTS
+    score = (weights['size'] * size + weights['age'] * age + weights['camera'] * camera
+             + weights['horizon'] * horizon) / sum(weights.values())
+    return np.maximum(score, PARTICLE_PRIORITY_FLOOR)
+
+def keep_probabilities(priority, budget):
+    """Per-particle keep probabilities min(1, c * priority) whose sum is `budget`"""
+    if budget >= len(priority):
+        return np.ones(len(priority))
+    ordered = np.sort(priority)[::-1]
+    tail = np.cumsum(ordered[::-1])[::-1]
+    scale = (budget - np.arange(len(ordered))) / tail
+    # The first k particles are always kept, for the smallest k the remaining scale allows
+    first = int(np.argmax(scale * ordered <= 1.0))
+    return np.minimum(1.0, scale[first] * priority)
+
+def enforce_particle_budget():
+    """Thin the emitter pools down to the cap, favouring high-priority particles.
+
+    Survivors are chosen by systematic sampling with the keep probabilities
+    of keep_probabilities(), so exactly the budget (give or take one) is kept.
+    Each survivor's weight, which scales its brightness, is divided by its
+    keep probability, so the expected total weight is unchanged. Returns the
+    number of particles shed.
+    """
+    total = budgeted_particle_count()
+    cap = particle_budget['cap']
+    if total <= cap:
+        return 0
+    module = globals()
+    pools = [(module[name], point_sizes) for name, point_sizes in particle_emitters.items()]
+    camera_pos = np.array([0.0, 0.0, camera_state['distance']])
+    priority = np.concatenate([particle_priority(pool, point_sizes, camera_pos) for pool, point_sizes in pools])
+    probability = keep_probabilities(priority, cap)
+    cumulative = np.cumsum(probability) + np.random.default_rng(random.getrandbits(32)).random()
+    keep = np.floor(cumulative) > np.floor(cumulative - probability)
+
+    start = 0
+    for pool, _ in pools:
+        stop = start + pool['count']
+        kept = keep[start:stop]
+        pool['weight'][:pool['count']][kept] /= probability[start:stop][kept]
+        compact_particle_pool(pool, kept)
+        start = stop
+    shed = total - int(np.count_nonzero(keep))
+    particle_budget['shed'] += shed
+    return shed
+
+# ============================================================================
+# RAY PICKING
+# (Unprojected Mouse Rays, Morton-Ordered BVH Over Bounding Spheres, Per-Frame Refit)
+# ============================================================================
+
+PICK_KIND_NAMES = {'sun': 'Sun', 'black_hole': 'black hole', 'spaceship': 'Star Destroyer',
+                   'planet': 'planet', 'minor_body': 'minor body'}
+
+def screen_ray(x, y):
+    """World-space (origin, unit direction) of the ray through window pixel (x, y), y down as GLUT reports it"""
+    width, height = VIEWPORT_SIZE
+    ndc_x = 2.0 * (x + 0.5) / width - 1.0
+    ndc_y = 1.0 - 2.0 * (y + 0.5) / height
+    inverse = np.linalg.inv(camera_matrices['projection'] @ camera_matrices['view'])
+    near = inverse @ np.array([ndc_x, ndc_y, -1.0, 1.0])
+    far = inverse @ np.array([ndc_x, ndc_y, 1.0, 1.0])
+    near = near[:3] / near[3]
+    far = far[:3] / far[3]
+    return near, normalize_vector(far - near)
+
+def pick_slope():
+    """Cone slope (radius gained per unit of distance) that covers PICK_PIXEL_TOLERANCE pixels"""
+    return 2.0 * math.tan(math.radians(CAMERA_FOV) / 2.0) / VIEWPORT_SIZE[1] * PICK_PIXEL_TOLERANCE
+
+def pick_targets():
+    """Bounding spheres of everything that can be picked, as (centers, radii, layout).
+
+    The layout is a tuple of (kind, count) segments in array order: the Sun,
+    the black hole, the ship, the free planets and the minor bodies.
+    """
+    centers = []
+    radii = []
+    layout = []
+
+    def add(kind, center, radius):
+        centers.append(np.asarray(center, dtype=np.float64).reshape(-1, 3))
+        radii.append(np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(centers[-1]),)))
+        layout.append((kind, len(centers[-1])))
+
+    if sun_exists and is_solar_system_active:
+        add('sun', sun_position, current_sun_radius)
+    if is_black_hole_active:
+        add('black_hole', black_hole_position, BLACK_HOLE_VISUAL_RADIUS)
+    if spaceship_exists:
+        add('spaceship', spaceship_position, spaceship_scale * 2.0)
+    add('planet', [planet['position'] for planet in planets], [planet['radius'] for planet in planets])
+    count = minor_bodies['count']
+    add('minor_body', minor_bodies['position'][:count] + minor_bodies['origin'], 0.0)
+    return np.concatenate(centers), np.concatenate(radii), tuple(layout)
+
+def _morton_codes(points):
+    """30-bit Morton codes of points quantized to a 1024^3 grid over their bounding box"""
+    lower = points.min(axis=0)
+    span = max(float(np.max(points.max(axis=0) - lower)), 1e-9)
+    quantized = ((points - lower) * (1023.0 / span)).astype(np.uint64)
+    spread = quantized
+    for shift, mask in ((16, 0x030000FF), (8, 0x0300F00F), (4, 0x030C30C3), (2, 0x09249249)):
+        spread = (spread | (spread << np.uint64(shift))) & np.uint64(mask)
+    return spread[:, 0] | (spread[:, 1] << np.uint64(1)) | (spread[:, 2] << np.uint64(2))
+
+def build_pick_bvh(centers, radii, layout):
+    """Build a BVH over bounding spheres.
+
+    Spheres are sorted along a Morton curve and packed PICK_LEAF_SIZE to a
+    leaf; the leaves form a complete binary tree stored level by level, so
+    refitting is a few whole-array reductions and never reorders anything.
+    """
+    count = len(centers)
+    leaves = 1
+    while leaves * PICK_LEAF_SIZE < count:
+        leaves *= 2
+    order = np.full(leaves * PICK_LEAF_SIZE, -1, dtype=np.int64)
+    if count:
+        order[:count] = np.argsort(_morton_codes(centers), kind='stable')
+    ranges = []
+    start = 0
+    for kind, size in layout:
+        ranges.append((kind, start, start + size))
+        start += size
+    bvh = {'order': order, 'count': count, 'layout': layout, 'layout_ranges': ranges, 'levels': [],
+           'lower': np.full((len(order), 3), np.inf), 'upper': np.full((len(order), 3), -np.inf),
+           'sphere_radius': np.zeros((count, 1))}
+    bvh['build_extent'] = refit_pick_bvh(bvh, centers, radii)
+    return bvh
+
+def _reduce_groups(ufunc, values, group):
+    """Combine each run of `group` rows of an (N, 3) array with a binary ufunc, halving the run each pass"""
+    grouped = values.reshape(-1, group, 3)
+    while grouped.shape[1] > 1:
+        half = grouped.shape[1] // 2
+        grouped = ufunc(grouped[:, :half], grouped[:, half:])
+    return grouped[:, 0]
+
+def refit_pick_bvh(bvh, centers, radii):
+    """Recompute every node box bottom-up from the current spheres; returns the summed leaf diagonal"""
+    count = bvh['count']
+    order = bvh['order'][:count]
+    lower = bvh['lower']
+    upper = bvh['upper']
+    sphere_radius = bvh['sphere_radius']
+    np.take(centers, order, axis=0, out=lower[:count])
+    np.take(radii, order, out=sphere_radius[:, 0])
+    np.add(lower[:count], sphere_radius, out=upper[:count])
+    lower[:count] -= sphere_radius
+    lower = _reduce_groups(np.minimum, lower, PICK_LEAF_SIZE)
+    upper = _reduce_groups(np.maximum, upper, PICK_LEAF_SIZE)
+    levels = [(lower, upper)]
+    while len(lower) > 1:
+        lower = _reduce_groups(np.minimum, lower, 2)
+        upper = _reduce_groups(np.maximum, upper, 2)
+        levels.append((lower, upper))
+    bvh['levels'] = levels[::-1]
+    diagonal = levels[0][1] - levels[0][0]
+    filled = np.isfinite(diagonal[:, 0])
+    return float(np.sqrt(np.einsum('ij,ij->i', diagonal[filled], diagonal[filled])).sum())
+
+def pick_offset(bvh, kind):
+    """Index of the first sphere of a kind in the arrays the BVH was built over"""
+    for segment_kind, start, _ in bvh['layout_ranges']:
+        if segment_kind == kind:
+            return start
+    raise KeyError(kind)
+
+def _cone_hits(center, radius, origin, direction, slope):
+    """Distance along the ray of spheres touched by the cone around it (NaN where missed or behind)"""
+    offset = center - origin
+    along = offset @ direction
+    across_sq = np.einsum('ij,ij->i', offset, offset) - along * along
+    reach = radius + slope * np.maximum(along, 0.0)
+    with np.errstate(invalid='ignore'):
+        return np.where((across_sq <= reach * reach) & (along + radius >= 0.0), along, np.nan)
+
+def query_pick_bvh(bvh, centers, radii, origin, direction, slope=0.0):
+    """Index of the nearest sphere hit by the ray (widened by `slope`), or -1"""
+    if not bvh['count']:
+        return -1
+    origin = np.asarray(origin, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+    nodes = np.zeros(1, dtype=np.int64)
+    last = len(bvh['levels']) - 1
+    with np.errstate(invalid='ignore'):
+        for depth, (lower, upper) in enumerate(bvh['levels']):
+            box_lower = lower[nodes]
+            box_upper = upper[nodes]
+            half = 0.5 * (box_upper - box_lower)
+            # Box-bounding sphere; the radius is grown by that much again so the cone test stays conservative
+            node_radius = np.sqrt(np.einsum('ij,ij->i', half, half))
+            nodes = nodes[np.isfinite(_cone_hits(box_lower + half, node_radius * (1.0 + slope), origin,
+                                                 direction, slope))]
+            if not len(nodes):
+                return -1
+            if depth < last:
+                nodes = (nodes[:, None] * 2 + np.arange(2)).ravel()
+    candidates = bvh['order'][(nodes[:, None] * PICK_LEAF_SIZE + np.arange(PICK_LEAF_SIZE)).ravel()]
+    candidates = candidates[candidates >= 0]
+    distance = _cone_hits(centers[candidates], radii[candidates], origin, direction, slope)
+    if np.all(np.isnan(distance)):
+        return -1
+    return int(candidates[np.nanargmin(distance)])
+
+def benchmark_picking(bodies=PICK_BENCHMARK_BODIES, clicks=PICK_BENCHMARK_CLICKS, seed=0):
+    """Time BVH build, per-frame refit and picks at random pixels with `bodies` minor bodies, checked against brute force.
+
+    Returns (build seconds, refit seconds, seconds per pick, matches).
+    """
+    sim = Simulation()
+    sim.add_asteroid_belt(count=bodies, seed=seed)
+    with sim:
+        camera_state['distance'] = 700.0
+        camera_state['elevation'] = 35.0
+        view_from = np.array([0.0, -1.0, 0.55]) * 700.0
+        camera_matrices['projection'] = perspective_matrix(CAMERA_FOV, CAMERA_ASPECT, CAMERA_NEAR, CAMERA_FAR)
+        camera_matrices['view'] = look_at_matrix(view_from, np.zeros(3), CAMERA_UP)
+        start = time.perf_counter()
+        sim.refit_picking()
+        build = time.perf_counter() - start
+        sim.step(1)
+        start = time.perf_counter()
+        sim.refit_picking()
+        refit = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    pixels = rng.uniform(0, 1, (clicks, 2)) * VIEWPORT_SIZE
+    rays = [screen_ray(x, y) for x, y in pixels]
+    slope = pick_slope()
+    start = time.perf_counter()
+    picks = [sim.pick(origin, direction, slope) for origin, direction in rays]
+    per_pick = (time.perf_counter() - start) / clicks
+
+    centers, radii = sim._pick_targets
+    matches = 0
+    for (origin, direction), picked in zip(rays, picks):
+        distance = _cone_hits(centers, radii, origin, direction, slope)
+        expected = None if np.all(np.isnan(distance)) else int(np.nanargmin(distance))
+        found = None if picked is None else pick_offset(sim._pick_bvh, picked[0]) + picked[1]
+        matches += expected == found
+    log_message("Picking benchmark: {} targets, build {:.1f} ms, refit {:.1f} ms, {:.0f} us per pick, {}/{} match brute force",
+                len(centers), build * 1000.0, refit * 1000.0, per_pick * 1e6, matches, clicks)
+    return build, refit, per_pick, matches
+
+# ============================================================================
+# CHEBYSHEV EPHEMERIS
+# (Precomputed Orbits as Piecewise Chebyshev Series in a Memory-Mapped File)
+# ============================================================================
+
+def _chebyshev_basis(x, degree):
+    """T_0..T_degree and their derivatives at x (scalar or array), shaped (degree + 1, ...)"""
+    x = np.asarray(x, dtype=np.float64)
+    basis = np.empty((degree + 1,) + x.shape)
+    slope = np.empty_like(basis)
+    basis[0] = 1.0
+    slope[0] = 0.0
+    if degree:
+        basis[1] = x
+        slope[1] = 1.0
+    for k in range(2, degree + 1):
+        basis[k] = 2.0 * x * basis[k - 1] - basis[k - 2]
+        slope[k] = 2.0 * basis[k - 1] + 2.0 * x * slope[k - 1] - slope[k - 2]
+    return basis, slope
+
+def ephemeris_end(table):
+    """Last simulation time a table covers"""
+    header = table['header']
+    return header['start_time'] + header['segments'] * header['segment_duration']
+
+def ephemeris_covers(table, when):
+    """True if `when` lies inside the table's time span"""
+    return table['header']['start_time'] <= when <= ephemeris_end(table)
+
+def evaluate_ephemeris(table, when):
+    """Positions and velocities of every body of a table at simulation time(s) `when`.
+
+    A scalar time gives (bodies, 3) arrays, an array of M times (M, bodies, 3).
+    No integration is involved: each time picks its segment and sums the series.
+    """
+    header = table['header']
+    duration = header['segment_duration']
+    times = np.atleast_1d(np.asarray(when, dtype=np.float64))
+    offset = (times - header['start_time']) / duration
+    segment = np.clip(np.floor(offset).astype(np.int64), 0, header['segments'] - 1)
+    basis, slope = _chebyshev_basis(2.0 * (offset - segment) - 1.0, header['degree'])
+    coefficients = table['coefficients'][segment]
+    position = np.einsum('mbad,dm->mba', coefficients, basis)
+    velocity = np.einsum('mbad,dm->mba', coefficients, slope) * (2.0 / duration)
+    if np.ndim(when) == 0:
+        return position[0], velocity[0]
+    return position, velocity
+
+def write_ephemeris(path, header, coefficients):
+    """Write a JSON header padded to EPHEMERIS_HEADER_SIZE followed by the raw float64 coefficients"""
+    header_bytes = EPHEMERIS_MAGIC + json.dumps(header).encode('utf-8')
+    if len(header_bytes) > EPHEMERIS_HEADER_SIZE:
+        raise ValueError("Ephemeris header does not fit in EPHEMERIS_HEADER_SIZE")
+    with open(path, 'wb') as handle:
+        handle.write(header_bytes.ljust(EPHEMERIS_HEADER_SIZE, b'\0'))
+        np.ascontiguousarray(coefficients, dtype=np.float64).tofile(handle)
+
+def open_ephemeris(path=EPHEMERIS_PATH):
+    """Memory-map an ephemeris file; the coefficients are (segments, bodies, 3, degree + 1)"""
+    with open(path, 'rb') as handle:
+        raw_header = handle.read(EPHEMERIS_HEADER_SIZE)
+    if not raw_header.startswith(EPHEMERIS_MAGIC):
+        raise ValueError(f"{path} is not an ephemeris file")
+    header = json.loads(raw_header[len(EPHEMERIS_MAGIC):].rstrip(b'\0').decode('utf-8'))
+    if header['version'] != EPHEMERIS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported ephemeris format version {header['version']}")
+    shape = (header['segments'], len(header['names']), 3, header['degree'] + 1)
+    coefficients = np.memmap(path, dtype=np.float64, mode='r', offset=EPHEMERIS_HEADER_SIZE, shape=shape)
+    return {'path': path, 'header': header, 'coefficients': coefficients}
+
+def build_ephemeris(path=EPHEMERIS_PATH, span=EPHEMERIS_SPAN, segment_steps=EPHEMERIS_SEGMENT_STEPS,
+                    degree=EPHEMERIS_DEGREE):
+    """Precompute the current solar system and store it as a Chebyshev ephemeris.
+
+    A copy of the world is advanced `span` seconds with the live physics step.
+    Each planet's sampled path is fitted by least squares, `segment_steps`
+    steps per segment with series of `degree`. Writes `path` and returns a
+    report of the fit error against the integrator samples and of the
+    evaluation cost.
+    """
+    global current_time, simulation_time
+    if not planets:
+        init_planets()
+    if not kepler_field_active():
+        raise ValueError("An ephemeris can only be built while the Sun alone holds the planets")
+    names = [planet['name'] for planet in planets if not planet['captured']]
+    segments = max(1, int(round(span / (segment_steps * DT))))
+    steps = segments * segment_steps
+    start_time, start_clock, snapshot = simulation_time, current_time, capture_snapshot()
+
+    start = time.perf_counter()
+    clone = Simulation()
+    position = np.empty((steps + 1, len(names), 3))
+    velocity = np.empty_like(position)
+    with clone:
+        simulation_time, current_time = start_time, start_clock
+        restore_snapshot(snapshot)
+        bodies = [planet for planet in planets if not planet['captured']]
+        for step in range(steps + 1):
+            if step:
+                current_time += DT
+                update_physics(DT)
+                handle_sequences(DT)
+            for k, planet in enumerate(bodies):
+                position[step, k] = planet['position']
+                velocity[step, k] = planet['velocity']
+    integrate_seconds = time.perf_counter() - start
+
+    # Least-squares fit shared by every segment: samples sit at the same points of [-1, 1]
+    nodes = np.linspace(-1.0, 1.0, segment_steps + 1)
+    fit = np.linalg.pinv(np.polynomial.chebyshev.chebvander(nodes, degree))
+    windows = np.arange(segments)[:, None] * segment_steps + np.arange(segment_steps + 1)
+    coefficients = np.einsum('dj,sjba->sbad', fit, position[windows])
+    header = {
+        'version': EPHEMERIS_FORMAT_VERSION,
+        'names': names,
+        'start_time': start_time,
+        'segment_duration': segment_steps * DT,
+        'segment_steps': segment_steps,
+        'segments': segments,
+        'degree': degree,
+        'dt': DT
+    }
+    write_ephemeris(path, header, coefficients)
+
+    table = open_ephemeris(path)
+    sample_times = start_time + np.arange(steps + 1) * DT
+    fitted_position, fitted_velocity = evaluate_ephemeris(table, sample_times)
+    position_error = np.linalg.norm(fitted_position - position, axis=2)
+    speed = np.linalg.norm(velocity, axis=2)
+    velocity_error = np.linalg.norm(fitted_velocity - velocity, axis=2) / np.maximum(speed, 1e-12)
+    probe = np.random.default_rng(0).uniform(start_time, ephemeris_end(table), EPHEMERIS_BENCHMARK_CALLS)
+    start = time.perf_counter()
+    for when in probe:
+        evaluate_ephemeris(table, when)
+    per_call = (time.perf_counter() - start) / EPHEMERIS_BENCHMARK_CALLS
+    report = {
+        'path': path,
+        'bodies': len(names),
+        'span': segments * segment_steps * DT,
+        'bytes': os.path.getsize(path),
+        'integrate_seconds': integrate_seconds,
+        'max_position_error': float(position_error.max()),
+        'rms_position_error': float(np.sqrt(np.mean(position_error ** 2))),
+        'max_relative_velocity_error': float(velocity_error.max()),
+        'eval_seconds_per_call': per_call,
+        'eval_seconds_per_body': per_call / len(names)
+    }
+    log_message("Ephemeris {}: {} bodies over {:.0f} s in {} segments ({} KiB, integrated in {:.1f} s)",
+                path, len(names), report['span'], segments, report['bytes'] // 1024, integrate_seconds)
+    log_message("Ephemeris fit: max position error {:.2e} (rms {:.2e}), max relative velocity error {:.2e}; "
+                "evaluation {:.1f} us per call, {:.2f} us per body",
+                report['max_position_error'], report['rms_position_error'], report['max_relative_velocity_error'],
+                per_call * 1e6, report['eval_seconds_per_body'] * 1e6)
+    return report
+
+def attach_ephemeris(table):
+    """Drive the free planets from `table` instead of integrating them.
+
+    Refused (returns False) unless the field is the quiet solar system, the
+    current time is inside the table and every free planet is in it and sits
+    within EPHEMERIS_MATCH_TOLERANCE of its tabulated position.
+    """
+    global ephemeris
+    bodies = [planet for planet in planets if not planet['captured']]
+    names = table['header']['names']
+    if not kepler_field_active() or not ephemeris_covers(table, simulation_time):
+        log_message("Ephemeris {} does not cover the current state, integrating live", table['path'])
+        return False
+    if sorted(planet['name'] for planet in bodies) != sorted(names):
+        log_message("Ephemeris {} was built for other planets, integrating live", table['path'])
+        return False
+    rows = np.array([names.index(planet['name']) for planet in bodies], dtype=np.int64)
+    position, _ = evaluate_ephemeris(table, simulation_time)
+    mismatch = np.max(np.linalg.norm(position[rows] - np.array([planet['position'] for planet in bodies]), axis=1))
+    if mismatch > EPHEMERIS_MATCH_TOLERANCE:
+        log_message("Ephemeris {} is {:.3g} units off the live planets, integrating live", table['path'], mismatch)
+        return False
+    for planet in bodies:
+        planet.pop('kepler', None)
+    ephemeris = {'table': table, 'bodies': bodies, 'rows': rows}
+    log_message("Planets follow ephemeris {} until {:.0f} s", table['path'], ephemeris_end(table))
+    return True
+
+def reattach_ephemeris():
+    """Check the attached ephemeris still describes the (reset or restored) world, releasing it if not"""
+    table = ephemeris['table']
+    release_ephemeris(quiet=True)
+    attach_ephemeris(table)
+
+def release_ephemeris(quiet=False):
+    """Hand the planets back to live integration, priming their accelerations for the next Verlet step"""
+    global ephemeris
+    if ephemeris is None:
+        return
+    for planet in ephemeris['bodies']:
+        planet['acceleration'] = calculate_gravitational_acceleration(planet['position'])
+    ephemeris = None
+    if not quiet:
+        log_message("Ephemeris released, planets integrated live from {:.2f} s", simulation_time)
+
+def advance_ephemeris_planets():
+    """Set every planet driven by the ephemeris to its tabulated state at the current simulation time"""
+    position, velocity = evaluate_ephemeris(ephemeris['table'], simulation_time)
+    rows = ephemeris['rows']
+    position = position[rows]
+    velocity = velocity[rows]
+    offset = position - sun_position
+    r = np.sqrt(np.einsum('ij,ij->i', offset, offset))
+    acceleration = -G * SUN_MASS * offset / (r ** 3)[:, None]
+    for k, planet in enumerate(ephemeris['bodies']):
+        planet['position'][:] = position[k]
+        planet['velocity'][:] = velocity[k]
+        planet['acceleration'][:] = acceleration[k]
+        extend_orbital_trail(planet)
+
+# ============================================================================
+# ALLOCATION PROBE
+# (Per-Stage Traced Memory, Periodic tracemalloc Snapshots & Resident Set Trend)
+# ============================================================================
+
+def resident_set_size():
+    """Resident set size of the process in bytes, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def start_allocation_probe(every=ALLOCATION_SNAPSHOT_FRAMES):
+    """Start tracing allocations; stages are charged by probe_mark() and frames closed by finish_allocation_frame()"""
+    probe = allocation_probe
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(ALLOCATION_TRACE_DEPTH)
+    probe.update(active=True, every=max(1, every), frames=0, stages={}, growth=[], rss=[])
+    probe['snapshot'] = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    probe['mark'] = tracemalloc.get_traced_memory()[0]
+    for _ in range(2):
+        probe['bias'] = (0, 0)
+        probe_mark(None)
+        bias = probe['stages'].pop(None)
+    probe['bias'] = tuple(bias)
+
+def stop_allocation_probe():
+    """Stop tracing and return the final report"""
+    if not allocation_probe['active']:
+        return None
+    report = allocation_report()
+    allocation_probe['active'] = False
+    allocation_probe['snapshot'] = None
+    tracemalloc.stop()
+    return report
+
+def probe_mark(stage):
+    """Charge what was traced since the previous mark to `stage`.
+
+    The transient figure is the peak of traced memory above the previous
+    mark, i.e. the largest amount the stage had allocated at once; the
+    retained figure is what it left allocated. A no-op unless the probe runs.
+    """
+    probe = allocation_probe
+    if not probe['active']:
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    totals = probe['stages'].get(stage)
+    if totals is None:
+        totals = probe['stages'][stage] = [0, 0]
+    totals[0] += peak - probe['mark'] - probe['bias'][0]
+    totals[1] += current - probe['mark'] - probe['bias'][1]
+    tracemalloc.reset_peak()
+    probe['mark'] = tracemalloc.get_traced_memory()[0]
+
+def finish_allocation_frame():
+    """Close a frame; every `every` frames compare a tracemalloc snapshot with the last one and sample the RSS"""
+    probe = allocation_probe
+    if not probe['active']:
+        return
+    probe['frames'] += 1
+    if probe['frames'] % probe['every']:
+        return
+    snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+    probe['growth'] = [(str(stat.traceback), stat.size_diff, stat.count_diff)
+                       for stat in snapshot.compare_to(probe['snapshot'], 'lineno')[:ALLOCATION_REPORT_LINES]
+                       if stat.size_diff]
+    probe['snapshot'] = snapshot
+    probe['rss'].append((probe['frames'], resident_set_size()))
+    log_allocation_report(allocation_report())
+    tracemalloc.reset_peak()
+    probe['mark'] = tracemalloc.get_traced_memory()[0]
+
+def allocation_report():
+    """Per-stage transient and retained bytes per frame, the latest snapshot growth and the RSS samples"""
+    probe = allocation_probe
+    frames = max(1, probe['frames'])
+    stages = {stage: {'transient_per_frame': transient / frames, 'retained_per_frame': retained / frames}
+              for stage, (transient, retained) in probe['stages'].items()}
+    for totals in stages.values():
+        totals['passing'] = (totals['transient_per_frame'] <= ALLOCATION_TRANSIENT_LIMIT
+                             and totals['retained_per_frame'] <= ALLOCATION_RETAINED_LIMIT)
+    return {
+        'frames': probe['frames'],
+        'stages': stages,
+        'failing': [stage for stage, totals in stages.items() if not totals['passing']],
+        'growth': list(probe['growth']),
+        'rss': list(probe['rss'])
+    }
+
+def log_allocation_report(report):
+    """Log a report from allocation_report()"""
+    stages = ", ".join(f"{stage} {totals['transient_per_frame']:.0f}/{totals['retained_per_frame']:+.0f}"
+                       for stage, totals in report['stages'].items())
+    log_message("Allocations after {} frames (transient/retained B per frame): {}", report['frames'], stages)
+    if report['failing']:
+        log_message("  FAILING (over {:.0f}/{:+.0f} B per frame): {}", ALLOCATION_TRANSIENT_LIMIT,
+                    ALLOCATION_RETAINED_LIMIT, ", ".join(str(stage) for stage in report['failing']))
+    for where, size, count in report['growth']:
+        log_message("  grew {:+d} B in {:+d} blocks at {}", size, count, where)
+    if len(report['rss']) > 1 and report['rss'][0][1] is not None:
+        (first_frame, first_rss), (last_frame, last_rss) = report['rss'][0], report['rss'][-1]
+        log_message("  RSS {:.1f} MiB, {:+.0f} B per frame since frame {}", last_rss / 2 ** 20,
+                    (last_rss - first_rss) / max(1, last_frame - first_frame), first_frame)
+
+def allocation_steady_state_report(steps=ALLOCATION_REPORT_STEPS, warmup=ALLOCATION_WARMUP_STEPS):
+    """Run a fresh solar system headless under the probe, one physics step per frame, and return the report"""
+    world = Simulation()
+    world.step(warmup)
+    with world:
+        # Swap the world in before the probe starts so installing its state is not charged to a stage
+        start_allocation_probe(max(1, steps // 4))
+        for _ in range(steps):
+            world.step()
+            finish_allocation_frame()
+    return stop_allocation_probe()
+
+# ============================================================================
+# SPACESHIP TRAJECTORY PREDICTION
+# (Ship Path Ahead Under the Current Field, Reused Frame to Frame, Coarser Far Out)
+# ============================================================================
+
+def create_trajectory_prediction():
+    """Empty prediction: sample arrays sized for the finest possible spacing over the horizon"""
+    capacity = int(TRAJECTORY_HORIZON / DT) + 8
+    return {
+        'count': 0,
+        'time': np.zeros(capacity),
+        'position': np.zeros((capacity, 3)),
+        'velocity': np.zeros((capacity, 3)),
+        'contact': np.zeros(capacity, dtype=bool),
+        'field': None,
+        'steps': 0,
+        'cost': 0.0
+    }
+
+def trajectory_arrays(prediction):
+    """Views of the live samples of a prediction"""
+    count = prediction['count']
+    return {name: prediction[name][:count] for name in ('time', 'position', 'velocity', 'contact')}
+
+def trajectory_step_multiple(lead):
+    """Prediction step, in DTs, for a sample `lead` seconds ahead of now"""
+    for until, multiple in TRAJECTORY_STEP_BANDS:
+        if lead < until:
+            return multiple
+    return TRAJECTORY_STEP_BANDS[-1][1]
+
+def trajectory_field_signature():
+    """Everything besides the ship that the predicted path depends on, or None while planets are not predictable.
+
+    Planets on Kepler orbits or driven by the ephemeris can be placed at any
+    future time; planets under live integration (during events) cannot.
+    """
+    parts = [sun_exists, is_solar_system_active, current_sun_radius, sequence_stage,
+             is_black_hole_active, black_hole_mass, tuple(sun_position), tuple(black_hole_position)]
+    driven = ephemeris['bodies'] if ephemeris is not None else []
+    for planet in _ship_obstacle_bodies():
+        if 'kepler' in planet:
+            parts.append(tuple(planet['kepler']))
+        elif any(planet is body for body in driven):
+            parts.append(planet['name'])
+        else:
+            return None
+    return tuple(parts)
+
+def predict_ship_obstacles(times):
+    """ship_obstacles() at each of `times`: centres (M, K, 3) and exclusion radii (K,).
+
+    Planets on Kepler orbits are placed exactly, those driven by the
+    ephemeris from its table, and the rest extrapolated from their current
+    velocity and acceleration.
+    """
+    bodies = _ship_obstacle_bodies()
+    centres_now, min_dist = ship_obstacles()
+    centres = np.broadcast_to(centres_now, (len(times),) + centres_now.shape).copy()
+    lead = (times - simulation_time)[:, None]
+    table_rows = {}
+    if ephemeris is not None:
+        table_rows = {id(body): row for body, row in zip(ephemeris['bodies'], ephemeris['rows'])}
+    analytic = [k for k, planet in enumerate(bodies) if 'kepler' in planet]
+    if analytic:
+        rows = np.array([bodies[k]['kepler'] for k in analytic])
+        offset, _ = kepler_state_at(np.tile(rows, (len(times), 1)), np.repeat(times, len(analytic)), G * SUN_MASS)
+        centres[:, analytic] = offset.reshape(len(times), len(analytic), 3) + sun_position
+    tabulated = [k for k, planet in enumerate(bodies) if id(planet) in table_rows]
+    if tabulated:
+        position, _ = evaluate_ephemeris(ephemeris['table'], times)
+        centres[:, tabulated] = position[:, [table_rows[id(bodies[k])] for k in tabulated]]
+    for k, planet in enumerate(bodies):
+        if 'kepler' not in planet and id(planet) not in table_rows:
+            centres[:, k] += planet['velocity'] * lead + 0.5 * planet['acceleration'] * (lead * lead)
+    return centres, min_dist
+
+def _drop_trajectory_samples(prediction, first):
+    """Remove the first `first` samples"""
+    count = prediction['count']
+    for name in ('time', 'position', 'velocity', 'contact'):
+        prediction[name][:count - first] = prediction[name][first:count].copy()
+    prediction['count'] = count - first
+
+def _trajectory_matches_ship(prediction, now):
+    """True if the ship is where the prediction put it at `now` (no thrust or teleport since)"""
+    t0, t1 = prediction['time'][:2]
+    weight = (now - t0) / (t1 - t0)
+    position = prediction['position'][0] + weight * (prediction['position'][1] - prediction['position'][0])
+    velocity = prediction['velocity'][0] + weight * (prediction['velocity'][1] - prediction['velocity'][0])
+    return (np.max(np.abs(position - spaceship_position)) <= TRAJECTORY_REUSE_TOLERANCE
+            and np.max(np.abs(velocity - spaceship_velocity)) <= TRAJECTORY_REUSE_TOLERANCE)
+
+def _first_stale_sample(prediction):
+    """Index of the first sample the current field may change: a contact, or a point now inside a body.
+
+    Away from bodies a ship that ignores gravity moves the same in any
+    field, so only those samples need re-checking.
+    """
+    count = prediction['count']
+    centres, min_dist = predict_ship_obstacles(prediction['time'][1:count])
+    offset = prediction['position'][1:count, None, :] - centres
+    reach = np.maximum(0.1, min_dist)
+    stale = prediction['contact'][1:count] | (np.einsum('ijk,ijk->ij', offset, offset) < reach * reach).any(axis=1)
+    return 1 + int(np.argmax(stale)) if stale.any() else count
+
+def _extend_trajectory(prediction, now):
+    """Integrate from the last sample out to `now` + TRAJECTORY_HORIZON; returns the number of steps taken"""
+    count = prediction['count']
+    end = now + TRAJECTORY_HORIZON
+    when = prediction['time'][count - 1]
+    multiples = []
+    times = []
+    while when < end - 0.5 * DT:
+        multiple = trajectory_step_multiple(when - now)
+        when += multiple * DT
+        multiples.append(multiple)
+        times.append(when)
+    if not times:
+        return 0
+    if count + len(times) > len(prediction['time']):
+        for name in ('time', 'position', 'velocity', 'contact'):
+            grown = np.zeros((count + len(times),) + prediction[name].shape[1:], dtype=prediction[name].dtype)
+            grown[:count] = prediction[name][:count]
+            prediction[name] = grown
+    centres, min_dist = predict_ship_obstacles(np.array(times))
+    position = prediction['position'][count - 1:count].copy()
+    velocity = prediction['velocity'][count - 1:count].copy()
+    for k, multiple in enumerate(multiples):
+        damping, travel = TRAJECTORY_STEP_DRIFT[multiple]
+        if SPACESHIP_GRAVITY_SCALE:
+            velocity[0] += calculate_gravitational_acceleration(position[0]) * (SPACESHIP_GRAVITY_SCALE * multiple * DT)
+        position = drift_ships(position, velocity, travel, damping)
+        index = count + k
+        prediction['contact'][index] = push_ships_out(position, velocity, (centres[k], min_dist))
+        prediction['time'][index] = times[k]
+        prediction['position'][index] = position[0]
+        prediction['velocity'][index] = velocity[0]
+    prediction['count'] = count + len(times)
+    return len(times)
+
+def update_trajectory_prediction(prediction):
+    """Bring a prediction up to the current time, reusing what still holds, and return the steps integrated.
+
+    Samples behind the ship are dropped. If the ship is not where the
+    prediction put it (thrust), everything is integrated again from the
+    ship. Otherwise the kept samples run up to the first one the field can
+    have changed: all of them while the field is unchanged, else up to the
+    first contact or body overlap (from the ship if it feels gravity). The
+    path is then extended to the horizon with steps that grow with distance
+    ahead, each equal to that many DT steps of free flight.
+    """
+    start = time.perf_counter()
+    if not spaceship_exists:
+        prediction['count'] = 0
+        prediction['steps'] = 0
+        return 0
+    now = simulation_time
+    count = prediction['count']
+    if count:
+        first = max(int(np.searchsorted(prediction['time'][:count], now, side='right')) - 1, 0)
+        if first:
+            _drop_trajectory_samples(prediction, first)
+    signature = trajectory_field_signature()
+    reuse = (prediction['count'] >= 2 and prediction['time'][0] <= now
+             and _trajectory_matches_ship(prediction, now))
+    if reuse and (signature is None or signature != prediction['field']):
+        if SPACESHIP_GRAVITY_SCALE:
+            reuse = False
+        else:
+            prediction['count'] = _first_stale_sample(prediction)
+    if not reuse:
+        prediction['count'] = 1
+        prediction['time'][0] = now
+        prediction['position'][0] = spaceship_position
+        prediction['velocity'][0] = spaceship_velocity
+        prediction['contact'][0] = False
+    prediction['field'] = signature
+    steps = prediction['steps'] = _extend_trajectory(prediction, now)
+    prediction['cost'] += (time.perf_counter() - start - prediction['cost']) * TRAJECTORY_COST_SMOOTHING
+    return steps
+
+def toggle_trajectory_overlay():
+    """U: show or hide the spaceship's predicted path"""
+    global trajectory_overlay
+    trajectory_overlay = not trajectory_overlay
+    log_message("Trajectory prediction {}", "on" if trajectory_overlay else "off")
+
+def draw_trajectory_prediction():
+    """Draw the predicted path as points fading with time ahead, contacts in red"""
+    if not spaceship_exists or trajectory_prediction is None or trajectory_prediction['count'] < 2:
+        return
+    arrays = trajectory_arrays(trajectory_prediction)
+    count = len(arrays['time']) - 1
+    vertices, colors, _ = _render_buffers('trajectory', count)
+    vertices[:count] = arrays['position'][1:]
+    fade = 1.0 - 0.8 * np.clip((arrays['time'][1:] - simulation_time) / TRAJECTORY_HORIZON, 0.0, 1.0)
+    colors[:count] = np.where(arrays['contact'][1:, None], TRAJECTORY_CONTACT_COLOR, TRAJECTORY_COLOR) * fade[:, None]
+    draw_point_arrays(vertices[:count], colors[:count], TRAJECTORY_POINT_SIZE)
+
+def benchmark_trajectory(frames=TRAJECTORY_BENCHMARK_FRAMES, seed=0):
+    """Fly the spaceship through the initial solar system with random thrust and time the prediction.
+
+    Each frame is one physics step. Reports the incremental update against
+    integrating the whole path afresh, and the largest gap between a
+    prediction made after each thrust and the flight that followed.
+    """
+    global spaceship_velocity
+    rng = np.random.default_rng(seed)
+    world = Simulation()
+    with world:
+        spawn_spaceship_near_selected_planet()
+        incremental = create_trajectory_prediction()
+        incremental_cost = full_cost = 0.0
+        incremental_steps = full_steps = 0
+        pending = []
+        worst = 0.0
+        for frame in range(frames):
+            if frame % TRAJECTORY_BENCHMARK_THRUST_FRAMES == 0:
+                spaceship_velocity = spaceship_velocity + rng.normal(0.0, 30.0, 3)
+            world.step()
+            start = time.perf_counter()
+            incremental_steps += update_trajectory_prediction(incremental)
+            incremental_cost += time.perf_counter() - start
+            start = time.perf_counter()
+            full_steps += update_trajectory_prediction(create_trajectory_prediction())
+            full_cost += time.perf_counter() - start
+            if frame % TRAJECTORY_BENCHMARK_THRUST_FRAMES == 0:
+                arrays = trajectory_arrays(incremental)
+                pending.append((arrays['time'].copy(), arrays['position'].copy()))
+            # Compare each prediction with the flight until the next thrust
+            for times, positions in pending:
+                k = int(np.searchsorted(times, simulation_time - 0.5 * DT))
+                if k < len(times) and abs(times[k] - simulation_time) < 0.5 * DT:
+                    worst = max(worst, float(np.max(np.abs(positions[k] - spaceship_position))))
+            if frame % TRAJECTORY_BENCHMARK_THRUST_FRAMES == TRAJECTORY_BENCHMARK_THRUST_FRAMES - 1:
+                pending = []
+    report = {
+        'frames': frames,
+        'incremental_ms_per_frame': incremental_cost / frames * 1000.0,
+        'incremental_steps_per_frame': incremental_steps / frames,
+        'full_ms_per_frame': full_cost / frames * 1000.0,
+        'full_steps_per_frame': full_steps / frames,
+        'max_prediction_error': worst
+    }
+    log_message("Trajectory benchmark over {} frames: incremental {:.3f} ms/frame ({:.1f} steps), "
+                "full {:.3f} ms/frame ({:.1f} steps), max error until next thrust {:.3g}",
+                frames, report['incremental_ms_per_frame'], report['incremental_steps_per_frame'],
+                report['full_ms_per_frame'], report['full_steps_per_frame'], worst)
+    return report
+
+# ============================================================================
+# KEYBOARD & MOUSE FUNCTIONS
+# ============================================================================
+
+# SHAHID GALIB - VISUAL FOUNDATION & SOLAR SYSTEM CONTROLS
+def keyboard_listener(key, x, y):
+    """Handle keyboard input for all simulation controls"""
+    global is_solar_system_active, is_black_hole_active, is_supernova_active
+    global sequence_start_time, sequence_stage, black_hole_mass, selected_planet_index, keys_locked
+    global spaceship_velocity, spaceship_rotation, spaceship_position, spaceship_scale, spaceship_exists
+    global camera_mode, camera_transition_active, camera_transition_start, camera_start_pos, camera_start_target
+    global G
+    global game_state
+    if key == b'\x1b':
+        game_state = GAME_STATE_MENU
+        log_message("Returning to main menu...")
+        return
+    if game_state != GAME_STATE_SIMULATION:
+        return
+
+    event_trigger_keys = [b'b', b'B', b'x', b'X', b'p', b'P']
+    if replay_active and key in event_trigger_keys + [b'r', b'R', b'k', b'K', b'o', b'O']:
+        log_message("Replay mode is active! Press Y to return to the live simulation.")
+        return
+
+    #Feature 4 - Farhan Zarif
+    if key == b'b' or key == b'B':
+        simulation.trigger_black_hole()
         
-        max_dt = DT * 3.0
-        dt = min(dt, max_dt)
+    #Munshi  
+    elif key == b'x' or key == b'X':
+        simulation.trigger_red_giant()
         
-        accumulated_time = dt
-        while accumulated_time >= DT:
-            update_physics(DT)
-            handle_sequences(DT)
-            accumulated_time -= DT
+    #Galib
+    elif key == b'f' or key == b'F':
+        if planets and selected_planet_index < len(planets):
+            camera_state['target'] = planets[selected_planet_index]['position'].copy()
+            camera_state['is_following_planet'] = True
+            log_message(f"Camera now following {planets[selected_planet_index]['name']}")
+            
+    elif key == b'h' or key == b'H':
+        camera_state['target'] = np.array([0.0, 0.0, 0.0])
+        camera_state['is_following_planet'] = False
+        log_message("Camera centered on origin, following disabled")
+        
+    elif key == b'r' or key == b'R':
+        simulation.reset()
+        log_message("Simulation reset! Keys unlocked.")
+        
+    elif key == b'v' or key == b'V':
+        if spaceship_exists:
+            new_mode = 1 if camera_mode == 0 else (2 if camera_mode == 1 else 0)
+            if new_mode == 0:
+                yaw = math.radians(spaceship_rotation[1])
+                pitch = math.radians(spaceship_rotation[0])
+                forward = np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
+                start_pos = spaceship_position - forward * (spaceship_scale * 8.0) + np.array([0.0, 0.0, spaceship_scale * 3.0])
+                camera_start_pos = start_pos
+                camera_start_target = spaceship_position + forward * (spaceship_scale * 6.0)
+                camera_transition_active = True
+                camera_transition_start = time.time()
+                camera_mode = 0
+            else:
+                request_camera_transition(new_mode)
+    
+    elif key == b'w' or key == b'W':
+        if spaceship_exists:
+            yaw = math.radians(spaceship_rotation[1])
+            pitch = math.radians(spaceship_rotation[0])
+            forward = np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
+            spaceship_velocity += forward * (spaceship_thrust * 0.025)
+    elif key == b's' or key == b'S':
+        if spaceship_exists:
+            yaw = math.radians(spaceship_rotation[1])
+            pitch = math.radians(spaceship_rotation[0])
+            back = -np.array([math.cos(yaw) * math.cos(pitch), math.sin(yaw) * math.cos(pitch), math.sin(pitch)])
+            spaceship_velocity += back * (spaceship_thrust * 0.025)
+    elif key == b'a' or key == b'A':
+        if spaceship_exists:
+            spaceship_rotation[1] -= 8.0
+    elif key == b'd' or key == b'D':
+        if spaceship_exists:
+            spaceship_rotation[1] += 8.0
+    elif key == b'e' or key == b'E':
+        # Pitch up
+        if spaceship_exists:
+            spaceship_rotation[0] += 6.0
+            spaceship_rotation[0] = min(spaceship_rotation[0], 85.0)  
+    elif key == b'q' or key == b'Q':
+        if spaceship_exists:
+            spaceship_rotation[0] -= 6.0
+            spaceship_rotation[0] = max(spaceship_rotation[0], -85.0)  
+    elif key == b'z' or key == b'Z':
+        if spaceship_exists:
+            spaceship_rotation[2] -= 10.0
+    elif key == b'c' or key == b'C':
+   
+        if spaceship_exists:
+            spaceship_rotation[2] += 10.0
+    elif key == b'x' or key == b'X':
+        if spaceship_exists:
+            spaceship_velocity *= 0.3 
+    elif key == b'g' or key == b'G':
+        simulation.spawn_spaceship()
+    elif key == b'u' or key == b'U':
+        toggle_trajectory_overlay()
+    elif key == b'=' or key == b'+':
+        change_time_scale(1)
+    elif key == b'-' or key == b'_':
+        change_time_scale(-1)
+    elif key == b'n' or key == b'N':
+        simulation.spawn_fleet()
+    elif key == b'm' or key == b'M':
+        simulation.cycle_fleet()
+    elif key == b'j' or key == b'J':
+        if len(fleet['position']):
+            simulation.disband_fleet()
+            log_message("Fleet disbanded")
+        else:
+            log_message("No fleet to disband")
+    elif key == b't' or key == b'T':
+        simulation.add_asteroid_belt(seed=int(np.random.randint(2 ** 31)))
+    elif key == b'i' or key == b'I':
+        simulation.add_kuiper_cloud(seed=int(np.random.randint(2 ** 31)))
+    elif key == b'7':
+        if not simulation.add_moons(seed=int(np.random.randint(2 ** 31))):
+            log_message("No planet selected to add moons to")
+    elif key == b'l' or key == b'L':
+        if spaceship_exists:
+            simulation.despawn_spaceship()
+            log_message("Star Destroyer despawned")
+        else:
+            log_message("No spaceship to despawn")
+    elif key == b'h' or key == b'H':
+        camera_state['target'] = np.array([0.0, 0.0, 0.0])
+        camera_state['is_following_planet'] = False
+        log_message("Camera centered on origin, following disabled")
+        
+    elif key == b'p' or key == b'P':
+        #Evan Yuvraj
+        simulation.collision_preset()
+
+    elif key == b'k' or key == b'K':
+        simulation.rewind()
+
+    elif key == b'o' or key == b'O':
+        toggle_recording()
+
+    elif key == b'y' or key == b'Y':
+        toggle_replay()
+
+    elif key == b'[' and replay_active:
+        scrub_replay(-REPLAY_SCRUB_SECONDS)
+
+    elif key == b']' and replay_active:
+        scrub_replay(REPLAY_SCRUB_SECONDS)
+
+    elif key == b' ' and replay_active:
+        replay_state['paused'] = not replay_state['paused']
+    
+    #Shahid Galib
+    elif key == b'5':
+        camera_state['distance'] = max(50.0, camera_state['distance'] - 50.0)
+        log_message("Camera zoom in - Distance: {:.1f}", camera_state['distance'], key='camera_zoom')
+    elif key == b'6':
+        camera_state['distance'] = min(2000.0, camera_state['distance'] + 50.0)
+        log_message("Camera zoom out - Distance: {:.1f}", camera_state['distance'], key='camera_zoom')
+
+def special_key_listener(key, x, y):
+    """Handle special key input (arrow keys)"""
+
+    #Zarif
+    if key == GLUT_KEY_UP:
+        simulation.adjust_black_hole_mass(100.0)
+        
+    elif key == GLUT_KEY_DOWN:
+        simulation.adjust_black_hole_mass(-100.0)
+    
+    #Galib
+    elif key in (GLUT_KEY_LEFT, GLUT_KEY_RIGHT):
+        if planets:
+            simulation.select_planet(selected_planet_index + (1 if key == GLUT_KEY_RIGHT else -1))
+            if camera_state['is_following_planet']:
+                log_message(f"Camera now following {planets[selected_planet_index]['name']}")
+
+    elif key == GLUT_KEY_F5:
+        quicksave_simulation()
+
+    elif key == GLUT_KEY_F9:
+        quickload_simulation()
+#Evan                
+def mouse_listener(button, state, x, y):
+    """Handle mouse clicks: menu navigation, and picking the body under the cursor in the simulation"""
+    global mouse_x, mouse_y
+    
+    mouse_x = x
+    mouse_y = y
+    
+    if game_state == GAME_STATE_MENU:
+        check_menu_button_hover(x, y)
+        glutPostRedisplay()
+        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+            check_menu_button_click(x, y)
+    elif game_state == GAME_STATE_SIMULATION:
+        if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+            picked = simulation.pick(*screen_ray(x, y), pick_slope())
+            if picked is None:
+                log_message("Nothing under the cursor")
+            elif picked[0] == 'planet':
+                simulation.select_planet(picked[1])
+                log_message(f"Selected planet: {planets[selected_planet_index]['name']}")
+            else:
+                camera_state['target'] = simulation.pick_position(picked)
+                camera_state['is_following_planet'] = False
+                log_message(f"Camera centered on the {PICK_KIND_NAMES[picked[0]]}")
+    glutPostRedisplay()
+# ============================================================================
+# MAIN DISPLAY AND LOOP FUNCTIONS
+# ============================================================================
+
+def idle():
+    """Idle function for continuous updates"""
+    global current_time, last_time
+
+    if game_state == GAME_STATE_MENU:
+        draw_start_menu()
+    if game_state == GAME_STATE_SIMULATION:
+        current_time = time.time()
+        dt = current_time - last_time
+        last_time = current_time
+
+        if replay_active:
+            advance_replay(min(dt, DT * 3.0))
+            glutPostRedisplay()
+            return
         
-        if accumulated_time > 0.001:
-            update_physics(accumulated_time)
-            handle_sequences(accumulated_time)
+        simulation.advance(dt)
+        simulation.refit_picking()
+        probe_mark('picking')
+        if trajectory_overlay:
+            simulation.predict_trajectory()
+            probe_mark('trajectory')
+        publish_telemetry()
+        probe_mark('telemetry')
+
+        if current_time - last_ring_snapshot_time >= SNAPSHOT_RING_INTERVAL:
+            push_ring_snapshot()
     
     glutPostRedisplay()
 
@@ -2108,7 +7336,7 @@ def show_screen():
     """Main display function"""
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
-    glViewport(0, 0, 1000, 800)
+    glViewport(0, 0, *VIEWPORT_SIZE)
     
     if game_state == GAME_STATE_MENU:
         draw_start_menu()
@@ -2123,7 +7351,12 @@ def show_screen():
         if planets:
             draw_planets()
 
+        draw_minor_bodies()
+
         draw_star_destroyer()
+        if trajectory_overlay:
+            draw_trajectory_prediction()
+        draw_fleet()
         
         if is_black_hole_active:
             draw_simulation_black_hole()
@@ -2131,21 +7364,124 @@ def show_screen():
         if is_supernova_active:
             draw_supernova_explosion()
         
-        if debris_particles:
+        if debris_particle_count():
             draw_debris()
         
         draw_hud()
         draw_instructions()
         
     glutSwapBuffers()
+    probe_mark('draw')
+    finish_allocation_frame()
+
+    if startup_profile['first_frame'] is None:
+        startup_profile['first_frame'] = time.perf_counter() - STARTUP_CLOCK_ORIGIN
+        if startup_profile_report:
+            report_startup_profile()
+
+def parse_command_line():
+    """Parse command-line options for the headless tools"""
+    parser = argparse.ArgumentParser(description="Limen Tenebrae: An Interactive Black Hole Physics Simulator")
+    parser.add_argument('--sweep', metavar='SPEC', help="run a headless parameter sweep described by a JSON spec")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for headless tools (default: all cores)")
+    parser.add_argument('--log-file', metavar='PATH', help="also append console messages to PATH")
+    parser.add_argument('--quiet', action='store_true', help="do not write messages to the console")
+    parser.add_argument('--threads', type=int, default=None,
+                        help=f"worker threads for chunked particle kernels (default: {PARALLEL_KERNEL_THREADS})")
+    parser.add_argument('--benchmark-kernels', action='store_true',
+                        help="time the chunked debris kernel for 1, 2, 4 and 8 threads and exit")
+    parser.add_argument('--debris-shards', type=int, default=0, metavar='N',
+                        help="advance debris in N worker processes over shared memory (default: in-process)")
+    parser.add_argument('--benchmark-shards', action='store_true',
+                        help="time shared-memory debris shards for 1, 2 and 4 processes and exit")
+    parser.add_argument('--telemetry', type=int, nargs='?', const=TELEMETRY_DEFAULT_PORT, default=None, metavar='PORT',
+                        help=f"stream telemetry frames to local TCP viewers (default port: {TELEMETRY_DEFAULT_PORT})")
+    parser.add_argument('--precision', choices=tuple(PRECISION_MODES), default='float64',
+                        help="particle storage: float64 world coordinates or float32 around a floating origin")
+    parser.add_argument('--precision-report', action='store_true',
+                        help="compare the float32 particle path against float64 over a long run and exit")
+    parser.add_argument('--benchmark-generator', action='store_true',
+                        help="time generating a million belt, Kuiper cloud and moon bodies and exit")
+    parser.add_argument('--particle-budget', type=int, default=PARTICLE_BUDGET_CAP, metavar='N',
+                        help=f"cap on live supernova and debris particles (default: {PARTICLE_BUDGET_CAP})")
+    parser.add_argument('--particle-frame-ms', type=float, default=None, metavar='MS',
+                        help="adapt the particle cap so particle updates take about MS milliseconds per step")
+    parser.add_argument('--benchmark-picking', action='store_true',
+                        help="time BVH ray picking among 100k bodies and exit")
+    parser.add_argument('--ephemeris', nargs='?', const=EPHEMERIS_PATH, default=None, metavar='PATH',
+                        help=f"drive the planets from a Chebyshev ephemeris file, building it first if missing (default: {EPHEMERIS_PATH})")
+    parser.add_argument('--build-ephemeris', action='store_true',
+                        help="build the ephemeris of the initial solar system, report fit error and evaluation cost and exit")
+    parser.add_argument('--trace-allocations', type=int, nargs='?', const=ALLOCATION_SNAPSHOT_FRAMES, default=None,
+                        metavar='FRAMES', help="trace memory allocations per stage, reporting every FRAMES frames "
+                        f"(default: {ALLOCATION_SNAPSHOT_FRAMES})")
+    parser.add_argument('--allocation-report', action='store_true',
+                        help="run the initial solar system headless under the allocation probe, report and exit")
+    parser.add_argument('--benchmark-trajectory', action='store_true',
+                        help="time incremental vs. full spaceship trajectory prediction, check it against flight and exit")
+    parser.add_argument('--check-isolation', action='store_true',
+                        help="step two simulations in turn, check neither changes the other's state and exit")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print import, GL import, window, init and first-frame times")
+    return parser.parse_args()
 
 def main():
     """Main function to initialize and run the simulation"""
+    global startup_profile_report
+    args = parse_command_line()
+    sinks = [] if args.quiet else [print]
+    if args.log_file:
+        sinks.append(make_file_log_sink(args.log_file))
+    set_log_sinks(sinks)
+    atexit.register(flush_log)
+    if args.threads is not None:
+        set_kernel_threads(args.threads)
+    if args.benchmark_kernels:
+        benchmark_parallel_kernels()
+        return
+    if args.benchmark_shards:
+        benchmark_debris_shards()
+        return
+    if args.precision_report:
+        precision_accuracy_report()
+        return
+    if args.benchmark_generator:
+        benchmark_scenario_generator()
+        return
+    if args.benchmark_picking:
+        benchmark_picking()
+        return
+    if args.build_ephemeris:
+        build_ephemeris()
+        return
+    if args.allocation_report:
+        allocation_steady_state_report()
+        return
+    if args.benchmark_trajectory:
+        benchmark_trajectory()
+        return
+    if args.check_isolation:
+        check_simulation_isolation()
+        return
+    set_particle_precision(args.precision)
+    set_particle_budget(args.particle_budget,
+                        None if args.particle_frame_ms is None else args.particle_frame_ms / 1000.0)
+    if args.sweep:
+        run_sweep_from_spec(args.sweep, args.workers)
+        return
+
+    startup_profile_report = args.profile_startup
+    phase_start = time.perf_counter()
+    _load_gl()
+    startup_profile['gl_import'] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(1000, 800)
     glutInitWindowPosition(0, 0)
     glutCreateWindow(b"Limen Tenebrae: An Interactive Black Hole Physics Simulator")
+    startup_profile['window'] = time.perf_counter() - phase_start
     
     glEnable(GL_DEPTH_TEST)
     
@@ -2157,9 +7493,26 @@ def main():
     glutMouseFunc(mouse_listener)
     glutIdleFunc(idle)
     
+    phase_start = time.perf_counter()
     init_simulation()
+    if args.ephemeris:
+        if not os.path.exists(args.ephemeris):
+            build_ephemeris(args.ephemeris)
+        simulation.attach_ephemeris(open_ephemeris(args.ephemeris))
+    startup_profile['init'] = time.perf_counter() - phase_start
+    if args.debris_shards > 0:
+        start_debris_shards(args.debris_shards)
+        atexit.register(stop_debris_shards)
+    if args.telemetry is not None:
+        start_telemetry_server(args.telemetry)
+        atexit.register(stop_telemetry_server)
+    if args.trace_allocations:
+        start_allocation_probe(args.trace_allocations)
+        atexit.register(stop_allocation_probe)
     
     glutMainLoop()
 
+startup_profile['import'] = time.perf_counter() - STARTUP_CLOCK_ORIGIN
+
 if __name__ == "__main__":
     main()